@@ -0,0 +1,144 @@
+# core-api/benchmarks/fake_ollama.py
+"""
+Local stand-in for the Ollama `/api/chat` endpoint, so benchmarks don't
+depend on a GPU box. Latency, failure rate and reply format are
+configurable and the randomness is seeded.
+
+    python benchmarks/fake_ollama.py --port 11434 --latency 0.2 --jitter 0.05 --failure-rate 0.1
+
+Reply formats:
+    number   a plain score ("55.5"), or a JSON array for batch prompts
+    chatty   the same wrapped in prose (what llama3 usually does)
+    garbage  no number at all (every reply is a parse failure)
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FORMATS = ('number', 'chatty', 'garbage')
+BATCH_RIDER = re.compile(r"- id (\S+?):")
+
+
+class _Server(ThreadingHTTPServer):
+    # Room for the connection bursts of the async worker mode (default backlog: 5)
+    request_queue_size = 1024
+
+
+class FakeOllama:
+    def __init__(self, port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 failure_rate: float = 0.0, reply_format: str = 'number', seed: int = 0):
+        if reply_format not in FORMATS:
+            raise ValueError(f"reply_format must be one of {', '.join(FORMATS)}")
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.reply_format = reply_format
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'batch_calls': 0, 'failures': 0}
+        self.server = _Server(('127.0.0.1', port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self) -> 'FakeOllama':
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # --- Replies ---
+    def _draw(self):
+        """(delay, fails, score) for one call."""
+        with self._lock:
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            fails = self._random.random() < self.failure_rate
+            score = round(self._random.uniform(20, 90), 1)
+            return delay, fails, score
+
+    def reply(self, prompt: str, score: float) -> str:
+        riders = BATCH_RIDER.findall(prompt)
+        if self.reply_format == 'garbage':
+            return "I cannot score this rider without more context."
+        if riders:
+            content = json.dumps([{"id": rider_id, "elo": round((score + i * 3.7) % 100, 1)}
+                                  for i, rider_id in enumerate(riders)])
+        else:
+            content = f"{score:.1f}"
+        if self.reply_format == 'chatty':
+            return f"Sure! Based on the rider data, here is the result: {content}. Ride safe!"
+        return content
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, payload: dict):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                # Stats of the fake server itself
+                self._send(200, dict(fake.stats))
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                prompt = request.get('messages', [{}])[-1].get('content', '')
+                delay, fails, score = fake._draw()
+                with fake._lock:
+                    fake.stats['calls'] += 1
+                    fake.stats['batch_calls'] += bool(BATCH_RIDER.search(prompt))
+                    fake.stats['failures'] += fails
+                time.sleep(delay)
+
+                if fails:
+                    self._send(500, {"error": "fake ollama: injected failure"})
+                    return
+                self._send(200, {
+                    "model": request.get('model', 'fake'),
+                    "created_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                    "message": {"role": "assistant", "content": fake.reply(prompt, score)},
+                    "done": True
+                })
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds per reply.')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Uniform +/- seconds added to the latency.')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of calls answered with HTTP 500.')
+    parser.add_argument('--format', dest='reply_format', choices=FORMATS, default='number')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeOllama(args.port, args.latency, args.jitter, args.failure_rate, args.reply_format, args.seed)
+    print(f"Fake Ollama listening on {fake.url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+# core-api/benchmarks/load.py
+"""
+Load benchmark: seeds a throwaway SQLite database, points the AI client at
+a local fake Ollama (benchmarks/fake_ollama.py), and drives the app built
+by create_app with concurrent test clients. For every scenario it reports
+throughput and p50/p95/p99 latency, and can write the results as JSON and
+compare them with an earlier run.
+
+    PYTHONPATH=. python benchmarks/load.py --users 2000 --readings 5 --requests 500 --concurrency 4 \\
+        --output bench.json
+    PYTHONPATH=. python benchmarks/load.py --compare bench.json --max-regression 15
+
+The request mix of each scenario is generated from --seed, so runs with the
+same arguments send the same requests.
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.fake_ollama import FakeOllama, FORMATS
+
+BENCH_PASSWORD = 'bench-password'
+CENTER = (4.65, -74.05)  # Bogotá
+SCENARIOS = ('users_list', 'friends', 'sensor_post', 'elo_calculate', 'login')
+
+
+def configure_environment(args, ai_url: str, workdir: str):
+    """The app reads these at import time, so this runs before importing src."""
+    os.environ.update({
+        'FLASK_ENV': 'testing',
+        'TEST_DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'bench.sqlite')}",
+        'OLLAMA_HOST': ai_url,
+        'ELO_WORKER_THREADS': str(args.elo_workers),
+        'ELO_LOCK_DIR': os.path.join(workdir, 'locks'),
+        'SENSOR_ARCHIVE_DIR': os.path.join(workdir, 'archive'),
+        'ELO_CACHE_DB': '',
+        'RESPONSE_CACHE_DB': '',
+    })
+
+def build_app():
+    from src import create_app
+    from src.user.auth import init_jwt
+    app = create_app('testing')
+    init_jwt(app)
+    return app
+
+def seed(app, users: int, readings: int, rng: random.Random):
+    """N users (user 1 is an ADMIN) with M readings each around CENTER."""
+    from sqlalchemy import insert
+    from src.models import db, User, UserSensorData
+    from src.user.telemetry import backfill_latest_telemetry
+    from src.user.util import Util
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(insert(User), [{
+            'username': f'rider{i}',
+            'email': f'rider{i}@bench.local',
+            'password': Util.salifyHash(BENCH_PASSWORD, f'rider{i}@bench.local'),
+            'name': f'Rider {i}',
+            'lastname': 'Bench',
+            'address': 'Bench St',
+            'gender': 'MALE',
+            'profile': 'ADMIN' if i == 1 else 'BIKER',
+            'membership_level': 'NO',
+            'phone': '3000000000',
+            'birthdate': date(1960, 1, 1) + timedelta(days=rng.randint(0, 15000)),
+            'elo_score': round(rng.uniform(10, 90), 1),
+        } for i in range(1, users + 1)])
+
+        now = datetime.utcnow()
+        rows = []
+        for user_id in range(1, users + 1):
+            for k in range(readings):
+                rows.append({**reading(user_id, rng), 'timestamp': now - timedelta(hours=k, minutes=user_id % 60)})
+            if len(rows) >= 10000:
+                db.session.execute(insert(UserSensorData), rows)
+                rows = []
+        if rows:
+            db.session.execute(insert(UserSensorData), rows)
+        db.session.commit()
+        backfill_latest_telemetry()
+
+def reading(user_id: int, rng: random.Random) -> dict:
+    return {
+        'user_id': user_id,
+        'last_month_miles': round(rng.uniform(0, 800), 1),
+        'total_miles': round(rng.uniform(0, 8000), 1),
+        'avg_speed': round(rng.uniform(10, 120), 1),
+        'braking_events': rng.randint(0, 30),
+        'heart_rate': rng.randint(50, 180),
+        'blood_pressure': rng.randint(90, 140),
+        'stress_level': rng.randint(0, 100),
+        'sleep_quality': rng.randint(0, 10),
+        'latitude': CENTER[0] + rng.uniform(-0.5, 0.5),
+        'longitude': CENTER[1] + rng.uniform(-0.5, 0.5),
+    }
+
+def admin_token(app) -> str:
+    from src.models import db, User
+    from src.user.auth import issue_tokens
+    with app.app_context():
+        return issue_tokens(db.session.get(User, 1))['access_token']
+
+# --- Scenarios ---
+def build_requests(name: str, count: int, users: int, token: str, rng: random.Random):
+    """(method, path, kwargs for the test client) of every request of a scenario."""
+    auth = {'Authorization': f'Bearer {token}'}
+    requests = []
+    for _ in range(count):
+        user_id = rng.randint(1, users)
+        if name == 'users_list':
+            requests.append(('GET', f'/users/?after_id={rng.randint(0, max(users - 100, 0))}&limit=100', {}))
+        elif name == 'friends':
+            lat = CENTER[0] + rng.uniform(-0.5, 0.5)
+            lon = CENTER[1] + rng.uniform(-0.5, 0.5)
+            requests.append(('GET', f'/users/friends?lat={lat:.5f}&lon={lon:.5f}&radius_km=10&k=20', {}))
+        elif name == 'sensor_post':
+            requests.append(('POST', '/sensors/data', {'json': reading(user_id, rng), 'headers': auth}))
+        elif name == 'elo_calculate':
+            requests.append(('GET', f'/elo/calculate/{user_id}', {'headers': auth}))
+        elif name == 'login':
+            requests.append(('POST', '/users/login', {'json': {
+                'email': f'rider{user_id}@bench.local', 'password': BENCH_PASSWORD}}))
+    return requests
+
+def percentile(ordered, p: float) -> float:
+    if not ordered:
+        return 0.0
+    # Nearest rank
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+def run_scenario(app, requests, concurrency: int, warmup: int):
+    """Send the requests from `concurrency` threads; latency in ms and status counts."""
+    client = app.test_client()
+    for method, path, kwargs in requests[:warmup]:
+        client.open(path, method=method, **kwargs)
+
+    measured = requests[warmup:]
+    latencies = [0.0] * len(measured)
+    statuses = [0] * len(measured)
+    cursor = iter(range(len(measured)))
+    cursor_lock = threading.Lock()
+
+    def worker():
+        thread_client = app.test_client()
+        while True:
+            with cursor_lock:
+                i = next(cursor, None)
+            if i is None:
+                return
+            method, path, kwargs = measured[i]
+            started = time.perf_counter()
+            response = thread_client.open(path, method=method, **kwargs)
+            latencies[i] = (time.perf_counter() - started) * 1000
+            statuses[i] = response.status_code
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    status_counts = {}
+    for status in statuses:
+        status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+    return {
+        'requests': len(measured),
+        'errors': sum(1 for status in statuses if status >= 400),
+        'statuses': status_counts,
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(len(measured) / elapsed, 1) if elapsed else None,
+        'latency_ms': {
+            'mean': round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+            'p50': round(percentile(ordered, 50), 3),
+            'p95': round(percentile(ordered, 95), 3),
+            'p99': round(percentile(ordered, 99), 3),
+            'max': round(ordered[-1], 3) if ordered else 0.0,
+        },
+    }
+
+# --- Reports ---
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_table(results):
+    print(f"{'scenario':<15}{'req':>7}{'err':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, result in results.items():
+        latency = result['latency_ms']
+        print(f"{name:<15}{result['requests']:>7}{result['errors']:>6}{result['throughput_rps']:>10}"
+              f"{latency['p50']:>10}{latency['p95']:>10}{latency['p99']:>10}")
+
+def compare(results, baseline, max_regression: float) -> bool:
+    """Print the change against a baseline run; False if a scenario regressed."""
+    ok = True
+    print(f"\nvs {baseline['meta'].get('git_commit') or 'baseline'} ({baseline['meta']['timestamp']})")
+    for name, result in results.items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        p95 = _change(before['latency_ms']['p95'], result['latency_ms']['p95'])
+        rps = _change(before['throughput_rps'], result['throughput_rps'])
+        regressed = p95 > max_regression or rps < -max_regression
+        ok = ok and not regressed
+        print(f"{name:<15} p95 {p95:+7.1f}%  rps {rps:+7.1f}%{'  REGRESSION' if regressed else ''}")
+    return ok
+
+def _change(before, after) -> float:
+    if not before:
+        return 0.0
+    return (after - before) / before * 100
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000, help='Users to seed (N).')
+    parser.add_argument('--readings', type=int, default=5, help='Readings per user (M).')
+    parser.add_argument('--requests', type=int, default=300, help='Measured requests per scenario.')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests sent first.')
+    parser.add_argument('--concurrency', type=int, default=4, help='Client threads.')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='Repeatable (default: all).')
+    parser.add_argument('--elo-workers', type=int, default=0, help='In-process ELO job threads (ELO_WORKER_THREADS).')
+    parser.add_argument('--ai-latency', type=float, default=0.05, help='Seconds per fake AI reply.')
+    parser.add_argument('--ai-jitter', type=float, default=0.0)
+    parser.add_argument('--ai-failure-rate', type=float, default=0.0)
+    parser.add_argument('--ai-format', choices=FORMATS, default='number')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write the results as JSON.')
+    parser.add_argument('--compare', help='Results JSON of an earlier run.')
+    parser.add_argument('--max-regression', type=float, default=10.0,
+                        help='Percent of p95 increase or throughput drop that fails --compare.')
+    parser.add_argument('--verbose', action='store_true', help='Keep the app logs.')
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.ERROR)
+        warnings.simplefilter('ignore')
+
+    fake = FakeOllama(latency=args.ai_latency, jitter=args.ai_jitter, failure_rate=args.ai_failure_rate,
+                      reply_format=args.ai_format, seed=args.seed).start()
+    workdir = tempfile.mkdtemp(prefix='core-api-bench-')
+    configure_environment(args, fake.url, workdir)
+    app = build_app()
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    seed(app, args.users, args.readings, rng)
+    seed_seconds = time.perf_counter() - started
+    token = admin_token(app)
+
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        requests = build_requests(name, args.warmup + args.requests, args.users, token,
+                                  random.Random(f"{args.seed}:{name}"))
+        results[name] = run_scenario(app, requests, args.concurrency, args.warmup)
+    fake.stop()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed_seconds': round(seed_seconds, 2),
+            'ai_calls': fake.stats,
+            'params': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'verbose')},
+        },
+        'results': results,
+    }
+
+    print_table(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        params = {key: value for key, value in report['meta']['params'].items() if key != 'max_regression'}
+        if params != {key: value for key, value in baseline['meta']['params'].items() if key != 'max_regression'}:
+            print("warning: the baseline was run with different parameters")
+        if not compare(results, baseline, args.max_regression):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
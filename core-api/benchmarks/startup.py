@@ -0,0 +1,70 @@
+# core-api/benchmarks/startup.py
+"""
+Startup benchmark: import time of the app and latency of the first
+request, each run in a fresh interpreter (what a new gunicorn worker or a
+cold autoscaled container pays).
+
+    PYTHONPATH=. python benchmarks/startup.py --runs 10 --path /ping --path /events/
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from src.app import app
+imported = time.perf_counter()
+client = app.test_client()
+first = {}
+for path in sys.argv[1:]:
+    t = time.perf_counter()
+    response = client.get(path)
+    first[path] = [(time.perf_counter() - t) * 1000, response.status_code]
+print(json.dumps({'import_ms': (imported - started) * 1000, 'first_request': first}))
+"""
+
+def run_once(paths):
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE, *paths],
+        capture_output=True, text=True, check=True, env=os.environ.copy()
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+def summary(values):
+    return {
+        'median': round(statistics.median(values), 1),
+        'min': round(min(values), 1),
+        'max': round(max(values), 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', action='append', help='Request sent right after the import (repeatable).')
+    args = parser.parse_args()
+    paths = args.path or ['/ping']
+
+    results = [run_once(paths) for _ in range(args.runs)]
+    report = {
+        'runs': args.runs,
+        'process_ms': summary([r['process_ms'] for r in results]),
+        'import_ms': summary([r['import_ms'] for r in results]),
+        'first_request_ms': {
+            path: {**summary([r['first_request'][path][0] for r in results]),
+                   'status': results[-1]['first_request'][path][1]}
+            for path in paths
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+# core-api/gunicorn.conf.py
+
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+wsgi_app = 'src.app:app'
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+# Threaded workers: a live stream (/users/friends/stream) holds one thread,
+# and sync workers would be killed by the timeout mid-stream
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'debug')
+
+# Async worker mode: ASGI workers await the AI calls on an event loop (hundreds
+# in flight per worker); DB work and the other endpoints run in bounded thread
+# pools (ASYNC_DB_THREADS, ASYNC_WSGI_THREADS), see src/asgi.py
+if os.getenv('ASYNC_MODE', '0') == '1':
+    wsgi_app = 'src.asgi:app'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+
+# Import the app once in the master; workers fork with it already loaded
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+def when_ready(server):
+    # Move the preloaded objects out of the GC generations so the collector
+    # doesn't touch (and copy) their pages in every worker
+    if preload_app:
+        gc.freeze()
+
+def post_fork(server, worker):
+    # Connections opened by the master must not be shared with the workers
+    if preload_app:
+        from src.app import app
+        from src.models import db
+        with app.app_context():
+            db.engine.dispose(close=False)
@@ -1,11 +1,25 @@
 # core-api/manage.py
 
 from flask.cli import FlaskGroup
+from src import init_migrate
 from src.app import app
-from src.models import db, User, UserSensorData
+from src.models import db, User, UserSensorData, Event, Profile
+from src.user.elo_jobs import EloWorkerPool
+from src.user.elo_recompute import recompute_elo as recompute_all_elo
+from src.user.telemetry import backfill_latest_telemetry, check_latest_telemetry
+from src.user.rollups import compact_rollups
+from src.user.archive import archive_sensor_data as archive_old_sensor_data
+from src.user.aggregates import rebuild_rider_aggregates as rebuild_all_rider_aggregates
+from datetime import datetime, timedelta
+import click
+import time
 
 cli = FlaskGroup(app)
 
+# `python manage.py db init|migrate|upgrade`
+migrate = init_migrate(app)
+cli.add_command(app.cli.commands[migrate.command])
+
 @cli.command("create_db")
 def create_db():
     """Crea la base de datos y las tablas."""
@@ -13,6 +27,15 @@ def create_db():
     db.session.commit()
     print("Base de datos creada.")
 
+@cli.command("reset_db")
+@click.confirmation_option(prompt="Se borrarán todos los datos. ¿Continuar?")
+def reset_db():
+    """Borra y vuelve a crear todas las tablas (solo desarrollo)."""
+    db.drop_all()
+    db.create_all()
+    db.session.commit()
+    print("Base de datos reiniciada.")
+
 @cli.command("seed_db")
 def seed_db():
     """Inserta datos de prueba en la base de datos."""
@@ -31,5 +54,109 @@ def seed_db():
     db.session.commit()
     print("Datos de prueba insertados.")
 
+@cli.command("seed_events")
+def seed_events():
+    """Inserta los eventos de ejemplo (antes servidos como MOCK_EVENTS)."""
+    for i, elo in enumerate([100.0, 200.0, 500.0, 600.0, 800.0], start=1):
+        db.session.add(Event(
+            title=f"Event {i}",
+            description="View Event Details",
+            image=f".bike{i}",
+            min_elo=elo
+        ))
+    db.session.commit()
+    print("Eventos de prueba insertados.")
+
+@cli.command("elo_worker")
+@click.option("--threads", default=2, show_default=True, help="Worker threads.")
+@click.option("--poll-interval", default=1.0, show_default=True, help="Seconds between polls when the queue is empty.")
+@click.option("--batch-size", default=None, type=int, help="Jobs scored per AI prompt (default ELO_JOB_BATCH_SIZE).")
+def elo_worker(threads, poll_interval, batch_size):
+    """Procesa la cola de cálculos de ELO en segundo plano."""
+    pool = EloWorkerPool(app, threads, poll_interval, batch_size or app.config['ELO_JOB_BATCH_SIZE'])
+    pool.start()
+    print(f"ELO worker iniciado con {threads} hilos.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pool.stop(timeout=5)
+        print("ELO worker detenido.")
+
+@cli.command("recompute_elo")
+@click.option("--chunk-size", default=10000, show_default=True, help="Users per chunk.")
+@click.option("--dry-run", is_flag=True, help="Score without writing the results.")
+@click.option("--ai", is_flag=True, help="Score with batched AI prompts instead of the rules.")
+def recompute_elo(chunk_size, dry_run, ai):
+    """Recalcula el ELO de todos los usuarios con las reglas actuales (o con la IA)."""
+    started = time.perf_counter()
+    stats = recompute_all_elo(chunk_size=chunk_size, dry_run=dry_run, use_ai=ai)
+    elapsed = time.perf_counter() - started
+    print(f"ELO recalculado: {stats['scored']} usuarios, {stats['skipped']} omitidos, "
+          f"{stats['chunks']} bloques en {elapsed:.2f}s.")
+
+@cli.command("backfill_latest_telemetry")
+@click.option("--chunk-size", default=10000, show_default=True, help="Users per chunk.")
+def backfill_telemetry(chunk_size):
+    """Reconstruye user_latest_telemetry desde user_sensor_data."""
+    total = backfill_latest_telemetry(chunk_size=chunk_size)
+    print(f"Última telemetría actualizada para {total} usuarios.")
+
+@cli.command("check_latest_telemetry")
+@click.option("--chunk-size", default=10000, show_default=True, help="Users per chunk.")
+@click.option("--fix", is_flag=True, help="Repair the inconsistent rows.")
+def check_telemetry(chunk_size, fix):
+    """Verifica que user_latest_telemetry coincida con user_sensor_data."""
+    report = check_latest_telemetry(chunk_size=chunk_size, fix=fix)
+    print(f"Usuarios revisados: {report['checked']}, faltantes: {report['missing']}, "
+          f"desactualizados: {report['stale']}, huérfanos: {report['orphan']}, corregidos: {report['fixed']}")
+    for example in report['examples']:
+        print(f"  user {example['user_id']}: {example['problem']}")
+    if not fix and (report['missing'] or report['stale'] or report['orphan']):
+        raise SystemExit(1)
+
+@cli.command("rollup_sensor_data")
+@click.option("--from", "start", type=click.DateTime(), default=None, help="Window start (default: yesterday).")
+@click.option("--to", "end", type=click.DateTime(), default=None, help="Window end (default: today 00:00).")
+@click.option("--chunk-size", default=1000, show_default=True, help="Users per chunk.")
+def rollup_sensor_data(start, end, chunk_size):
+    """Recalcula los agregados horarios/diarios de los sensores (idempotente)."""
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    end = end or today
+    start = start or end - timedelta(days=1)
+    stats = compact_rollups(start, end, chunk_size=chunk_size)
+    print(f"Agregados recalculados de {start:%Y-%m-%d} a {end:%Y-%m-%d}: "
+          f"{stats['readings']} lecturas, {stats['buckets']} buckets, {stats['users']} usuarios.")
+
+@cli.command("archive_sensor_data")
+@click.option("--older-than-days", type=int, default=None, help="Default: SENSOR_RETENTION_DAYS.")
+@click.option("--chunk-size", default=1000, show_default=True, help="Users per chunk.")
+def archive_sensor_data(older_than_days, chunk_size):
+    """Mueve las lecturas antiguas de los sensores a archivos de segmentos."""
+    days = older_than_days if older_than_days is not None else app.config['SENSOR_RETENTION_DAYS']
+    stats = archive_old_sensor_data(days, chunk_size=chunk_size)
+    print(f"Lecturas archivadas: {stats['readings']} en {stats['segments']} segmentos "
+          f"({stats['users']} usuarios, anteriores a {days} días).")
+
+@cli.command("rebuild_rider_aggregates")
+@click.option("--chunk-size", default=1000, show_default=True, help="Users per chunk.")
+def rebuild_rider_aggregates(chunk_size):
+    """Recalcula los agregados por ciclista (EWMA y ventana) desde todo el historial."""
+    stats = rebuild_all_rider_aggregates(chunk_size=chunk_size)
+    print(f"Agregados por ciclista recalculados: {stats['users']} usuarios, "
+          f"{stats['readings']} lecturas en {stats['chunks']} bloques.")
+
+@cli.command("grant_admin")
+@click.argument("email")
+@click.option("--revoke", is_flag=True, help="Give the user the BIKER profile back.")
+def grant_admin(email, revoke):
+    """Da (o quita) el perfil ADMIN a un usuario; no se puede elegir al registrarse."""
+    user = User.query.filter_by(email=email).first()
+    if user is None:
+        raise click.ClickException(f"Usuario no encontrado: {email}")
+    user.profile = Profile.BIKER if revoke else Profile.ADMIN
+    db.session.commit()
+    print(f"Perfil de {email}: {user.profile.name} (aplica a los tokens emitidos desde ahora).")
+
 if __name__ == "__main__":
     cli()
\ No newline at end of file
@@ -1,35 +1,43 @@
 # core-api/src/__init__.py
 
 from flask import Flask
-from flask_migrate import Migrate
 from src.config import config
 from dotenv import load_dotenv
 import os
 
 from src.models import db
+from src.metrics import init_metrics
+from src.db_routing import configure_engines, init_db_routing
+from src.serializers import OrjsonProvider
 # from src.candidate.views import candidates_blueprint
 from .user.views import users_blueprint, sensor_blueprint, elo_blueprint
+from .user.elo_service import elo_cache
 from .events.views import events_blueprint
 
+ENV_FILES = {
+    'development': '.env',
+    'testing': '.env.test',
+    'production': '.env.prod',
+}
+_loaded_env_files = set()
+
+def load_env(config_name):
+    """Load the dotenv file of an environment once per process."""
+    env_file = ENV_FILES.get(config_name, '.env')
+    if env_file not in _loaded_env_files:
+        load_dotenv(env_file)
+        _loaded_env_files.add(env_file)
 
 # app constructor
 def create_app(config_name):
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
 
     # set config
     config_name = os.getenv('FLASK_ENV', 'development')
 
     # load .env file
-    if config_name == 'development':
-        env_file = '.env'
-    elif config_name == 'testing':
-        env_file = '.env.test'
-    elif config_name == 'production':
-        env_file = '.env.prod'
-    else:
-        env_file = '.env'
-
-    load_dotenv(env_file)
+    load_env(config_name)
 
     # set configuration
     if config_name == 'development':
@@ -41,13 +49,19 @@ def create_app(config_name):
     else:
         app.config.from_object(config['default'])
 
-    # init db
+    # init db (pool settings, read replicas)
+    configure_engines(app)
     db.init_app(app)
 
-    # init migrate
-    migrate = Migrate(app, db)
-    print(f'Migrate initialized: {migrate}')
-   
+    # request latency and SQL counters (/metrics)
+    init_metrics(app)
+
+    # GET requests of the API blueprints read from the replicas, if any
+    init_db_routing(app, db)
+
+    # ELO result cache settings
+    elo_cache.init_app(app)
+
     # register blueprint
     app.register_blueprint(users_blueprint)
     app.register_blueprint(sensor_blueprint)
@@ -55,3 +69,11 @@ def create_app(config_name):
     app.register_blueprint(events_blueprint)
 
     return app
+
+def init_migrate(app):
+    """
+    Flask-Migrate (`python manage.py db ...`). Only the CLI needs it, and
+    alembic is slow to import, so web workers skip it.
+    """
+    from flask_migrate import Migrate
+    return Migrate(app, db)
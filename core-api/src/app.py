@@ -6,32 +6,26 @@ from src.models import db
 import logging
 import os
 
-from flask_jwt_extended import JWTManager
-
-# app setup
-app = create_app('default')
-app_context = app.app_context()
-app_context.push()
-print(f"DB_URI: {app.config['SQLALCHEMY_DATABASE_URI']}")
+from src.user.auth import init_jwt
 
 # logging setup
 logging.basicConfig(level=logging.DEBUG)
 
-# db setup
-with app.app_context():
-    db.drop_all()
-    db.create_all()
-    db.session.commit()
-    # pass
+# app setup (no I/O here: the schema is managed with `python manage.py create_db`
+# or `python manage.py db upgrade`, see README)
+app = create_app('default')
+app_context = app.app_context()
+app_context.push()
+logging.getLogger(__name__).debug(f"DB_URI: {app.config['SQLALCHEMY_DATABASE_URI']}")
 
 # Cors
 cors = CORS(app)
 
 # JWT Auth
-jwt = JWTManager(app)
+init_jwt(app)
 
 # check-health-component at root level
 @app.route('/ping', methods=['GET'])
 def ping():
     app_name = os.getenv('FLASK_APP_NAME')
-    return {"message":f"pong from {app_name} app"}
\ No newline at end of file
+    return {"message":f"pong from {app_name} app"}
@@ -0,0 +1,194 @@
+# core-api/src/asgi.py
+
+import asyncio
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from a2wsgi import WSGIMiddleware
+from a2wsgi.wsgi import Body, build_environ
+from flask import Response, g
+from flask_jwt_extended import verify_jwt_in_request
+
+from src.app import app as flask_app
+from src.user.elo_service import calculate_elo_async, client as ai_client
+from src.user.live_feed import live_feed
+from src.user.views import elo_params_for_user, live_stream_args, SSE_HEADERS
+
+# Logging
+logger = logging.getLogger(__name__)
+
+# Endpoints awaited on the event loop; everything else goes through the WSGI bridge
+ELO_CALCULATE_PATH = re.compile(r'^/elo/calculate/(\d+)$')
+LIVE_STREAM_PATH = '/users/friends/stream'
+
+# DB work around the awaited AI calls (bounded: the pool, not the requests in flight, sets DB concurrency)
+db_executor = ThreadPoolExecutor(max_workers=flask_app.config['ASYNC_DB_THREADS'],
+                                 thread_name_prefix='async-db')
+# Sync endpoints (users, sensors, events...) in their own bounded thread pool
+wsgi_app = WSGIMiddleware(flask_app, workers=flask_app.config['ASYNC_WSGI_THREADS'])
+
+AsgiResponse = Tuple[int, List[Tuple[bytes, bytes]], bytes]
+
+# --- Flask request phases (run in db_executor) ---
+def _finalize(rv: Any) -> AsgiResponse:
+    """View return value -> status, headers and body, through the after_request hooks."""
+    response = flask_app.finalize_request(rv)
+    try:
+        headers = [(key.lower().encode('latin-1'), value.encode('latin-1')) for key, value in response.headers.items()]
+        return response.status_code, headers, response.get_data()
+    finally:
+        response.close()
+
+def _prepare_elo(environ: Dict[str, Any], user_id: int):
+    """
+    First half of get_elo: before_request hooks, JWT and the rider's ELO
+    params. Returns (params, g state) or (response, None).
+    """
+    with flask_app.request_context(environ):
+        try:
+            rv = flask_app.preprocess_request()
+            if rv is None:
+                verify_jwt_in_request()
+                rv = elo_params_for_user(user_id)
+                if isinstance(rv, dict):
+                    return rv, dict(g.__dict__)
+        except Exception as e:
+            try:
+                rv = flask_app.handle_user_exception(e)
+            except Exception:
+                rv = {"message": str(e), "status": "error"}, 500
+        return _finalize(rv), None
+
+def _finish_elo(environ: Dict[str, Any], state: Dict[str, Any], rv: Any) -> AsgiResponse:
+    """Second half of get_elo: the response, with the g of the first half (metrics, replica routing)."""
+    with flask_app.request_context(environ):
+        g.__dict__.update(state)
+        return _finalize(rv)
+
+def _prepare_stream(environ: Dict[str, Any]):
+    """
+    Live stream request: before_request hooks, arguments and the stream
+    cap. Returns ((bbox, last_event_id), response head) or (response, None).
+    """
+    with flask_app.request_context(environ):
+        try:
+            rv = flask_app.preprocess_request()
+            if rv is None:
+                rv = live_stream_args()
+                if not isinstance(rv[0], dict):
+                    if live_feed.clients >= flask_app.config['LIVE_FEED_ASYNC_MAX_CLIENTS']:
+                        rv = {"message": "Too many live streams, retry later", "status": "fail"}, 503
+                    else:
+                        head = Response(mimetype='text/event-stream', headers=SSE_HEADERS)
+                        status, headers, _ = _finalize(head)
+                        return rv, (status, [header for header in headers if header[0] != b'content-length'])
+        except Exception as e:
+            try:
+                rv = flask_app.handle_user_exception(e)
+            except Exception:
+                rv = {"message": str(e), "status": "error"}, 500
+        return _finalize(rv), None
+
+def _sync_live_feed():
+    with flask_app.app_context():
+        live_feed.sync()
+
+# --- ASGI ---
+async def _send(send, response: AsgiResponse):
+    status, headers, body = response
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+async def elo_calculate(scope, receive, send, user_id: int):
+    """
+    GET /elo/calculate/<id> without holding a thread during the AI call:
+    the DB work runs in db_executor, the call itself is awaited.
+    """
+    loop = asyncio.get_running_loop()
+    environ = build_environ(scope, Body(loop, receive))
+
+    prepared, state = await loop.run_in_executor(db_executor, _prepare_elo, dict(environ), user_id)
+    if state is None:
+        await _send(send, prepared)
+        return
+
+    try:
+        elo_score = await calculate_elo_async(prepared)
+        rv = {"elo_score": elo_score, "status": "success"}, 200
+    except Exception as e:
+        rv = {"message": str(e), "status": "error"}, 500
+    await _send(send, await loop.run_in_executor(db_executor, _finish_elo, dict(environ), state, rv))
+
+async def friends_stream(scope, receive, send):
+    """
+    GET /users/friends/stream on the event loop: an idle viewer is a
+    suspended coroutine, not a thread (LIVE_FEED_ASYNC_MAX_CLIENTS per worker).
+    """
+    loop = asyncio.get_running_loop()
+    environ = build_environ(scope, Body(loop, receive))
+    args, head = await loop.run_in_executor(db_executor, _prepare_stream, dict(environ))
+    if head is None:
+        await _send(send, args)
+        return
+
+    bbox, last_event_id = args
+    status, headers = head
+
+    async def pump():
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        events = live_feed.astream(bbox, last_event_id, flask_app.config['LIVE_FEED_MAX_SECONDS'],
+                                   flask_app.json.dumps, lambda: loop.run_in_executor(db_executor, _sync_live_feed))
+        try:
+            async for message in events:
+                await send({'type': 'http.response.body', 'body': message.encode(), 'more_body': True})
+        finally:
+            await events.aclose()  # releases the stream slot even when cancelled mid-send
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def disconnected():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    # The stream ends on its own (LIVE_FEED_MAX_SECONDS) or when the client goes away
+    tasks = {loop.create_task(pump()), loop.create_task(disconnected())}
+    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    for task in done:
+        task.result()
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            logger.info("Async worker mode: AI calls on the event loop, "
+                        f"{flask_app.config['ASYNC_DB_THREADS']} DB threads, "
+                        f"{flask_app.config['ASYNC_WSGI_THREADS']} WSGI threads")
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await ai_client.aclose()
+            db_executor.shutdown(wait=False)
+            wsgi_app.executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    """
+    ASGI entry point of the async worker mode (ASYNC_MODE=1, see
+    gunicorn.conf.py).
+    """
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] == 'http' and scope['method'] == 'GET':
+        if scope['path'] == LIVE_STREAM_PATH:
+            await friends_stream(scope, receive, send)
+            return
+        match = ELO_CALCULATE_PATH.match(scope['path'])
+        if match:
+            await elo_calculate(scope, receive, send, int(match.group(1)))
+            return
+    await wsgi_app(scope, receive, send)
@@ -1,6 +1,7 @@
 # core-api/src/config.py
 
 import os
+from datetime import timedelta
 
 # get base directory
 basedir = os.path.join(os.path.dirname(__file__), '..')
@@ -11,9 +12,102 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'hard to guess string'
     PROPAGATE_EXCEPTIONS = True
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pool of every engine (primary and replicas)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', '1') == '1'
+
+    # Read replicas (comma separated URLs) for the GET endpoints, see src/db_routing.py
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', '5'))
+    REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', '5'))
+    READ_YOUR_WRITES_SECONDS = float(os.getenv('READ_YOUR_WRITES_SECONDS', '5'))
     OLLAMA_ENDPOINT = os.getenv('OLLAMA_ENDPOINT', 'http://localhost:11434')
     ELO_MODEL_NAME = os.getenv('ELO_MODEL_NAME', 'motorcycle-elo')
 
+    # ELO scoring jobs
+    ELO_WORKER_THREADS = int(os.getenv('ELO_WORKER_THREADS', '2'))
+    ELO_JOB_POLL_INTERVAL = float(os.getenv('ELO_JOB_POLL_INTERVAL', '1.0'))
+    ELO_JOB_MAX_ATTEMPTS = int(os.getenv('ELO_JOB_MAX_ATTEMPTS', '3'))
+    # Seconds before the first retry of a failed job, doubled on every further attempt
+    ELO_JOB_RETRY_BACKOFF = float(os.getenv('ELO_JOB_RETRY_BACKOFF', '5'))
+    ELO_JOB_STALE_SECONDS = int(os.getenv('ELO_JOB_STALE_SECONDS', '300'))
+    # Jobs claimed together by a worker, and riders per batch AI prompt
+    ELO_JOB_BATCH_SIZE = int(os.getenv('ELO_JOB_BATCH_SIZE', '16'))
+
+    # ELO result cache (ELO_CACHE_DB: optional SQLite file shared by the workers). Inputs are
+    # rounded to these steps, so readings that only differ below a step share an entry (the
+    # scoring rules are far coarser than this)
+    ELO_CACHE_SIZE = int(os.getenv('ELO_CACHE_SIZE', '10000'))
+    ELO_CACHE_TTL = float(os.getenv('ELO_CACHE_TTL', '3600'))
+    ELO_CACHE_DB = os.getenv('ELO_CACHE_DB') or None
+    ELO_CACHE_QUANTIZATION = {
+        'last_month_miles': 5.0,
+        'total_miles': 50.0,
+        'age': 1.0,
+        'heart_rate_avg': 1.0,
+        'braking_events': 1.0,
+        'avg_speed': 0.5,
+        'stress_level': 1.0,
+        'sleep_quality': 1.0,
+    }
+
+    # ELO history (/users/user/<id>/elo/history?points=)
+    ELO_HISTORY_POINTS = int(os.getenv('ELO_HISTORY_POINTS', '500'))
+    ELO_HISTORY_MAX_POINTS = int(os.getenv('ELO_HISTORY_MAX_POINTS', '5000'))
+
+    # Streaming rider aggregates (ELO inputs); changing them needs `manage.py rebuild_rider_aggregates`
+    AGGREGATE_EWMA_ALPHA = float(os.getenv('AGGREGATE_EWMA_ALPHA', '0.2'))
+    AGGREGATE_WINDOW = int(os.getenv('AGGREGATE_WINDOW', '20'))
+
+    # Proximity search (/users/friends?lat=&lon=&radius_km=&k=)
+    GEO_MAX_RESULTS = int(os.getenv('GEO_MAX_RESULTS', '500'))
+
+    # In-memory indexes (geo, leaderboard, revocations, live feed) re-read the rows stamped this long
+    # before their sync watermark: stamps are taken before commit, so a slow transaction
+    # can commit rows older than what another worker already synced
+    SYNC_WATERMARK_OVERLAP_SECONDS = float(os.getenv('SYNC_WATERMARK_OVERLAP_SECONDS', '30'))
+
+    # Live map stream (/users/friends/stream), open streams per worker. Sync workers
+    # spend a thread per stream, so the cap defaults to half of GUNICORN_THREADS;
+    # async workers (ASYNC_MODE=1) only keep a coroutine per stream
+    LIVE_FEED_MAX_CLIENTS = int(os.getenv('LIVE_FEED_MAX_CLIENTS') or max(int(os.getenv('GUNICORN_THREADS', '8')) // 2, 1))
+    LIVE_FEED_ASYNC_MAX_CLIENTS = int(os.getenv('LIVE_FEED_ASYNC_MAX_CLIENTS', '5000'))
+    LIVE_FEED_MAX_SECONDS = float(os.getenv('LIVE_FEED_MAX_SECONDS', '300'))
+
+    # Async worker mode (ASYNC_MODE=1, src/asgi.py): threads per worker for DB work
+    # around the awaited AI calls, and for the endpoints served through the WSGI bridge
+    ASYNC_DB_THREADS = int(os.getenv('ASYNC_DB_THREADS', '8'))
+    ASYNC_WSGI_THREADS = int(os.getenv('ASYNC_WSGI_THREADS', '8'))
+
+    # Pagination and streaming of list endpoints
+    PAGE_MAX_LIMIT = int(os.getenv('PAGE_MAX_LIMIT', '1000'))
+    STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', '500'))
+
+    # Bulk sensor ingestion (/sensors/data/batch)
+    SENSOR_BATCH_MAX_SIZE = int(os.getenv('SENSOR_BATCH_MAX_SIZE', '5000'))
+
+    # Sensor rollups (/sensors/data/<id>/range)
+    ROLLUP_MAX_POINTS = int(os.getenv('ROLLUP_MAX_POINTS', '500'))
+
+    # Retention: readings older than this move to segment files
+    SENSOR_RETENTION_DAYS = int(os.getenv('SENSOR_RETENTION_DAYS', '180'))
+    SENSOR_ARCHIVE_DIR = os.getenv('SENSOR_ARCHIVE_DIR') or os.path.join(basedir, 'src/db/archive')
+
+    # JWT sessions (/users/login, /users/token/refresh); the key signs the profile
+    # claims is_admin trusts, so it never falls back to SECRET_KEY (see init_jwt)
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
+    REQUIRE_JWT_SECRET_KEY = False
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', '15')))
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.getenv('JWT_REFRESH_TOKEN_DAYS', '30')))
+    JWT_REVOCATION_SYNC_INTERVAL = float(os.getenv('JWT_REVOCATION_SYNC_INTERVAL', '5'))
+
+    # Instrumentation (/metrics): requests running more SQL statements are logged as likely N+1
+    METRICS_QUERY_BUDGET = int(os.getenv('METRICS_QUERY_BUDGET', '20'))
+
 # development config
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -27,6 +121,7 @@ class TestingConfig(Config):
 
 # production config
 class ProductionConfig(Config):
+    REQUIRE_JWT_SECRET_KEY = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or     'sqlite:///' + os.path.join(basedir, 'src/db/coreapi_prod.sqlite')
 
 # dictionary of config classes
@@ -0,0 +1,221 @@
+# core-api/src/db_routing.py
+
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from flask import Flask, g, has_request_context, request
+from flask_jwt_extended import decode_token, get_jwt
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from src.metrics import db_read_routing
+
+# Logging
+logger = logging.getLogger(__name__)
+
+# Blueprints whose GET requests may read from a replica
+READ_BLUEPRINTS = {'users', 'sensors', 'elo', 'events'}
+READ_METHODS = {'GET', 'HEAD'}
+# Clients that just wrote read from the primary until this (epoch seconds): cookie for
+# browsers, response header that API clients echo back (any worker honours it)
+PRIMARY_UNTIL_COOKIE = 'db_primary_until'
+PRIMARY_UNTIL_HEADER = 'X-DB-Primary-Until'
+
+# Replication delay on a Postgres standby (0 when it has replayed everything it received)
+PG_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+# Other databases (e.g. SQLite copies): how far the newest position write trails the primary's
+WATERMARK_SQL = text("SELECT max(updated_at) FROM user_latest_telemetry")
+
+# --- Engines ---
+def engine_options(url: str, config) -> Dict[str, Any]:
+    """Pool settings of one engine (in-memory SQLite keeps its single connection)."""
+    options = {'pool_pre_ping': config['DB_POOL_PRE_PING'], 'pool_recycle': config['DB_POOL_RECYCLE']}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == 'sqlite' and parsed.database in (None, '', ':memory:'):
+        return options
+    options.update(pool_size=config['DB_POOL_SIZE'], max_overflow=config['DB_MAX_OVERFLOW'],
+                   pool_timeout=config['DB_POOL_TIMEOUT'])
+    return options
+
+def replica_keys(app: Flask) -> List[str]:
+    return [key for key in app.config.get('SQLALCHEMY_BINDS', {}) if key.startswith('replica_')]
+
+def configure_engines(app: Flask):
+    """
+    Pool options of the primary and one bind per DATABASE_REPLICA_URLS
+    entry. Must run before db.init_app.
+    """
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config)
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for i, url in enumerate(app.config['DATABASE_REPLICA_URLS'], start=1):
+        binds[f'replica_{i}'] = {'url': url, **engine_options(url, app.config)}
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+class RoutingSession(Session):
+    """
+    Sends the plain SELECTs of a request that picked a replica (see
+    ReplicaRouter) to that replica. Flushes, DML, raw SQL and SELECT ...
+    FOR UPDATE always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context():
+            replica = g.get('db_replica')
+            if replica is not None and getattr(clause, 'is_select', False) \
+                    and getattr(clause, '_for_update_arg', None) is None:
+                return self._db.engines[replica]
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    """
+    Round-robin choice of a replica for read requests, skipping replicas
+    whose lag (checked at most every `check_interval` seconds per process)
+    exceeds `max_lag` seconds or that can't be reached.
+    """
+
+    def __init__(self, db, keys: List[str], max_lag: float, check_interval: float):
+        self.db = db
+        self.keys = keys
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lag = {key: 0.0 for key in keys}
+        self._cycle = itertools.cycle(keys)
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+
+    def _replica_lag(self, key: str, primary_watermark: Optional[datetime]) -> float:
+        engine = self.db.engines[key]
+        with engine.connect() as connection:
+            if engine.dialect.name == 'postgresql':
+                return float(connection.execute(PG_LAG_SQL).scalar() or 0.0)
+            watermark = connection.execute(WATERMARK_SQL).scalar()
+        if primary_watermark is None or watermark is None:
+            return 0.0 if primary_watermark is None else float('inf')
+        if isinstance(watermark, str):
+            watermark = datetime.fromisoformat(watermark)
+        return max((primary_watermark - watermark).total_seconds(), 0.0)
+
+    def check_lag(self, force: bool = False):
+        """Refresh the lag of every replica (one caller at a time)."""
+        if not force and time.monotonic() - self._last_check < self.check_interval:
+            return
+        if not self._lock.acquire(blocking=force):
+            return
+        try:
+            primary_watermark = None
+            if any(self.db.engines[key].dialect.name != 'postgresql' for key in self.keys):
+                with self.db.engines[None].connect() as connection:
+                    primary_watermark = connection.execute(WATERMARK_SQL).scalar()
+                if isinstance(primary_watermark, str):
+                    primary_watermark = datetime.fromisoformat(primary_watermark)
+            for key in self.keys:
+                try:
+                    self._lag[key] = self._replica_lag(key, primary_watermark)
+                except Exception as e:
+                    logger.warning(f"Replica {key} unavailable: {e}")
+                    self._lag[key] = float('inf')
+            self._last_check = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def choose(self) -> Optional[str]:
+        """Next replica within the lag threshold, or None (read from the primary)."""
+        self.check_lag()
+        for _ in range(len(self.keys)):
+            key = next(self._cycle)
+            if self._lag[key] <= self.max_lag:
+                return key
+        return None
+
+# --- Requests ---
+class RecentWriters:
+    """
+    JWT identities that wrote through the API blueprints in this process,
+    with the time (epoch seconds) until which they read from the primary.
+    Covers Bearer clients that don't send the cookie back.
+    """
+
+    def __init__(self):
+        self._until = {}  # identity -> epoch seconds
+        self._lock = threading.Lock()
+
+    def mark(self, identity: str, until: float):
+        with self._lock:
+            self._until[identity] = max(until, self._until.get(identity, 0.0))
+            if len(self._until) > 1000:
+                now = time.time()
+                self._until = {key: value for key, value in self._until.items() if value > now}
+
+    def until(self, identity: Optional[str]) -> float:
+        return self._until.get(identity, 0.0) if identity is not None else 0.0
+
+def _token_identity() -> Optional[str]:
+    """`sub` of the Bearer token of the request, if it is valid (routing only, the views still check it)."""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme != 'Bearer' or not token:
+        return None
+    try:
+        return str(decode_token(token)['sub'])
+    except Exception:
+        return None
+
+def _written_identity() -> Optional[str]:
+    try:
+        identity = get_jwt().get('sub')
+    except RuntimeError:  # view without a JWT
+        return None
+    return None if identity is None else str(identity)
+
+def _route_request(router: ReplicaRouter, writers: RecentWriters):
+    g.db_replica = None
+    if request.method not in READ_METHODS or request.blueprint not in READ_BLUEPRINTS:
+        return
+    primary_until = max(request.cookies.get(PRIMARY_UNTIL_COOKIE, 0.0, type=float),
+                        request.headers.get(PRIMARY_UNTIL_HEADER, 0.0, type=float))
+    now = time.time()
+    if primary_until > now or writers.until(_token_identity()) > now:
+        db_read_routing.inc('read_your_writes')
+        return
+    g.db_replica = router.choose()
+    db_read_routing.inc('replica' if g.db_replica else 'lagging')
+
+def _mark_write(response, window: float, writers: RecentWriters):
+    if request.method not in READ_METHODS and request.blueprint in READ_BLUEPRINTS and response.status_code < 400:
+        primary_until = time.time() + window
+        response.set_cookie(PRIMARY_UNTIL_COOKIE, f"{primary_until:.3f}",
+                            max_age=max(int(window), 1), httponly=True, samesite='Lax')
+        response.headers[PRIMARY_UNTIL_HEADER] = f"{primary_until:.3f}"
+        identity = _written_identity()
+        if identity is not None:
+            writers.mark(identity, primary_until)
+    return response
+
+def init_db_routing(app: Flask, db) -> Optional[ReplicaRouter]:
+    """
+    Route the GET requests of the API blueprints to the replicas (when
+    DATABASE_REPLICA_URLS is set). A client that wrote through those
+    blueprints reads from the primary for READ_YOUR_WRITES_SECONDS: by
+    cookie, by the echoed X-DB-Primary-Until header, or by JWT identity
+    on the worker that took the write.
+    """
+    keys = replica_keys(app)
+    if not keys:
+        return None
+    router = ReplicaRouter(db, keys, app.config['REPLICA_MAX_LAG_SECONDS'],
+                           app.config['REPLICA_LAG_CHECK_INTERVAL'])
+    window = app.config['READ_YOUR_WRITES_SECONDS']
+    writers = RecentWriters()
+    app.before_request(lambda: _route_request(router, writers))
+    app.after_request(lambda response: _mark_write(response, window, writers))
+    return router
@@ -0,0 +1,223 @@
+# core-api/src/events/event_index.py
+
+import logging
+import math
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Tuple
+
+from sqlalchemy import func
+
+from src.models import db, Event
+
+# Logging
+logger = logging.getLogger(__name__)
+
+# (min_elo, max_elo, position of the event); open bounds are -inf/+inf
+Interval = Tuple[float, float, int]
+
+
+class IntervalTree:
+    """
+    Static centered interval tree. A stabbing query (every interval that
+    contains a point) costs O(log n + k). Rebuilt when the catalog changes.
+    """
+
+    __slots__ = ('center', 'by_start', 'by_end', 'left', 'right')
+
+    def __init__(self, intervals: List[Interval]):
+        points = sorted(p for lo, hi, _ in intervals for p in (lo, hi) if math.isfinite(p))
+        self.center = points[len(points) // 2] if points else 0.0
+        here, left, right = [], [], []
+        for interval in intervals:
+            if interval[1] < self.center:
+                left.append(interval)
+            elif interval[0] > self.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        self.by_start = sorted(here, key=lambda i: i[0])
+        self.by_end = sorted(here, key=lambda i: i[1], reverse=True)
+        self.left = IntervalTree(left) if left else None
+        self.right = IntervalTree(right) if right else None
+
+    def stab(self, point: float) -> List[Interval]:
+        found = []
+        node = self
+        while node is not None:
+            if point < node.center:
+                for interval in node.by_start:
+                    if interval[0] > point:
+                        break
+                    found.append(interval)
+                node = node.left
+            elif point > node.center:
+                for interval in node.by_end:
+                    if interval[1] < point:
+                        break
+                    found.append(interval)
+                node = node.right
+            else:
+                found.extend(node.by_start)
+                break
+        return found
+
+
+class EventIndex:
+    """
+    In-memory ELO range index over the event catalog.
+
+    Loads on first use, reloads when the catalog signature (row count and
+    latest updated_at) changes, which is checked at most every
+    `sync_interval` seconds. Matches are cached per ELO bucket of width
+    `bucket_width`: the events covering the whole bucket, plus the few whose
+    bounds fall inside it and are filtered per query.
+    """
+
+    def __init__(self, sync_interval: float = 5.0, bucket_width: float = 1.0, max_buckets: int = 1024):
+        self.sync_interval = sync_interval
+        self.bucket_width = bucket_width
+        self.max_buckets = max_buckets
+        self._events = []  # serialized events in (starts_at, id) order
+        self._tree = IntervalTree([])
+        self._starts = []  # (min_elo, max_elo, event_id) sorted by min_elo
+        self._start_keys = []
+        self._buckets = OrderedDict()  # bucket -> (covering, partial)
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._signature = None
+        self._last_sync = 0.0
+        self.stats = {'bucket_hits': 0, 'bucket_misses': 0, 'reloads': 0}
+
+    # --- Maintenance ---
+    @staticmethod
+    def serialize(event: Event) -> Dict[str, Any]:
+        location = None
+        if event.latitude is not None and event.longitude is not None:
+            location = {"latitude": event.latitude, "longitude": event.longitude}
+        return {
+            "id": event.id,
+            "title": event.title,
+            "description": event.description,
+            "image": event.image,
+            "elo": event.min_elo,
+            "min_elo": event.min_elo,
+            "max_elo": event.max_elo,
+            "location": location,
+            "starts_at": event.starts_at.isoformat() if event.starts_at else None
+        }
+
+    def _current_signature(self):
+        return tuple(db.session.execute(db.select(func.count(Event.id), func.max(Event.updated_at))).one())
+
+    def reload(self, signature=None):
+        events = db.session.execute(db.select(
+            Event.id, Event.title, Event.description, Event.image, Event.min_elo, Event.max_elo,
+            Event.latitude, Event.longitude, Event.starts_at)).all()
+        signature = signature or self._current_signature()
+        events.sort(key=lambda e: (e.starts_at is None, e.starts_at or datetime.min, e.id))
+        intervals = [(e.min_elo if e.min_elo is not None else -math.inf,
+                      e.max_elo if e.max_elo is not None else math.inf,
+                      position) for position, e in enumerate(events)]
+        with self._lock:
+            self._events = [self.serialize(e) for e in events]
+            self._tree = IntervalTree(intervals)
+            self._starts = sorted(intervals)
+            self._start_keys = [interval[0] for interval in self._starts]
+            self._buckets.clear()
+            self._signature = signature
+            self._loaded = True
+            self._last_sync = time.monotonic()
+            self.stats['reloads'] += 1
+        logger.info(f"Event index loaded with {len(events)} events")
+
+    def sync(self, force: bool = False):
+        """
+        Load the index, or reload it when the catalog changed.
+        """
+        now = time.monotonic()
+        if self._loaded and not force and now - self._last_sync < self.sync_interval:
+            return
+        signature = self._current_signature()
+        if not self._loaded or signature != self._signature:
+            self.reload(signature)
+        else:
+            self._last_sync = now
+
+    def invalidate(self):
+        """Reload on the next query (after a write of this process)."""
+        with self._lock:
+            self._last_sync = 0.0
+            self._signature = None
+
+    @property
+    def version(self):
+        return self._signature
+
+    def __len__(self):
+        return len(self._events)
+
+    # --- Queries ---
+    def _bucket(self, bucket: int) -> Tuple[List[int], List[Interval]]:
+        cached = self._buckets.get(bucket)
+        if cached is not None:
+            self._buckets.move_to_end(bucket)
+            self.stats['bucket_hits'] += 1
+            return cached
+
+        self.stats['bucket_misses'] += 1
+        start = bucket * self.bucket_width
+        end = start + self.bucket_width
+        covering, partial = [], []
+        for interval in self._tree.stab(start):
+            if interval[1] >= end:
+                covering.append(interval[2])
+            else:
+                partial.append(interval)
+        # Intervals starting inside the bucket
+        partial.extend(self._starts[bisect_right(self._start_keys, start):bisect_left(self._start_keys, end)])
+        covering.sort()
+
+        cached = (covering, partial)
+        self._buckets[bucket] = cached
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+        return cached
+
+    def matching(self, elo: float) -> List[Dict[str, Any]]:
+        """
+        Events whose ELO range contains `elo`, ordered by start date.
+        """
+        with self._lock:
+            covering, partial = self._bucket(math.floor(elo / self.bucket_width))
+            positions = covering
+            matched = [position for lo, hi, position in partial if lo <= elo <= hi]
+            if matched:
+                positions = covering.copy()
+                for position in matched:
+                    insort(positions, position)
+            events = self._events
+            return [events[position] for position in positions]
+
+    def all(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._events)
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                'events': len(self._events),
+                'buckets': len(self._buckets),
+                'bucket_width': self.bucket_width,
+            }
+
+event_index = EventIndex(
+    sync_interval=float(os.getenv('EVENT_INDEX_SYNC_INTERVAL', '5')),
+    bucket_width=float(os.getenv('EVENT_ELO_BUCKET', '1')),
+    max_buckets=int(os.getenv('EVENT_BUCKET_CACHE_SIZE', '1024'))
+)
@@ -1,35 +1,90 @@
-from flask import Blueprint, jsonify
+# core-api/src/events/views.py
+
+import math
+
+from flask import Blueprint, request
+from flask_jwt_extended import jwt_required
+from marshmallow import ValidationError
+from src.models import db, Event, EventSchema, User, LazySchema
+from src.events.event_index import event_index
+from src.user.auth import is_admin
+from src.user.response_cache import cached_response
 
 events_blueprint = Blueprint("events", __name__, url_prefix="/events/")
 
-MOCK_EVENTS = [
-    {
-        "image": ".bike1",
-        "description": "View Event Details", 
-        "elo": 100.0
-    },
-    {
-        "image": ".bike2",
-        "description": "View Event Details", 
-        "elo": 200.0
-    },
-    {
-        "image": ".bike3",
-        "description": "View Event Details", 
-        "elo": 500.0
-    },
-    {
-        "image": ".bike4",
-        "description": "View Event Details", 
-        "elo": 600.0
-    },
-    {
-        "image": ".bike5",
-        "description": "View Event Details", 
-        "elo": 800.0
-    }
-]
+event_schema = LazySchema(EventSchema)
+
+def forbidden_unless_admin():
+    if not is_admin():
+        return {"message": "Forbidden", "status": "fail"}, 403
+    return None
 
+# /events/ (?user_id= or ?elo= keeps the events the rider qualifies for)
 @events_blueprint.route('', methods=['GET'])
 def get_events():
-    return jsonify(MOCK_EVENTS), 200
\ No newline at end of file
+    user_id = request.args.get('user_id', type=int)
+    elo = request.args.get('elo', type=float)
+    if 'user_id' in request.args and user_id is None:
+        return {"message": "user_id must be an integer", "status": "fail"}, 400
+    if 'elo' in request.args and (elo is None or not math.isfinite(elo)):
+        return {"message": "elo must be a finite number", "status": "fail"}, 400
+
+    if user_id is not None:
+        row = db.session.execute(db.select(User.elo_score).where(User.id == user_id)).first()
+        if row is None:
+            return {"message": "User not found", "status": "fail"}, 404
+        elo = row[0]
+        if elo is None:
+            return [], 200
+
+    event_index.sync()
+    if elo is None:
+        return cached_response("events", event_index.version, lambda: (event_index.all(), 200))
+    return event_index.matching(elo), 200
+
+@events_blueprint.route('', methods=['POST'])
+@jwt_required()
+def post_event():
+    forbidden = forbidden_unless_admin()
+    if forbidden:
+        return forbidden
+
+    try:
+        data = event_schema.load(request.get_json(silent=True) or {})
+    except ValidationError as err:
+        return {"message": err.messages, "status": "fail"}, 400
+
+    event = Event(**data)
+    try:
+        db.session.add(event)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return {"message": str(e), "status": "error"}, 500
+    event_index.invalidate()
+    return {**event_index.serialize(event), "status": "success"}, 201
+
+@events_blueprint.route('<int:event_id>', methods=['DELETE'])
+@jwt_required()
+def delete_event(event_id):
+    forbidden = forbidden_unless_admin()
+    if forbidden:
+        return forbidden
+
+    event = db.session.get(Event, event_id)
+    if event is None:
+        return {"message": "Event not found", "status": "fail"}, 404
+
+    try:
+        db.session.delete(event)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return {"message": str(e), "status": "error"}, 500
+    event_index.invalidate()
+    return {"message": "Event deleted", "status": "success"}, 200
+
+@events_blueprint.route('index/stats', methods=['GET'])
+def get_event_index_stats():
+    """Size and bucket cache counters of the event index"""
+    return {"index": event_index.info(), "status": "success"}, 200
@@ -0,0 +1,208 @@
+# core-api/src/metrics.py
+
+import logging
+import math
+import threading
+import time
+from collections import Counter as TallyCounter
+from typing import Iterable, List, Tuple
+
+from flask import Flask, Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Logging
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+AI_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter per label set (Prometheus `counter`)."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labels: Labels = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labels, values)} {_format_value(value)}"
+                    for values, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set (Prometheus `histogram`)."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: Labels = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for values, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, state):
+                    cumulative += count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {_format_value(state[-2])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {state[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Labels = ()) -> Counter:
+        return self.add(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Labels = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.add(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+# --- Metrics ---
+http_request_duration = registry.histogram(
+    'http_request_duration_seconds', 'Latency of the HTTP requests.',
+    ('blueprint', 'endpoint', 'method', 'status'))
+db_queries_per_request = registry.histogram(
+    'db_queries_per_request', 'SQL statements executed by one HTTP request.',
+    ('blueprint', 'endpoint'), QUERY_COUNT_BUCKETS)
+db_time_per_request = registry.histogram(
+    'db_time_per_request_seconds', 'Time spent in SQL statements by one HTTP request.',
+    ('blueprint', 'endpoint'))
+db_queries = registry.counter(
+    'db_queries_total', 'SQL statements executed (in and out of requests).', ('context',))
+db_read_routing = registry.counter(
+    'db_read_routing_total', 'Read requests by database target (replica, lagging: all replicas over '
+    'REPLICA_MAX_LAG_SECONDS, read_your_writes: recent writer sent to the primary).', ('target',))
+query_budget_exceeded = registry.counter(
+    'db_query_budget_exceeded_total', 'Requests over METRICS_QUERY_BUDGET statements (likely N+1).',
+    ('blueprint', 'endpoint'))
+ai_call_duration = registry.histogram(
+    'ollama_call_duration_seconds', 'Latency of the AI calls by outcome (ai, parse_failure, error, circuit_open).',
+    ('mode', 'outcome'), AI_LATENCY_BUCKETS)
+elo_scores = registry.counter(
+    'elo_scores_total', 'ELO scores computed by the AI scoring path, by source (ai, fallback).',
+    ('mode', 'source'))
+
+# --- SQL instrumentation ---
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('metrics_started')
+    elapsed = time.perf_counter() - started.pop() if started else 0.0
+    if has_request_context() and 'metrics' in g:
+        stats = g.metrics
+        stats['queries'] += 1
+        stats['db_time'] += elapsed
+        stats['statements'][statement] += 1
+        db_queries.inc('request')
+    else:
+        db_queries.inc('background')
+
+# --- Request instrumentation ---
+def _labels() -> Tuple[str, str]:
+    return request.blueprint or 'app', request.endpoint or 'unmatched'
+
+def _start_request():
+    g.metrics = {'started': time.perf_counter(), 'queries': 0, 'db_time': 0.0, 'statements': TallyCounter()}
+
+def _finish_request(response: Response, budget: int) -> Response:
+    stats = g.pop('metrics', None)
+    if stats is None:
+        return response
+    blueprint, endpoint = _labels()
+    http_request_duration.observe(time.perf_counter() - stats['started'],
+                                  blueprint, endpoint, request.method, str(response.status_code))
+    db_queries_per_request.observe(stats['queries'], blueprint, endpoint)
+    db_time_per_request.observe(stats['db_time'], blueprint, endpoint)
+
+    if budget and stats['queries'] > budget:
+        query_budget_exceeded.inc(blueprint, endpoint)
+        statement, repeats = stats['statements'].most_common(1)[0]
+        logger.warning(f"Query budget exceeded: {request.method} {request.path} ran {stats['queries']} "
+                       f"statements (budget {budget}); repeated {repeats}x: {' '.join(statement.split())[:200]}")
+    return response
+
+def init_metrics(app: Flask):
+    """
+    Time every request, count its SQL statements and serve GET /metrics
+    (Prometheus text format, counters of this process).
+    """
+    budget = app.config.get('METRICS_QUERY_BUDGET', 0)
+
+    app.before_request(_start_request)
+    app.after_request(lambda response: _finish_request(response, budget))
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+def observe_ai_call(mode: str, outcome: str, started: float):
+    """Record one AI call that began at `started` (time.perf_counter())."""
+    ai_call_duration.observe(time.perf_counter() - started, mode, outcome)
@@ -3,11 +3,14 @@
 from datetime import datetime, date
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 from flask_sqlalchemy import SQLAlchemy
-from marshmallow import fields, Schema, validate
+from marshmallow import fields, Schema, validate, validates_schema, ValidationError
 import enum
 
-# db setup
-db = SQLAlchemy()
+from src.db_routing import RoutingSession
+from src.user.util import Util
+
+# db setup (plain reads of API GET requests may go to a replica, see src/db_routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Users
 class Gender(enum.Enum):
@@ -39,12 +42,20 @@ class User(db.Model):
     membership_level = db.Column(db.Enum(MembershipLevel), nullable=True, default=MembershipLevel.NO)
     phone = db.Column(db.String(120), nullable=False)
     birthdate = db.Column(db.Date, nullable=True)
-    elo_score = db.Column(db.Float, default=30.0)
-    last_elo_update = db.Column(db.DateTime)
-    createdAt = db.Column(db.DateTime, default=datetime.utcnow)
+    elo_score = db.Column(db.Float, default=30.0, index=True)
+    last_elo_update = db.Column(db.DateTime, index=True)
+    createdAt = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    latest_telemetry = db.relationship('UserLatestTelemetry', uselist=False, lazy=True,
+                                       cascade='all, delete-orphan', passive_deletes=True)
+    rider_aggregate = db.relationship('UserRiderAggregate', uselist=False, lazy=True,
+                                      cascade='all, delete-orphan', passive_deletes=True)
 
 class UserSensorData(db.Model):
     __tablename__ = 'user_sensor_data'
+    __table_args__ = (
+        db.Index('ix_user_sensor_data_user_id_timestamp', 'user_id', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -69,7 +80,163 @@ class UserSensorData(db.Model):
     
     user = db.relationship('User', backref=db.backref('sensor_data', lazy=True))
 
+# Latest reading per user (maintained on every sensor insert)
+class UserLatestTelemetry(db.Model):
+    __tablename__ = 'user_latest_telemetry'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    sensor_data_id = db.Column(db.Integer, db.ForeignKey('user_sensor_data.id', ondelete='SET NULL'), nullable=True)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+# Streaming per-user aggregates of the readings (ELO inputs, see src/user/aggregates.py)
+class UserRiderAggregate(db.Model):
+    __tablename__ = 'user_rider_aggregate'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    reading_count = db.Column(db.Integer, nullable=False, default=0)
+    last_timestamp = db.Column(db.DateTime, nullable=True)
+
+    # Newest reading (odometer-like values)
+    last_month_miles = db.Column(db.Float, nullable=True)
+    total_miles = db.Column(db.Float, nullable=True)
+    braking_total = db.Column(db.Integer, nullable=False, default=0)
+
+    # Exponentially weighted means (AGGREGATE_EWMA_ALPHA)
+    ewma_heart_rate = db.Column(db.Float, nullable=True)
+    ewma_avg_speed = db.Column(db.Float, nullable=True)
+    ewma_stress_level = db.Column(db.Float, nullable=True)
+    ewma_sleep_quality = db.Column(db.Float, nullable=True)
+
+    # Means over the last AGGREGATE_WINDOW readings: running sums and a ring of them in `window`
+    # (packed float64, NaN for NULL; layout in aggregates.py)
+    window_heart_rate = db.Column(db.Float, nullable=True)
+    window_avg_speed = db.Column(db.Float, nullable=True)
+    window_stress_level = db.Column(db.Float, nullable=True)
+    window_sleep_quality = db.Column(db.Float, nullable=True)
+    window_braking_events = db.Column(db.Float, nullable=True)
+    window = db.Column(db.LargeBinary, nullable=False, default=b'')
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+# Hourly/daily aggregates of the numeric sensor columns
+class UserSensorRollup(db.Model):
+    __tablename__ = 'user_sensor_rollup'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'resolution', 'bucket_start', 'metric',
+                            name='uq_user_sensor_rollup_bucket'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    resolution = db.Column(db.String(8), nullable=False)  # hour | day
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    metric = db.Column(db.String(32), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    min = db.Column(db.Float, nullable=True)
+    max = db.Column(db.Float, nullable=True)
+    sum = db.Column(db.Float, nullable=False, default=0.0)
+
+# Manifest of the archived (per user/month) sensor segment files
+class SensorArchiveSegment(db.Model):
+    __tablename__ = 'sensor_archive_segment'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'month', name='uq_sensor_archive_segment_user_month'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    month = db.Column(db.String(7), nullable=False)  # YYYY-MM
+    path = db.Column(db.String(500), nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+    min_timestamp = db.Column(db.DateTime, nullable=False)
+    max_timestamp = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+# ELO scoring jobs
+class JobStatus(enum.Enum):
+    PENDING = 1
+    RUNNING = 2
+    DONE = 3
+    FAILED = 4
+
+class EloJob(db.Model):
+    __tablename__ = 'elo_job'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    sensor_data_id = db.Column(db.Integer, db.ForeignKey('user_sensor_data.id', ondelete='SET NULL'), nullable=True)
+    status = db.Column(db.Enum(JobStatus), nullable=False, default=JobStatus.PENDING, index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    elo_score = db.Column(db.Float, nullable=True)
+    error = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    retry_after = db.Column(db.DateTime, nullable=True)  # failed PENDING jobs wait until then
+
+# Append-only log of every stored ELO score (charts and model drift audits)
+class EloSource(enum.Enum):
+    AI = 1
+    FALLBACK = 2  # rules engine after an AI failure
+    RULES = 3  # rules engine by design (recompute_elo without --ai)
+
+class EloHistory(db.Model):
+    __tablename__ = 'elo_history'
+    __table_args__ = (
+        db.Index('ix_elo_history_user_id_created_at', 'user_id', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    elo_score = db.Column(db.Float, nullable=False)
+    source = db.Column(db.Enum(EloSource), nullable=False)
+    model = db.Column(db.String(80), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+# Revoked JWT refresh tokens (cached in memory, see src/user/auth.py)
+class RevokedToken(db.Model):
+    __tablename__ = 'revoked_token'
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), nullable=False, unique=True)
+    token_type = db.Column(db.String(10), nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+# Events and the ELO range a rider needs to join them (indexed in memory, see src/events/event_index.py)
+class Event(db.Model):
+    __tablename__ = 'event'
+
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(120), nullable=False)
+    description = db.Column(db.String(500), nullable=True)
+    image = db.Column(db.String(200), nullable=True)
+    min_elo = db.Column(db.Float, nullable=True)  # None: no lower bound
+    max_elo = db.Column(db.Float, nullable=True)  # None: no upper bound
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    starts_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
+
 # Serializations
+class LazySchema:
+    """Schema instance built on first use (keeps worker boot cheap)."""
+
+    def __init__(self, schema_class, **kwargs):
+        self._schema_class = schema_class
+        self._kwargs = kwargs
+        self._schema = None
+
+    def __getattr__(self, name):
+        if self._schema is None:
+            self._schema = self._schema_class(**self._kwargs)
+        return getattr(self._schema, name)
+
 # Enumerations table
 class EnumToDict(fields.Field):
     def _serialize(self, value, attr, obj, **kwargs):
@@ -93,9 +260,7 @@ class UserSchema(SQLAlchemyAutoSchema):
     location = fields.Method("get_user_location")
 
     def get_user_location(self, obj):
-        last_data = UserSensorData.query.filter_by(
-            user_id=obj.id
-        ).order_by(UserSensorData.timestamp.desc()).first()
+        last_data = obj.latest_telemetry
         
         if last_data and last_data.latitude and last_data.longitude:
             return {
@@ -109,7 +274,7 @@ class UserSchema(SQLAlchemyAutoSchema):
 
     class Meta:
         model = User
-        exclude = ("password",)
+        exclude = ("password", "latest_telemetry", "rider_aggregate")
         include_relationships = True
         load_instance = True
 
@@ -123,18 +288,44 @@ class UserSensorDataSchema(SQLAlchemyAutoSchema):
         load_instance = True
 
 # Validations
+class NaiveUTCDateTime(fields.DateTime):
+    """ISO 8601 datetime loaded as naive UTC, like the stored timestamps."""
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        return Util.to_naive_utc(super()._deserialize(value, attr, data, **kwargs))
+
 class ValidateUserSchemaValidation(Schema):
     email = fields.String(required=True)
     password = fields.String(required=True)
 
 class UserSensorDataSchema(Schema):
     user_id = fields.Int(required=True)
+    timestamp = NaiveUTCDateTime()
     last_month_miles = fields.Float(required=True)
     total_miles = fields.Float(required=True)
     avg_speed = fields.Float(validate=validate.Range(min=0))
     braking_events = fields.Int(validate=validate.Range(min=0))
     heart_rate = fields.Int(validate=validate.Range(min=40, max=220))
+    blood_pressure = fields.Int(validate=validate.Range(min=0))
     stress_level = fields.Int(validate=validate.Range(min=0, max=100))
     sleep_quality = fields.Int(validate=validate.Range(min=0, max=10))
     latitude = fields.Float(required=True, validate=validate.Range(min=-90, max=90))
-    longitude = fields.Float(required=True, validate=validate.Range(min=-180, max=180))
\ No newline at end of file
+    longitude = fields.Float(required=True, validate=validate.Range(min=-180, max=180))
+
+class EventSchema(Schema):
+    title = fields.Str(required=True, validate=validate.Length(min=1, max=120))
+    description = fields.Str(validate=validate.Length(max=500))
+    image = fields.Str(validate=validate.Length(max=200))
+    min_elo = fields.Float(allow_none=True)
+    max_elo = fields.Float(allow_none=True)
+    latitude = fields.Float(allow_none=True, validate=validate.Range(min=-90, max=90))
+    longitude = fields.Float(allow_none=True, validate=validate.Range(min=-180, max=180))
+    starts_at = NaiveUTCDateTime(allow_none=True)
+
+    @validates_schema
+    def validate_elo_range(self, data, **kwargs):
+        if data.get('min_elo') is not None and data.get('max_elo') is not None \
+                and data['min_elo'] > data['max_elo']:
+            raise ValidationError("min_elo must not be greater than max_elo", "max_elo")
+        if (data.get('latitude') is None) != (data.get('longitude') is None):
+            raise ValidationError("latitude and longitude go together", "longitude")
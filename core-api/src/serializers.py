@@ -0,0 +1,157 @@
+# core-api/src/serializers.py
+
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+from src.models import db, User, UserSensorData, UserLatestTelemetry
+
+# --- JSON ---
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson. Keys stay sorted and dates go
+    through Flask's default hook, so the output matches the stdlib
+    provider; calls with explicit json.dumps options still use it.
+    """
+
+    option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self.option | orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(orjson.dumps(obj, default=self.default, option=option),
+                                        mimetype=self.mimetype)
+
+# --- Row serializers ---
+CONVERTERS = {
+    'raw': '{v}',
+    'int': 'None if {v} is None else int({v})',
+    'float': 'None if {v} is None else float({v})',
+    'iso': 'None if {v} is None else {v}.isoformat()',
+    # Shared {'key', 'value'} dict per member (the dumps are only read)
+    'enum': 'None if {v} is None else enum_dicts[{v}]',
+}
+
+
+class RowSerializer:
+    """
+    Row -> dict function generated once from (key, column, kind) fields, so
+    dumping a row is a single function call with no per-field dispatch.
+    `dump_row` reads a column-only query row by position (columns in the
+    order of `self.columns`); `dump_mapping` reads a dict by column name.
+    """
+
+    def __init__(self, name: str, fields: Sequence[Tuple[str, Any, str]]):
+        self.name = name
+        self.columns = [column for _, column, _ in fields]
+        self.dump_row = self._compile([f"row[{i}]" for i in range(len(fields))], fields)
+        self.dump_mapping = self._compile([f"row[{column.key!r}]" for column in self.columns], fields)
+
+    def _compile(self, sources: List[str], fields: Sequence[Tuple[str, Any, str]]) -> Callable[[Any], Dict[str, Any]]:
+        lines = [f"def dump_{self.name}(row):"]
+        lines += [f"    v{i} = {source}" for i, source in enumerate(sources)]
+        items = ", ".join(f"{key!r}: {CONVERTERS[kind].format(v=f'v{i}')}"
+                          for i, (key, _, kind) in enumerate(fields))
+        lines.append(f"    return {{{items}}}")
+        enum_dicts = {member: {'key': member.name, 'value': member.value}
+                      for _, column, kind in fields if kind == 'enum'
+                      for member in column.type.enum_class}
+        namespace = {'enum_dicts': enum_dicts}
+        exec("\n".join(lines), namespace)
+        return namespace[f"dump_{self.name}"]
+
+# Same fields and formats as UserSchema (location and sensor_data are added by dump_users)
+user_serializer = RowSerializer('user', [
+    ('id', User.id, 'raw'),
+    ('username', User.username, 'raw'),
+    ('email', User.email, 'raw'),
+    ('name', User.name, 'raw'),
+    ('lastname', User.lastname, 'raw'),
+    ('address', User.address, 'raw'),
+    ('gender', User.gender, 'enum'),
+    ('profile', User.profile, 'enum'),
+    ('membership_level', User.membership_level, 'enum'),
+    ('phone', User.phone, 'raw'),
+    ('birthdate', User.birthdate, 'iso'),
+    ('elo_score', User.elo_score, 'float'),
+    ('last_elo_update', User.last_elo_update, 'iso'),
+    ('createdAt', User.createdAt, 'iso'),
+])
+
+# Same fields and formats as UserSensorDataSchema; `id` is selected for keyset pagination only
+SENSOR_FIELDS = [
+    ('user_id', UserSensorData.user_id, 'int'),
+    ('timestamp', UserSensorData.timestamp, 'iso'),
+    ('last_month_miles', UserSensorData.last_month_miles, 'float'),
+    ('total_miles', UserSensorData.total_miles, 'float'),
+    ('avg_speed', UserSensorData.avg_speed, 'float'),
+    ('braking_events', UserSensorData.braking_events, 'int'),
+    ('heart_rate', UserSensorData.heart_rate, 'int'),
+    ('blood_pressure', UserSensorData.blood_pressure, 'int'),
+    ('stress_level', UserSensorData.stress_level, 'int'),
+    ('sleep_quality', UserSensorData.sleep_quality, 'int'),
+    ('latitude', UserSensorData.latitude, 'float'),
+    ('longitude', UserSensorData.longitude, 'float'),
+]
+sensor_serializer = RowSerializer('sensor', SENSOR_FIELDS)
+
+# --- Users ---
+def user_rows_query():
+    """Column-only users query (plus the latest position) for dump_users."""
+    return (
+        db.select(*user_serializer.columns, UserLatestTelemetry.latitude, UserLatestTelemetry.longitude)
+        .outerjoin(UserLatestTelemetry, UserLatestTelemetry.user_id == User.id)
+    )
+
+def sensor_ids_by_user(user_ids: Sequence[int]) -> Dict[int, List[int]]:
+    ids = defaultdict(list)
+    if user_ids:
+        rows = db.session.execute(
+            db.select(UserSensorData.user_id, UserSensorData.id)
+            .where(UserSensorData.user_id.in_(user_ids))
+            .order_by(UserSensorData.id)
+        )
+        for user_id, sensor_data_id in rows:
+            ids[user_id].append(sensor_data_id)
+    return ids
+
+def dump_users(rows: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Rows of user_rows_query() as UserSchema would dump them (one extra query for the reading ids)."""
+    dump = user_serializer.dump_row
+    sensor_ids = sensor_ids_by_user([row[0] for row in rows])
+    users = []
+    for row in rows:
+        user = dump(row)
+        latitude, longitude = row[-2], row[-1]
+        user['location'] = {
+            "title": row[3] or row[1],
+            "coordinates": {"latitude": latitude, "longitude": longitude}
+        } if latitude and longitude else None
+        user['sensor_data'] = sensor_ids.get(row[0], [])
+        users.append(user)
+    return users
+
+def iter_dumped_users(partitions: Iterable[Sequence[Any]]) -> Iterator[Dict[str, Any]]:
+    """dump_users over a result read in partitions (for streaming)."""
+    for rows in partitions:
+        yield from dump_users(rows)
+
+# --- Sensor readings ---
+def sensor_rows_query():
+    """Column-only readings query; rows also carry .id and .timestamp for reading_sort_key."""
+    return db.select(*sensor_serializer.columns, UserSensorData.id)
+
+def dump_reading(reading: Any) -> Dict[str, Any]:
+    """A sensor_rows_query() row or an archived reading (dict)."""
+    if isinstance(reading, dict):
+        return sensor_serializer.dump_mapping(reading)
+    return sensor_serializer.dump_row(reading)
@@ -0,0 +1,240 @@
+# core-api/src/user/aggregates.py
+
+import heapq
+import logging
+import math
+from array import array
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional
+
+from flask import current_app
+from sqlalchemy import select
+
+from src.models import db, UserSensorData, UserRiderAggregate
+from src.user.archive import iter_archived_range
+from src.user.telemetry import _user_id_chunks
+from src.user.util import Util
+
+# Logging
+logger = logging.getLogger(__name__)
+
+EWMA_METRICS = ('heart_rate', 'avg_speed', 'stress_level', 'sleep_quality')
+WINDOW_METRICS = EWMA_METRICS + ('braking_events',)
+NAN = float('nan')
+
+def _value(reading, name: str):
+    return reading.get(name) if isinstance(reading, dict) else getattr(reading, name)
+
+def new_aggregate(user_id: int) -> UserRiderAggregate:
+    aggregate = UserRiderAggregate(user_id=user_id, reading_count=0, braking_total=0, window=b'')
+    for metric in EWMA_METRICS:
+        setattr(aggregate, f'ewma_{metric}', None)
+    return aggregate
+
+# `window` layout: [WINDOW_HEADER, oldest slot, known count per metric..., sum per metric...,
+# ring of the last readings (one row of WINDOW_METRICS each)...]
+WINDOW_HEADER = -1.0
+WINDOW_STATE = 2 + 2 * len(WINDOW_METRICS)
+
+def _resum(state: array):
+    """Recompute the window counts and sums from the ring (drops rounding drift)."""
+    width = len(WINDOW_METRICS)
+    ring = state[WINDOW_STATE:]
+    for i in range(width):
+        known = [value for value in ring[i::width] if not math.isnan(value)]
+        state[2 + i] = len(known)
+        state[2 + width + i] = sum(known)
+
+def _window_state(blob: Optional[bytes]) -> array:
+    state = array('d', blob or b'')
+    if state and state[0] == WINDOW_HEADER:
+        return state
+    # Older layout (just the readings, oldest first): add the running sums
+    state = array('d', [WINDOW_HEADER, 0.0] + [0.0] * (WINDOW_STATE - 2)) + state
+    _resum(state)
+    return state
+
+def fold_reading(aggregate: UserRiderAggregate, reading: Any, alpha: float, window: int):
+    """
+    Add one reading (model or dict) to a user's aggregate, as the newest one.
+    Constant work per reading: the EWMAs move by `alpha` and the window means
+    come from running sums over a ring of the last `window` readings (resummed
+    once per lap of the ring).
+    """
+    timestamp = _value(reading, 'timestamp')
+    aggregate.reading_count = (aggregate.reading_count or 0) + 1
+
+    # Odometer-like values come from the newest reading
+    if aggregate.last_timestamp is None or timestamp >= aggregate.last_timestamp:
+        aggregate.last_timestamp = timestamp
+        aggregate.last_month_miles = _value(reading, 'last_month_miles')
+        aggregate.total_miles = _value(reading, 'total_miles')
+
+    braking = _value(reading, 'braking_events')
+    if braking is not None:
+        aggregate.braking_total = (aggregate.braking_total or 0) + int(braking)
+
+    for metric in EWMA_METRICS:
+        value = _value(reading, metric)
+        if value is None:
+            continue
+        column = f'ewma_{metric}'
+        previous = getattr(aggregate, column)
+        setattr(aggregate, column, float(value) if previous is None else previous + alpha * (float(value) - previous))
+
+    width = len(WINDOW_METRICS)
+    state = _window_state(aggregate.window)
+    row = [NAN if _value(reading, metric) is None else float(_value(reading, metric)) for metric in WINDOW_METRICS]
+    slots = (len(state) - WINDOW_STATE) // width
+    if slots < window:
+        state.extend(row)
+        lap = False
+    else:
+        # Full ring (of the size it was built with until the next rebuild): replace the oldest
+        oldest = int(state[1])
+        offset = WINDOW_STATE + oldest * width
+        for i in range(width):
+            evicted = state[offset + i]
+            if not math.isnan(evicted):
+                state[2 + i] -= 1
+                state[2 + width + i] -= evicted
+            state[offset + i] = row[i]
+        state[1] = (oldest + 1) % slots
+        lap = state[1] == 0
+    for i, value in enumerate(row):
+        if not math.isnan(value):
+            state[2 + i] += 1
+            state[2 + width + i] += value
+    if lap:
+        _resum(state)
+    aggregate.window = state.tobytes()
+
+    for i, metric in enumerate(WINDOW_METRICS):
+        count = state[2 + i]
+        setattr(aggregate, f'window_{metric}', state[2 + width + i] / count if count else None)
+    aggregate.updated_at = datetime.utcnow()
+
+def _by_user(readings: Iterable[Any]) -> Dict[int, List[Any]]:
+    by_user = defaultdict(list)
+    for reading in readings:
+        by_user[_value(reading, 'user_id')].append(reading)
+    return by_user
+
+def _replay(first_id: int, last_id: int, alpha: float, window: int) -> Dict[int, UserRiderAggregate]:
+    """Fresh (unsaved) aggregates of a range of users, from their full history in timestamp order."""
+    aggregates = {}
+    for reading in _history(first_id, last_id):
+        aggregate = aggregates.get(reading['user_id'])
+        if aggregate is None:
+            aggregate = aggregates[reading['user_id']] = new_aggregate(reading['user_id'])
+        fold_reading(aggregate, reading, alpha, window)
+    return aggregates
+
+def apply_readings_to_aggregates(readings: Iterable[Any]):
+    """
+    Fold freshly inserted readings (models or dicts) into the aggregates of
+    their users, oldest first. A reading older than the user's newest one
+    (an uploaded buffer) would enter the EWMAs and window out of order, so
+    that user's aggregate is replayed from the history instead, as
+    rebuild_rider_aggregates would. The rows are locked while they are
+    updated (on databases that support it). The caller commits, after
+    inserting the readings.
+    """
+    by_user = _by_user(readings)
+    if not by_user:
+        return
+    alpha = current_app.config['AGGREGATE_EWMA_ALPHA']
+    window = current_app.config['AGGREGATE_WINDOW']
+
+    stored = {
+        aggregate.user_id: aggregate
+        for aggregate in db.session.scalars(
+            select(UserRiderAggregate)
+            .where(UserRiderAggregate.user_id.in_(list(by_user)))
+            .with_for_update()
+        )
+    }
+    for user_id, user_readings in by_user.items():
+        user_readings.sort(key=lambda r: _value(r, 'timestamp'))
+        aggregate = stored.get(user_id)
+        if aggregate is None:
+            aggregate = new_aggregate(user_id)
+            db.session.add(aggregate)
+        elif aggregate.last_timestamp is not None and _value(user_readings[0], 'timestamp') < aggregate.last_timestamp:
+            replayed = _replay(user_id, user_id, alpha, window).get(user_id) or new_aggregate(user_id)
+            for column in UserRiderAggregate.__table__.columns:
+                setattr(aggregate, column.key, getattr(replayed, column.key))
+            logger.debug(f"Aggregate of user {user_id} replayed for {len(user_readings)} late readings")
+            continue
+        for reading in user_readings:
+            fold_reading(aggregate, reading, alpha, window)
+
+# --- Scoring ---
+def aggregate_elo_params(birthdate, aggregate: UserRiderAggregate) -> Dict[str, Any]:
+    """
+    calculate_elo parameters from a user's aggregate: smoothed biometrics and
+    speed, braking averaged over the window, mileage of the newest reading.
+    """
+    def smoothed(value: Optional[float]) -> Optional[float]:
+        return None if value is None else round(value, 1)
+
+    return {
+        "age": Util.calculate_age(birthdate),
+        "last_month_miles": aggregate.last_month_miles,
+        "total_miles": aggregate.total_miles,
+        "avg_speed": smoothed(aggregate.ewma_avg_speed),
+        "braking_events": smoothed(aggregate.window_braking_events),
+        "heart_rate_avg": smoothed(aggregate.ewma_heart_rate),
+        "stress_level": smoothed(aggregate.ewma_stress_level),
+        "sleep_quality": smoothed(aggregate.ewma_sleep_quality)
+    }
+
+# Aggregate columns feeding each ELO param (same keys as elo_recompute.SENSOR_COLUMNS)
+AGGREGATE_COLUMNS = {
+    'last_month_miles': UserRiderAggregate.last_month_miles,
+    'total_miles': UserRiderAggregate.total_miles,
+    'avg_speed': UserRiderAggregate.ewma_avg_speed,
+    'braking_events': UserRiderAggregate.window_braking_events,
+    'heart_rate_avg': UserRiderAggregate.ewma_heart_rate,
+    'stress_level': UserRiderAggregate.ewma_stress_level,
+    'sleep_quality': UserRiderAggregate.ewma_sleep_quality,
+}
+
+# --- Rebuild ---
+def _history(first_id: int, last_id: int) -> Iterable[Any]:
+    """Live and archived readings of a range of users, ordered by (user_id, timestamp, id)."""
+    live = (dict(row) for row in db.session.execute(
+        select(UserSensorData.id, UserSensorData.user_id, UserSensorData.timestamp,
+               UserSensorData.last_month_miles, UserSensorData.total_miles,
+               *[getattr(UserSensorData, metric) for metric in WINDOW_METRICS])
+        .where(UserSensorData.user_id.between(first_id, last_id))
+        .order_by(UserSensorData.user_id, UserSensorData.timestamp, UserSensorData.id)
+    ).mappings())
+    archived = sorted(iter_archived_range(first_id, last_id, datetime.min, datetime.max),
+                      key=lambda r: (r['user_id'], r['timestamp'], r['id']))
+    return heapq.merge(archived, live, key=lambda r: (r['user_id'], r['timestamp'], r['id']))
+
+def rebuild_rider_aggregates(chunk_size: int = 1000) -> Dict[str, int]:
+    """
+    Recompute every aggregate from the full history (after changing
+    AGGREGATE_EWMA_ALPHA/AGGREGATE_WINDOW, or to backfill). Safe to rerun.
+    """
+    alpha = current_app.config['AGGREGATE_EWMA_ALPHA']
+    window = current_app.config['AGGREGATE_WINDOW']
+    stats = {'users': 0, 'readings': 0, 'chunks': 0}
+
+    for user_ids in _user_id_chunks(chunk_size):
+        aggregates = _replay(user_ids[0], user_ids[-1], alpha, window)
+        stats['readings'] += sum(aggregate.reading_count for aggregate in aggregates.values())
+
+        db.session.execute(
+            UserRiderAggregate.__table__.delete()
+            .where(UserRiderAggregate.user_id.between(user_ids[0], user_ids[-1]))
+        )
+        db.session.add_all(aggregates.values())
+        db.session.commit()
+        stats['users'] += len(aggregates)
+        stats['chunks'] += 1
+        logger.info(f"rebuild_rider_aggregates: chunk {stats['chunks']} ({len(aggregates)} users)")
+    return stats
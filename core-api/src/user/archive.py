@@ -0,0 +1,267 @@
+# core-api/src/user/archive.py
+
+import array
+import logging
+import mmap
+import os
+import struct
+import sys
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterator, List, Optional
+
+from flask import current_app
+from sqlalchemy import select
+
+from src.models import db, User, UserSensorData, UserLatestTelemetry, SensorArchiveSegment
+from src.user.telemetry import touch_latest_telemetry
+
+# Logging
+logger = logging.getLogger(__name__)
+
+# Segment file layout (little endian):
+#   header     MAGIC, row count, column count
+#   directory  per column: name, typecode, offset, compressed length
+#   blobs      zlib-compressed array of each column
+MAGIC = b'ELOSEG01'
+HEADER = struct.Struct('<8sII')
+DIRECTORY_ENTRY = struct.Struct('<16scQI')
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# Archived columns: 'q' int64, 'd' float64 (NaN stands for NULL)
+COLUMNS = {
+    'id': 'q',
+    'timestamp': 'q',  # microseconds since epoch, delta encoded
+    'last_month_miles': 'd',
+    'total_miles': 'd',
+    'avg_speed': 'd',
+    'braking_events': 'd',
+    'heart_rate': 'd',
+    'blood_pressure': 'd',
+    'stress_level': 'd',
+    'sleep_quality': 'd',
+    'latitude': 'd',
+    'longitude': 'd',
+}
+INTEGER_COLUMNS = {'braking_events', 'heart_rate', 'blood_pressure', 'stress_level', 'sleep_quality'}
+NAN = float('nan')
+
+# --- Segment files ---
+def _to_micros(timestamp: datetime) -> int:
+    return (timestamp - EPOCH) // MICROSECOND
+
+def _from_micros(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=value)
+
+def write_segment(path: str, readings: List[Dict[str, Any]]):
+    """
+    Write readings (sorted by timestamp, id) as a columnar segment file.
+    The file is replaced atomically.
+    """
+    blobs = []
+    for name, typecode in COLUMNS.items():
+        if name == 'timestamp':
+            micros = [_to_micros(reading['timestamp']) for reading in readings]
+            values = array.array('q', [micros[0]] + [b - a for a, b in zip(micros, micros[1:])] if micros else [])
+        elif typecode == 'q':
+            values = array.array('q', [reading[name] for reading in readings])
+        else:
+            values = array.array('d', [NAN if reading.get(name) is None else float(reading[name])
+                                       for reading in readings])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        blobs.append((name, typecode, zlib.compress(values.tobytes(), 6)))
+
+    offset = HEADER.size + DIRECTORY_ENTRY.size * len(blobs)
+    directory = []
+    for name, typecode, blob in blobs:
+        directory.append(DIRECTORY_ENTRY.pack(name.encode(), typecode.encode(), offset, len(blob)))
+        offset += len(blob)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as segment:
+        segment.write(HEADER.pack(MAGIC, len(readings), len(blobs)))
+        segment.writelines(directory)
+        segment.writelines(blob for _, _, blob in blobs)
+        segment.flush()
+        os.fsync(segment.fileno())
+    os.replace(tmp_path, path)
+
+def read_segment(path: str, columns: Optional[List[str]] = None) -> Dict[str, list]:
+    """
+    Memory-map a segment file and decompress only the requested columns.
+    """
+    with open(path, 'rb') as segment, mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, row_count, column_count = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a sensor segment: {path}")
+
+        directory = {}
+        for i in range(column_count):
+            name, typecode, offset, length = DIRECTORY_ENTRY.unpack_from(mm, HEADER.size + i * DIRECTORY_ENTRY.size)
+            directory[name.rstrip(b'\0').decode()] = (typecode.decode(), offset, length)
+
+        result = {}
+        for name in columns or directory:
+            typecode, offset, length = directory[name]
+            values = array.array(typecode)
+            values.frombytes(zlib.decompress(mm[offset:offset + length]))
+            if sys.byteorder == 'big':
+                values.byteswap()
+            result[name] = values
+
+    if 'timestamp' in result:
+        micros, total = [], 0
+        for delta in result['timestamp']:
+            total += delta
+            micros.append(total)
+        result['timestamp'] = [_from_micros(value) for value in micros]
+    for name in INTEGER_COLUMNS & result.keys():
+        result[name] = [None if value != value else int(value) for value in result[name]]
+    for name in result.keys() - INTEGER_COLUMNS - {'id', 'timestamp'}:
+        result[name] = [None if value != value else value for value in result[name]]
+    return result
+
+def segment_readings(user_id: int, path: str) -> List[Dict[str, Any]]:
+    columns = read_segment(path)
+    names = list(columns)
+    return [
+        {'user_id': user_id, **dict(zip(names, values))}
+        for values in zip(*columns.values())
+    ]
+
+# --- Manifest ---
+def archive_dir() -> str:
+    return current_app.config['SENSOR_ARCHIVE_DIR']
+
+def segment_path(user_id: int, month: str) -> str:
+    """Relative to SENSOR_ARCHIVE_DIR, fanned out so directories stay small."""
+    return os.path.join(f"{user_id % 256:02x}", str(user_id), f"{month}.seg")
+
+def user_segments(user_id: int, start: Optional[datetime] = None,
+                  end: Optional[datetime] = None) -> List[SensorArchiveSegment]:
+    query = select(SensorArchiveSegment).where(SensorArchiveSegment.user_id == user_id)
+    if start is not None:
+        query = query.where(SensorArchiveSegment.max_timestamp >= start)
+    if end is not None:
+        query = query.where(SensorArchiveSegment.min_timestamp < end)
+    return db.session.scalars(query.order_by(SensorArchiveSegment.month)).all()
+
+def reading_sort_key(reading):
+    if isinstance(reading, dict):
+        return reading['timestamp'], reading['id']
+    return reading.timestamp, reading.id
+
+def iter_archived_readings(user_id: int, after: Optional[datetime] = None, after_id: int = 0,
+                           start: Optional[datetime] = None,
+                           end: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Archived readings of a user ordered by (timestamp, id), after the
+    (after, after_id) cursor and inside [start, end) when given.
+    """
+    lower = max(filter(None, (after, start)), default=None)
+    for segment in user_segments(user_id, lower, end):
+        for reading in segment_readings(user_id, os.path.join(archive_dir(), segment.path)):
+            key = (reading['timestamp'], reading['id'])
+            if after is not None and key <= (after, after_id):
+                continue
+            if start is not None and reading['timestamp'] < start:
+                continue
+            if end is not None and reading['timestamp'] >= end:
+                continue
+            yield reading
+
+def iter_archived_range(first_user_id: int, last_user_id: int,
+                        start: datetime, end: datetime) -> Iterator[Dict[str, Any]]:
+    """
+    Archived readings of a range of users inside [start, end) (rollup compaction).
+    """
+    segments = db.session.scalars(
+        select(SensorArchiveSegment)
+        .where(SensorArchiveSegment.user_id.between(first_user_id, last_user_id),
+               SensorArchiveSegment.max_timestamp >= start,
+               SensorArchiveSegment.min_timestamp < end)
+        .order_by(SensorArchiveSegment.user_id, SensorArchiveSegment.month)
+    ).all()
+    for segment in segments:
+        for reading in segment_readings(segment.user_id, os.path.join(archive_dir(), segment.path)):
+            if start <= reading['timestamp'] < end:
+                yield reading
+
+# --- Retention job ---
+def _archive_user_month(user_id: int, month: str, readings: List[Dict[str, Any]]):
+    segment = SensorArchiveSegment.query.filter_by(user_id=user_id, month=month).first()
+    relative_path = segment.path if segment else segment_path(user_id, month)
+    path = os.path.join(archive_dir(), relative_path)
+
+    # Merge with what was archived before (a rerun after a crash dedupes by id)
+    merged = {reading['id']: reading for reading in readings}
+    if segment is not None and os.path.exists(path):
+        for reading in segment_readings(user_id, path):
+            merged.setdefault(reading['id'], reading)
+    rows = sorted(merged.values(), key=reading_sort_key)
+
+    write_segment(path, rows)
+    if segment is None:
+        segment = SensorArchiveSegment(user_id=user_id, month=month, path=relative_path)
+        db.session.add(segment)
+    segment.row_count = len(rows)
+    segment.min_timestamp = rows[0]['timestamp']
+    segment.max_timestamp = rows[-1]['timestamp']
+    segment.updated_at = datetime.utcnow()
+
+def archive_sensor_data(older_than_days: int, chunk_size: int = 1000) -> Dict[str, int]:
+    """
+    Move readings older than `older_than_days` into per user/month segment
+    files. The latest reading of every user always stays in the live table.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    stats = {'readings': 0, 'segments': 0, 'users': 0}
+    columns = [UserSensorData.user_id] + [getattr(UserSensorData, name) for name in COLUMNS]
+
+    last_id = 0
+    while True:
+        user_ids = db.session.execute(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(chunk_size)
+        ).scalars().all()
+        if not user_ids:
+            break
+        last_id = user_ids[-1]
+
+        latest_ids = select(UserLatestTelemetry.sensor_data_id).where(
+            UserLatestTelemetry.sensor_data_id.isnot(None))
+        readings = db.session.execute(
+            select(*columns)
+            .where(UserSensorData.user_id.between(user_ids[0], user_ids[-1]),
+                   UserSensorData.timestamp < cutoff,
+                   UserSensorData.id.notin_(latest_ids))
+            .order_by(UserSensorData.user_id, UserSensorData.timestamp, UserSensorData.id)
+        ).mappings().all()
+        if not readings:
+            continue
+
+        groups = {}
+        for reading in readings:
+            groups.setdefault((reading['user_id'], reading['timestamp'].strftime('%Y-%m')), []).append(dict(reading))
+
+        # Files first, then the manifest and the delete in one transaction
+        for (user_id, month), month_readings in groups.items():
+            _archive_user_month(user_id, month, month_readings)
+
+        archived_ids = [reading['id'] for reading in readings]
+        for i in range(0, len(archived_ids), 500):
+            db.session.execute(
+                UserSensorData.__table__.delete().where(UserSensorData.id.in_(archived_ids[i:i + 500]))
+            )
+        touch_latest_telemetry({user_id for user_id, _ in groups})
+        db.session.commit()
+
+        stats['readings'] += len(readings)
+        stats['segments'] += len(groups)
+        stats['users'] += len({user_id for user_id, _ in groups})
+        logger.info(f"archive_sensor_data: archived {len(readings)} readings up to user {last_id}")
+
+    return stats
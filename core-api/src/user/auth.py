@@ -0,0 +1,160 @@
+# core-api/src/user/auth.py
+
+import logging
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, Optional
+
+from flask import current_app
+from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token, get_jwt, get_jwt_identity
+
+from src.models import db, Profile, RevokedToken
+
+# Logging
+logger = logging.getLogger(__name__)
+
+jwt = JWTManager()
+
+# Minimum JWT_SECRET_KEY length (HS256 wants a key at least as long as the hash)
+JWT_SECRET_MIN_BYTES = 32
+
+def init_jwt(app):
+    """
+    Check the signing key, then init the JWT manager. Production refuses to
+    start without JWT_SECRET_KEY; other environments get a random key per
+    process (tokens don't survive a restart). Keys shorter than
+    JWT_SECRET_MIN_BYTES are always rejected.
+    """
+    secret = app.config.get('JWT_SECRET_KEY')
+    if not secret:
+        if app.config.get('REQUIRE_JWT_SECRET_KEY'):
+            raise RuntimeError("JWT_SECRET_KEY must be set in production")
+        secret = app.config['JWT_SECRET_KEY'] = secrets.token_urlsafe(48)
+        logger.warning("JWT_SECRET_KEY not set: using a random key for this process")
+    if len(secret.encode()) < JWT_SECRET_MIN_BYTES:
+        raise RuntimeError(f"JWT_SECRET_KEY must be at least {JWT_SECRET_MIN_BYTES} bytes")
+    jwt.init_app(app)
+
+
+class RevocationList:
+    """
+    Revoked refresh tokens kept in memory. New revocations from other
+    workers are pulled through the revoked_at watermark (minus
+    SYNC_WATERMARK_OVERLAP_SECONDS) at most every
+    JWT_REVOCATION_SYNC_INTERVAL seconds, so checking a token is a set
+    lookup. Access tokens are short-lived and never checked.
+    """
+
+    def __init__(self):
+        self._revoked = {}  # jti -> expires_at
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._watermark = None
+        self._last_sync = 0.0
+
+    def sync(self, force: bool = False):
+        now = time.monotonic()
+        interval = current_app.config['JWT_REVOCATION_SYNC_INTERVAL']
+        if self._loaded and not force and now - self._last_sync < interval:
+            return
+
+        with self._lock:
+            utcnow = datetime.utcnow()
+            query = db.select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at).where(
+                RevokedToken.expires_at > utcnow)
+            if self._loaded and self._watermark is not None:
+                overlap = timedelta(seconds=current_app.config['SYNC_WATERMARK_OVERLAP_SECONDS'])
+                query = query.where(RevokedToken.revoked_at >= self._watermark - overlap)
+            # From the primary even in a GET routed to a replica: a revocation must not lag
+            for jti, expires_at, revoked_at in db.session.execute(query, bind_arguments={'bind': db.engine}):
+                self._revoked[jti] = expires_at
+                if self._watermark is None or revoked_at > self._watermark:
+                    self._watermark = revoked_at
+
+            # Expired tokens are rejected anyway
+            for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= utcnow]:
+                del self._revoked[jti]
+            self._loaded = True
+            self._last_sync = now
+
+    def revoke(self, payload: Dict[str, Any]):
+        """Revoke a decoded token. The caller commits."""
+        expires_at = datetime.utcfromtimestamp(payload['exp'])
+        db.session.add(RevokedToken(
+            jti=payload['jti'],
+            token_type=payload['type'],
+            user_id=int(payload['sub']),
+            expires_at=expires_at
+        ))
+        with self._lock:
+            self._revoked[payload['jti']] = expires_at
+
+    def is_revoked(self, jti: str) -> bool:
+        self.sync()
+        return jti in self._revoked
+
+    def __len__(self):
+        return len(self._revoked)
+
+revocation_list = RevocationList()
+
+# --- Tokens ---
+def user_claims(user) -> Dict[str, Any]:
+    """Profile and ELO snapshot carried by the tokens."""
+    return {
+        "profile": user.profile.name if user.profile else None,
+        "elo": float(user.elo_score) if user.elo_score is not None else None,
+    }
+
+def issue_tokens(user) -> Dict[str, str]:
+    claims = user_claims(user)
+    return {
+        "access_token": create_access_token(identity=str(user.id), additional_claims=claims),
+        "refresh_token": create_refresh_token(identity=str(user.id), additional_claims=claims),
+        "token_type": "Bearer",
+    }
+
+def current_user_id() -> int:
+    return int(get_jwt_identity())
+
+def is_admin() -> bool:
+    """ADMIN profile claim, copied from the user row (only `manage.py grant_admin` sets ADMIN)."""
+    return get_jwt().get('profile') == Profile.ADMIN.name
+
+def forbidden_unless_owner(user_ids: Iterable[int]) -> Optional[tuple]:
+    """
+    403 response unless every user id belongs to the caller (admins pass).
+    Ids that aren't integers are never the caller's. Reads the verified
+    token only.
+    """
+    if is_admin():
+        return None
+    caller = current_user_id()
+    if any(type(user_id) is not int or user_id != caller for user_id in user_ids):
+        return {"message": "Forbidden", "status": "fail"}, 403
+    return None
+
+# --- JWT callbacks ---
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload) -> bool:
+    if jwt_payload.get('type') != 'refresh':
+        return False
+    return revocation_list.is_revoked(jwt_payload['jti'])
+
+@jwt.unauthorized_loader
+def missing_token(reason):
+    return {"message": reason, "status": "fail"}, 401
+
+@jwt.invalid_token_loader
+def invalid_token(reason):
+    return {"message": reason, "status": "fail"}, 401
+
+@jwt.expired_token_loader
+def expired_token(jwt_header, jwt_payload):
+    return {"message": "Token has expired", "status": "fail"}, 401
+
+@jwt.revoked_token_loader
+def revoked_token(jwt_header, jwt_payload):
+    return {"message": "Token has been revoked", "status": "fail"}, 401
@@ -0,0 +1,156 @@
+# core-api/src/user/elo_cache.py
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+# Logging
+logger = logging.getLogger(__name__)
+
+def prompt_fingerprint(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode()).hexdigest()[:16]
+
+class EloCache:
+    """
+    LRU + TTL cache of ELO scores with an optional SQLite backing file
+    so entries survive restarts and are shared between workers.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600, db_path: Optional[str] = None,
+                 quantization: Optional[Dict[str, float]] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.db_path = db_path
+        self.quantization = dict(quantization or {})
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    def init_app(self, app):
+        """Size, TTL, disk file and quantization steps from the app config (ELO_CACHE_*)."""
+        with self._lock:
+            self.max_size = app.config['ELO_CACHE_SIZE']
+            self.ttl = app.config['ELO_CACHE_TTL']
+            self.quantization = dict(app.config['ELO_CACHE_QUANTIZATION'])
+            if app.config['ELO_CACHE_DB'] != self.db_path:
+                self.db_path = app.config['ELO_CACHE_DB']
+                self._conn = None
+
+    def make_key(self, params: Dict[str, Any], model: str, prompt_hash: str) -> str:
+        """
+        Cache key from the quantized ELO inputs, the model and the system prompt.
+        Values are written with repr so large ones keep all their digits.
+        """
+        if not self.quantization:
+            raise RuntimeError("ELO cache used before init_app (no quantization steps)")
+        quantized = []
+        for field, step in self.quantization.items():
+            value = round(float(params[field]) / step) * step
+            quantized.append(f"{field}={value!r}")
+        return f"{model}|{prompt_hash}|" + ",".join(quantized)
+
+    # --- Disk tier ---
+    def _disk(self):
+        if not self.db_path:
+            return None
+        # Connections must not be shared across a fork
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS elo_cache ("
+                "key TEXT PRIMARY KEY, value REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _disk_get(self, key: str, now: float):
+        try:
+            conn = self._disk()
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT value, expires_at FROM elo_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            return row
+        except sqlite3.Error as e:
+            logger.error(f"ELO cache disk read error: {str(e)}")
+            return None
+
+    def _disk_set(self, key: str, value: float, expires_at: float):
+        try:
+            conn = self._disk()
+            if conn is None:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO elo_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"ELO cache disk write error: {str(e)}")
+
+    # --- Public API ---
+    def get(self, key: str) -> Optional[float]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return value
+                del self._entries[key]
+                self.stats['expirations'] += 1
+
+            row = self._disk_get(key, now)
+            if row is not None:
+                self._store(key, row[0], row[1])
+                self.stats['disk_hits'] += 1
+                return row[0]
+
+            self.stats['misses'] += 1
+            return None
+
+    def set(self, key: str, value: float):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+            self._disk_set(key, value, expires_at)
+
+    def _store(self, key: str, value: float, expires_at: float):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            conn = self._disk()
+            if conn is not None:
+                conn.execute("DELETE FROM elo_cache")
+                conn.commit()
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['disk_hits'] + self.stats['misses']
+            hits = self.stats['hits'] + self.stats['disk_hits']
+            return {
+                **self.stats,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'disk': bool(self.db_path),
+                'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+            }
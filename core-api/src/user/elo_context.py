@@ -1,11 +1,7 @@
 # core-api/src/user/elo_context.py
 
-ELO_SYSTEM_PROMPT = """You are an expert motorcycle rider evaluation system. 
-Calculate an Elo score (between 0 and 100) and return ONLY a decimal number.
-Valid response example: 
-85.3
-
-Scoring factors:
+# Shared by the single and the batch prompt
+ELO_SCORING_RULES = """Scoring factors:
 1. Last month miles (0-1): <100=0, 500+=1
 2. Total miles (0-1): <1000=0, 10000+=1
 3. Age (0-1): 18-25=0.8, 25-45=1, >60=0.5
@@ -19,6 +15,23 @@ Calculation formula:
 (Σ(factor * weight)) * 25 
 Weights: last_month(0.2), total(0.1), age(0.15), 
          heart(0.2), brakes(0.15), speed(0.1), 
-         stress(0.05), sleep(0.05)
+         stress(0.05), sleep(0.05)"""
+
+ELO_SYSTEM_PROMPT = """You are an expert motorcycle rider evaluation system. 
+Calculate an Elo score (between 0 and 100) and return ONLY a decimal number.
+Valid response example: 
+85.3
+
+""" + ELO_SCORING_RULES + """
 
 IMPORTANT: Return ONLY the number without any explanations, formatting, or additional text. Do not include any words, just the number."""
+
+ELO_BATCH_SYSTEM_PROMPT = """You are an expert motorcycle rider evaluation system. 
+You receive several riders, each one with an id. Calculate an Elo score (between 0 and 100) for every rider.
+Return ONLY a JSON array with one object per rider, keyed by rider id.
+Valid response example: 
+[{"id": 12, "elo": 85.3}, {"id": 15, "elo": 47.0}]
+
+""" + ELO_SCORING_RULES + """
+
+IMPORTANT: Return ONLY the JSON array without any explanations, formatting, or additional text. Include every rider id exactly once."""
@@ -0,0 +1,104 @@
+# core-api/src/user/elo_engine.py
+
+from typing import Dict, Any, Mapping, Sequence
+import numpy as np
+
+# Fallback ELO rules, one entry per factor (evaluated in this order).
+#   ratio: min(value / ratio, 1.0)
+#   decay: max(1.0 - value / decay, 0.0)
+#   bands: first matching (low, high, bounds, factor) wins, else default.
+#          None means unbounded, bounds is '[]', '[)', '(]' or '()'.
+ELO_RULES = {
+    'last_month': {'param': 'last_month_miles', 'weight': 0.2, 'ratio': 500},
+    'total': {'param': 'total_miles', 'weight': 0.1, 'ratio': 5000},  # Ajustado a 5000
+    'age': {'param': 'age', 'weight': 0.15, 'default': 0.4, 'bands': [
+        (25, 45, '[]', 1.0),
+        (18, 25, '[)', 0.8),
+        (60, None, '()', 0.6),
+    ]},
+    'heart': {'param': 'heart_rate_avg', 'weight': 0.15, 'default': 0.4, 'bands': [
+        (60, 100, '[]', 1.0),
+        (50, 60, '[)', 0.8),
+        (100, 120, '(]', 0.6),
+    ]},
+    'brakes': {'param': 'braking_events', 'weight': 0.15, 'decay': 20},  # Más tolerante
+    'speed': {'param': 'avg_speed', 'weight': 0.1, 'default': 0.4, 'bands': [
+        (40, 70, '[]', 1.0),
+        (30, 40, '[)', 0.8),
+        (70, 80, '(]', 0.6),
+    ]},
+    'stress': {'param': 'stress_level', 'weight': 0.05, 'default': 0.4, 'bands': [
+        (None, 30, '()', 1.0),
+        (None, 50, '(]', 0.8),
+        (None, 70, '(]', 0.6),
+    ]},
+    'sleep': {'param': 'sleep_quality', 'weight': 0.05, 'default': 0.4, 'bands': [
+        (8, None, '[)', 1.0),
+        (6, 8, '[)', 0.8),
+        (4, 6, '[)', 0.6),
+    ]},
+}
+
+
+def _band_condition(values: np.ndarray, low, high, bounds: str) -> np.ndarray:
+    condition = np.ones(values.shape, dtype=bool)
+    if low is not None:
+        condition &= (values >= low) if bounds[0] == '[' else (values > low)
+    if high is not None:
+        condition &= (values <= high) if bounds[1] == ']' else (values < high)
+    return condition
+
+
+def _compile_factor(rule: Dict[str, Any]):
+    if 'ratio' in rule:
+        scale = float(rule['ratio'])
+        return lambda values: np.minimum(values / scale, 1.0)
+    if 'decay' in rule:
+        scale = float(rule['decay'])
+        return lambda values: np.maximum(1.0 - values / scale, 0.0)
+
+    bands = rule['bands']
+    default = float(rule['default'])
+
+    def evaluate(values):
+        conditions = [_band_condition(values, low, high, bounds) for low, high, bounds, _ in bands]
+        choices = [factor for _, _, _, factor in bands]
+        return np.select(conditions, choices, default=default)
+    return evaluate
+
+
+class EloEngine:
+    """
+    Vectorized evaluator compiled from a rules table like ELO_RULES.
+    """
+
+    def __init__(self, rules: Mapping[str, Dict[str, Any]]):
+        self.params = [rule['param'] for rule in rules.values()]
+        self._factors = [
+            (rule['param'], float(rule['weight']), _compile_factor(rule))
+            for rule in rules.values()
+        ]
+
+    def score(self, columns: Mapping[str, Sequence[float]]) -> np.ndarray:
+        """
+        Score many riders at once. `columns` maps each param name to an array
+        of values; rows with a missing (NaN) input get a NaN score. Factors
+        add up in rules order, like the original per-rider formula, so the
+        scores are identical to it.
+        """
+        total = None
+        for param, weight, factor in self._factors:
+            values = np.asarray(columns[param], dtype=np.float64)
+            contribution = factor(values) * weight
+            total = contribution if total is None else total + contribution
+            total = np.where(np.isnan(values), np.nan, total)
+
+        # ELO range: 0-100. Python's round is correctly rounded; np.round
+        # (x * 10, rint, / 10) puts some half-way scores on the other side
+        return np.array([round(value, 1) for value in (total * 100).tolist()])
+
+    def score_one(self, params: Dict[str, Any]) -> float:
+        return float(self.score({param: [params[param]] for param in self.params})[0])
+
+
+elo_engine = EloEngine(ELO_RULES)
@@ -0,0 +1,101 @@
+# core-api/src/user/elo_history.py
+
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+import numpy as np
+from sqlalchemy import insert, select
+
+from src.models import db, EloHistory, EloSource
+from src.user.elo_service import OLLAMA_MODEL, RULES_MODEL
+
+# --- Writes ---
+def model_for(source: EloSource) -> str:
+    return OLLAMA_MODEL if source == EloSource.AI else RULES_MODEL
+
+def record_elo_scores(scores: Dict[int, float], sources: Dict[int, EloSource],
+                      created_at: Optional[datetime] = None):
+    """
+    Append the scores just stored on the users ({user_id: score}) to the
+    history, with their source (default RULES). The caller commits.
+    """
+    if not scores:
+        return
+    created_at = created_at or datetime.utcnow()
+    rows = []
+    for user_id, elo_score in scores.items():
+        source = sources.get(user_id, EloSource.RULES)
+        rows.append({'user_id': user_id, 'elo_score': elo_score, 'source': source,
+                     'model': model_for(source), 'created_at': created_at})
+    db.session.execute(insert(EloHistory), rows)
+
+# --- Downsampling ---
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points (first
+    and last included) that keep the visual shape of the (x, y) series.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        # Point of this bucket making the largest triangle with the last
+        # selected point and the average of the next bucket
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+def query_elo_history(user_id: int, start: Optional[datetime], end: Optional[datetime],
+                      points: int) -> Dict[str, Any]:
+    """
+    A user's ELO history inside [start, end) (None: unbounded), downsampled
+    with LTTB to at most `points` entries. The picked entries are real
+    scores, with their source and model.
+    """
+    query = (
+        select(EloHistory.id, EloHistory.created_at, EloHistory.elo_score)
+        .where(EloHistory.user_id == user_id)
+        .order_by(EloHistory.created_at, EloHistory.id)
+    )
+    if start is not None:
+        query = query.where(EloHistory.created_at >= start)
+    if end is not None:
+        query = query.where(EloHistory.created_at < end)
+    rows = db.session.execute(query).all()
+    if not rows:
+        return {"total": 0, "points": []}
+
+    ids, times, scores = zip(*rows)
+    x = np.array(times, dtype='datetime64[us]').astype(np.int64).astype(np.float64)
+    y = np.array(scores, dtype=np.float64)
+    picked = lttb(x, y, points).tolist()
+
+    # Source and model of the picked entries only
+    details = {
+        history_id: (source, model) for history_id, source, model in db.session.execute(
+            select(EloHistory.id, EloHistory.source, EloHistory.model)
+            .where(EloHistory.id.in_([ids[i] for i in picked]))
+        )
+    }
+    series = []
+    for i in picked:
+        source, model = details[ids[i]]
+        series.append({
+            "timestamp": times[i].isoformat(),
+            "elo_score": scores[i],
+            "source": source.name,
+            "model": model
+        })
+    return {"total": len(rows), "points": series}
@@ -0,0 +1,242 @@
+# core-api/src/user/elo_jobs.py
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from flask import current_app
+from sqlalchemy import or_, select, update
+
+from src.models import db, User, UserSensorData, EloJob, JobStatus
+from src.user.elo_service import build_elo_params, calculate_elo_batch, validate_elo_params
+from src.user.leaderboard import leaderboard
+from src.user.live_feed import live_feed
+from src.user.aggregates import aggregate_elo_params
+from src.user.elo_history import record_elo_scores
+
+# Logging
+logger = logging.getLogger(__name__)
+
+# --- Queue ---
+def enqueue_elo_job(user_id: int, sensor_data_id: Optional[int] = None) -> EloJob:
+    """
+    Add a pending scoring job to the session. The caller commits.
+    """
+    job = EloJob(user_id=user_id, sensor_data_id=sensor_data_id, status=JobStatus.PENDING)
+    db.session.add(job)
+    return job
+
+def requeue_stale_jobs() -> int:
+    """
+    Put back RUNNING jobs whose worker died before finishing them.
+    """
+    stale_before = datetime.utcnow() - timedelta(seconds=current_app.config['ELO_JOB_STALE_SECONDS'])
+    result = db.session.execute(
+        update(EloJob)
+        .where(EloJob.status == JobStatus.RUNNING, EloJob.started_at < stale_before)
+        .values(status=JobStatus.PENDING)
+    )
+    db.session.commit()
+    return result.rowcount
+
+def claim_jobs(limit: int = 1) -> List[int]:
+    """
+    Claim up to `limit` pending jobs whose retry delay is over. The conditional
+    UPDATE makes the claim safe when several workers (threads or processes)
+    drain the same table.
+    """
+    now = datetime.utcnow()
+    candidates = db.session.execute(
+        db.select(EloJob.id)
+        .where(EloJob.status == JobStatus.PENDING,
+               or_(EloJob.retry_after.is_(None), EloJob.retry_after <= now))
+        .order_by(EloJob.id)
+        .limit(limit)
+    ).scalars().all()
+
+    claimed = []
+    for job_id in candidates:
+        result = db.session.execute(
+            update(EloJob)
+            .where(EloJob.id == job_id, EloJob.status == JobStatus.PENDING)
+            .values(status=JobStatus.RUNNING,
+                    attempts=EloJob.attempts + 1,
+                    started_at=now)
+        )
+        if result.rowcount == 1:
+            claimed.append(job_id)
+    db.session.commit()
+    return claimed
+
+def _job_params(job: EloJob) -> Dict[str, Any]:
+    user = db.session.get(User, job.user_id)
+    if user is None:
+        raise ValueError("User not found")
+
+    # Running aggregates first; the reading itself for riders without them
+    if user.rider_aggregate:
+        params = aggregate_elo_params(user.birthdate, user.rider_aggregate)
+        validate_elo_params(params)
+        return params
+
+    sensor_data = db.session.get(UserSensorData, job.sensor_data_id) if job.sensor_data_id else None
+    if sensor_data is None and user.latest_telemetry and user.latest_telemetry.sensor_data_id:
+        sensor_data = db.session.get(UserSensorData, user.latest_telemetry.sensor_data_id)
+    if sensor_data is None:
+        raise ValueError("No sensor data for user")
+
+    params = build_elo_params(user, sensor_data)
+    validate_elo_params(params)
+    return params
+
+def _fail_job(job: EloJob, error: str, retryable: bool = True):
+    """
+    Requeue the job with exponential backoff, or mark it FAILED when the error
+    won't go away on retry or it has no attempts left.
+    """
+    logger.error(f"ELO job {job.id} failed: {error}")
+    job.error = error[:500]
+    if not retryable or job.attempts >= current_app.config['ELO_JOB_MAX_ATTEMPTS']:
+        job.status = JobStatus.FAILED
+        return
+
+    backoff = current_app.config['ELO_JOB_RETRY_BACKOFF'] * 2 ** max(job.attempts - 1, 0)
+    job.status = JobStatus.PENDING
+    job.retry_after = datetime.utcnow() + timedelta(seconds=backoff)
+
+def run_elo_jobs(job_ids: List[int]) -> List[EloJob]:
+    """
+    Score the riders of claimed jobs with batched AI prompts and store the
+    results on the users.
+    """
+    jobs = db.session.scalars(select(EloJob).where(EloJob.id.in_(job_ids)).order_by(EloJob.id)).all()
+    try:
+        riders = {}
+        for job in jobs:
+            try:
+                riders[job.id] = _job_params(job)
+            except ValueError as e:
+                # Missing user, birthdate or sensor data: the same on every attempt
+                _fail_job(job, str(e), retryable=False)
+
+        sources = {}
+        scores = calculate_elo_batch(riders, sources=sources)
+        now = datetime.utcnow()
+        stored, stored_sources = {}, {}
+        for job in jobs:
+            if job.id not in scores:
+                continue
+            user = db.session.get(User, job.user_id)
+            user.elo_score = scores[job.id]
+            user.last_elo_update = now
+            stored[user.id], stored_sources[user.id] = user.elo_score, sources[job.id]
+
+            job.elo_score = user.elo_score
+            job.status = JobStatus.DONE
+            job.error = None
+            job.retry_after = None
+        record_elo_scores(stored, stored_sources, now)
+    except Exception as e:
+        db.session.rollback()
+        jobs = db.session.scalars(select(EloJob).where(EloJob.id.in_(job_ids))).all()
+        for job in jobs:
+            _fail_job(job, str(e))
+
+    finished_at = datetime.utcnow()
+    for job in jobs:
+        job.finished_at = finished_at
+    db.session.commit()
+
+    for job in jobs:
+        if job.status == JobStatus.DONE:
+            user = db.session.get(User, job.user_id)
+            if user is not None:
+                leaderboard.update_user(user)
+                live_feed.publish(user.id, elo_score=user.elo_score)
+    return jobs
+
+def run_elo_job(job_id: int) -> EloJob:
+    """
+    Score the rider of a claimed job and store the result on the user.
+    """
+    return run_elo_jobs([job_id])[0]
+
+def drain_once(limit: int = 1) -> int:
+    """
+    Claim and run one round of jobs (scored together). Returns how many
+    were processed.
+    """
+    job_ids = claim_jobs(limit)
+    if job_ids:
+        run_elo_jobs(job_ids)
+    return len(job_ids)
+
+# --- Worker pool ---
+class EloWorkerPool:
+    """
+    Background threads that drain the elo_job table.
+    """
+
+    def __init__(self, app, threads: int, poll_interval: float, batch_size: int = 1):
+        self.app = app
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._workers = []
+
+    def start(self):
+        with self.app.app_context():
+            requeued = requeue_stale_jobs()
+            if requeued:
+                logger.info(f"Requeued {requeued} stale ELO jobs")
+
+        for i in range(self.threads):
+            worker = threading.Thread(target=self._run, name=f"elo-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def notify(self):
+        """Wake idle workers up after a new job was committed."""
+        self._wakeup.set()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._wakeup.set()
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            processed = 0
+            with self.app.app_context():
+                try:
+                    processed = drain_once(self.batch_size)
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"ELO worker error: {str(e)}")
+
+            if not processed:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def ensure_worker_pool(app) -> Optional[EloWorkerPool]:
+    """
+    Start the in-process worker pool on first use (after any gunicorn fork).
+    """
+    global _pool
+    threads = app.config['ELO_WORKER_THREADS']
+    if threads <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = EloWorkerPool(app, threads, app.config['ELO_JOB_POLL_INTERVAL'],
+                                  app.config['ELO_JOB_BATCH_SIZE'])
+            _pool.start()
+    return _pool
@@ -0,0 +1,143 @@
+# core-api/src/user/elo_recompute.py
+
+import logging
+from datetime import datetime, date
+from typing import Dict, Any, Optional
+
+import numpy as np
+from sqlalchemy import select, update, func
+
+from src.models import db, User, UserSensorData, UserLatestTelemetry, UserRiderAggregate
+from src.user.aggregates import AGGREGATE_COLUMNS
+from src.user.elo_engine import elo_engine
+from src.user.elo_service import calculate_elo_batch
+from src.user.elo_history import record_elo_scores
+
+# Logging
+logger = logging.getLogger(__name__)
+
+# Sensor columns feeding each ELO param (age comes from User.birthdate)
+SENSOR_COLUMNS = {
+    'last_month_miles': UserSensorData.last_month_miles,
+    'total_miles': UserSensorData.total_miles,
+    'avg_speed': UserSensorData.avg_speed,
+    'braking_events': UserSensorData.braking_events,
+    'heart_rate_avg': UserSensorData.heart_rate,
+    'stress_level': UserSensorData.stress_level,
+    'sleep_quality': UserSensorData.sleep_quality,
+}
+
+def latest_readings_query(first_id: int, last_id: int):
+    """
+    Users in [first_id, last_id] with their ELO inputs: the running
+    aggregates, or the most recent sensor reading when there are none.
+    """
+    inputs = [func.coalesce(AGGREGATE_COLUMNS[param], column).label(param)
+              for param, column in SENSOR_COLUMNS.items()]
+    return (
+        select(User.id, User.birthdate, *inputs)
+        .join(UserLatestTelemetry, UserLatestTelemetry.user_id == User.id)
+        .join(UserSensorData, UserSensorData.id == UserLatestTelemetry.sensor_data_id)
+        .outerjoin(UserRiderAggregate, UserRiderAggregate.user_id == User.id)
+        .where(User.id.between(first_id, last_id))
+        .order_by(User.id)
+    )
+
+def ages_from_birthdates(birthdates, today: Optional[date] = None) -> np.ndarray:
+    """
+    Vectorized Util.calculate_age (NaN when the birthdate is unknown).
+    """
+    today = today or date.today()
+    n = len(birthdates)
+    known = np.fromiter((b is not None for b in birthdates), dtype=bool, count=n)
+    years = np.fromiter((b.year if b else 0 for b in birthdates), dtype=np.float64, count=n)
+    months = np.fromiter((b.month if b else 0 for b in birthdates), dtype=np.int64, count=n)
+    days = np.fromiter((b.day if b else 0 for b in birthdates), dtype=np.int64, count=n)
+
+    not_had_birthday = (months > today.month) | ((months == today.month) & (days > today.day))
+    ages = today.year - years - not_had_birthday
+    return np.where(known, ages, np.nan)
+
+def score_rows(rows) -> Dict[str, np.ndarray]:
+    """
+    Score a chunk of (user_id, birthdate, *sensor columns) rows.
+    """
+    n = len(rows)
+    columns = list(zip(*rows))
+    user_ids = np.fromiter(columns[0], dtype=np.int64, count=n)
+
+    params = {'age': ages_from_birthdates(columns[1])}
+    for i, param in enumerate(SENSOR_COLUMNS, start=2):
+        params[param] = np.fromiter(
+            (np.nan if v is None else v for v in columns[i]), dtype=np.float64, count=n
+        )
+
+    return {'user_id': user_ids, 'elo_score': elo_engine.score(params)}
+
+def ai_score_rows(rows, sources: Optional[Dict[int, Any]] = None) -> Dict[str, np.ndarray]:
+    """
+    Score a chunk of rows with batched AI prompts (riders with missing
+    inputs get NaN, like score_rows). `sources` is filled as in
+    calculate_elo_batch.
+    """
+    n = len(rows)
+    columns = list(zip(*rows))
+    ages = ages_from_birthdates(columns[1])
+
+    riders = {}
+    for i, row in enumerate(rows):
+        params = {'age': None if np.isnan(ages[i]) else int(ages[i])}
+        params.update(zip(SENSOR_COLUMNS, row[2:]))
+        if all(value is not None for value in params.values()):
+            riders[row[0]] = params
+
+    scores = calculate_elo_batch(riders, sources=sources)
+    return {
+        'user_id': np.fromiter(columns[0], dtype=np.int64, count=n),
+        'elo_score': np.fromiter((scores.get(user_id, np.nan) for user_id in columns[0]),
+                                 dtype=np.float64, count=n)
+    }
+
+def recompute_elo(chunk_size: int = 10000, dry_run: bool = False, use_ai: bool = False) -> Dict[str, Any]:
+    """
+    Rescore every rider from their latest reading. Users are walked in
+    id-ordered chunks (keyset), each chunk is scored as arrays (or with
+    batched AI prompts) and written back with one bulk UPDATE.
+    """
+    stats = {'scored': 0, 'skipped': 0, 'chunks': 0}
+    last_id = 0
+
+    while True:
+        user_ids = db.session.execute(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(chunk_size)
+        ).scalars().all()
+        if not user_ids:
+            break
+        last_id = user_ids[-1]
+        stats['chunks'] += 1
+
+        rows = db.session.execute(latest_readings_query(user_ids[0], last_id)).all()
+        if not rows:
+            continue
+
+        sources = {}
+        scores = ai_score_rows(rows, sources) if use_ai else score_rows(rows)
+        valid = ~np.isnan(scores['elo_score'])
+        stats['skipped'] += int((~valid).sum())
+
+        scored_ids = scores['user_id'][valid].tolist()
+        elo_scores = scores['elo_score'][valid].tolist()
+        if not dry_run and scored_ids:
+            # Stamped per chunk, right before its commit: the in-memory indexes sync on last_elo_update
+            now = datetime.utcnow()
+            db.session.execute(
+                update(User),
+                [{'id': user_id, 'elo_score': elo_score, 'last_elo_update': now}
+                 for user_id, elo_score in zip(scored_ids, elo_scores)]
+            )
+            record_elo_scores(dict(zip(scored_ids, elo_scores)), sources, now)
+        db.session.commit()
+        stats['scored'] += len(scored_ids)
+        logger.info(f"recompute_elo: chunk {stats['chunks']} scored {len(scored_ids)} riders")
+
+    return stats
@@ -1,12 +1,19 @@
 # core-api/src/user/elo_service.py
 
-import requests
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from flask import current_app
-import os, re
-from ollama import Client
-from src.user.elo_context import ELO_SYSTEM_PROMPT
+import os, re, json, math, tempfile, time
+import asyncio
+import weakref
+from src.user.elo_context import ELO_SYSTEM_PROMPT, ELO_BATCH_SYSTEM_PROMPT
+from src.user.util import Util
+from src.user.elo_engine import elo_engine, ELO_RULES
+from src.user.elo_cache import EloCache, prompt_fingerprint
+from src.user.ollama_client import ResilientOllamaClient, CircuitOpenError
+from src.user.single_flight import SingleFlight
+from src.metrics import observe_ai_call, elo_scores
+from src.models import EloSource
 
 # Logging
 logging.basicConfig(level=logging.INFO)
@@ -14,27 +21,110 @@ logger = logging.getLogger(__name__)
 
 # Client configuration
 OLLAMA_HOST = os.getenv('OLLAMA_HOST', 'http://192.168.1.31:11434')
-client = Client(host=OLLAMA_HOST, timeout=90)
+OLLAMA_MODEL = os.getenv('OLLAMA_MODEL', 'llama3:latest')
+# Pooled client (connects on first use); an open circuit sends calls straight to the fallback
+client = ResilientOllamaClient(
+    host=OLLAMA_HOST,
+    timeout=float(os.getenv('OLLAMA_TIMEOUT', '90')),
+    connect_timeout=float(os.getenv('OLLAMA_CONNECT_TIMEOUT', '3')),
+    max_concurrency=int(os.getenv('OLLAMA_MAX_CONCURRENCY', '4')),
+    queue_timeout=float(os.getenv('OLLAMA_QUEUE_TIMEOUT', '5')),
+    pool_size=int(os.getenv('OLLAMA_POOL_SIZE', '8')),
+    failure_threshold=int(os.getenv('OLLAMA_BREAKER_THRESHOLD', '5')),
+    reset_timeout=float(os.getenv('OLLAMA_BREAKER_RESET', '30')),
+    max_async_concurrency=int(os.getenv('OLLAMA_ASYNC_MAX_CONCURRENCY', '256'))
+)
 
-print(f"Ollama Host: {OLLAMA_HOST}")
+# Result cache, configured by create_app (ELO_CACHE_* settings)
+elo_cache = EloCache()
+# Single and batch scores share cache entries; changing either prompt invalidates them
+PROMPT_HASH = prompt_fingerprint(ELO_SYSTEM_PROMPT + ELO_BATCH_SYSTEM_PROMPT)
 
-def calculate_elo(params: Dict[str, Any]) -> float:
+# Model name stored in the ELO history for rule-based scores (changes with ELO_RULES)
+RULES_MODEL = 'rules:' + prompt_fingerprint(json.dumps(ELO_RULES, sort_keys=True))[:8]
+
+# Concurrent misses on the same inputs share one AI call (file locks
+# in ELO_LOCK_DIR extend this across gunicorn workers)
+elo_flight = SingleFlight(
+    lock_dir=os.getenv('ELO_LOCK_DIR', os.path.join(tempfile.gettempdir(), 'elo-single-flight')),
+    lock_timeout=float(os.getenv('ELO_SINGLE_FLIGHT_TIMEOUT', '120'))
+)
+
+def build_elo_params(user, sensor_data) -> Dict[str, Any]:
     """
-    Calculate the ELO score using the Ollama AI model.
+    Build the calculate_elo parameters from a user and one of its sensor readings.
+    """
+    return {
+        "age": Util.calculate_age(user.birthdate),
+        "last_month_miles": sensor_data.last_month_miles,
+        "total_miles": sensor_data.total_miles,
+        "avg_speed": sensor_data.avg_speed,
+        "braking_events": sensor_data.braking_events,
+        "heart_rate_avg": sensor_data.heart_rate,
+        "stress_level": sensor_data.stress_level,
+        "sleep_quality": sensor_data.sleep_quality
+    }
+
+def validate_elo_params(params: Dict[str, Any]):
+    """
+    Raise ValueError when an ELO input is missing.
     """
-    # Basic data validation
     required_fields = ['last_month_miles', 'total_miles', 'age', 
                       'heart_rate_avg', 'braking_events', 'avg_speed',
                       'stress_level', 'sleep_quality']
     
-    # Validate
     for field in required_fields:
         if field not in params or params[field] is None:
             raise ValueError(f"Missing required field: {field}")
 
-    # Prompt construction structure
-    system_prompt = ELO_SYSTEM_PROMPT
+def calculate_elo(params: Dict[str, Any]) -> float:
+    """
+    Calculate the ELO score using the Ollama AI model.
+    """
+    # Basic data validation
+    validate_elo_params(params)
+
+    # Same (quantized) inputs, same model and prompt -> same score
+    cache_key = elo_cache.make_key(params, OLLAMA_MODEL, PROMPT_HASH)
+    cached_elo = elo_cache.get(cache_key)
+    if cached_elo is not None:
+        return cached_elo
 
+    return elo_flight.do(cache_key, lambda: _calculate_ai_elo(params, cache_key))
+
+def _calculate_ai_elo(params: Dict[str, Any], cache_key: str) -> float:
+    """
+    Ask the AI model (single-flight leader only); falls back to the rules.
+    """
+    # Filled by another worker (shared disk tier) while this one waited for the lock
+    if elo_cache.db_path:
+        cached_elo = elo_cache.get(cache_key)
+        if cached_elo is not None:
+            return cached_elo
+
+    started = time.perf_counter()
+    try:
+        ai_elo = _parse_single_reply(client.chat(**_single_request(params)), cache_key)
+        observe_ai_call('single', 'ai', started)
+        elo_scores.inc('single', 'ai')
+        return ai_elo
+    except (ValueError, IndexError) as e:
+        logger.error(f"Error converting AI ELO to float: {str(e)}")
+        observe_ai_call('single', 'parse_failure', started)
+    except CircuitOpenError:
+        observe_ai_call('single', 'circuit_open', started)
+    except Exception as e:
+        logger.error(f"AI Error: {str(e)}")
+        observe_ai_call('single', 'error', started)
+
+    # Fallback to manual calculation
+    manual_elo = calculate_fallback_elo(params)
+    logger.debug(f'Fallback to manual ELO = {manual_elo}')
+    elo_scores.inc('single', 'fallback')
+    return manual_elo
+
+def _single_request(params: Dict[str, Any]) -> Dict[str, Any]:
+    """`chat` arguments scoring one rider."""
     user_prompt = f"""Rider data:
     - Last month miles: {params['last_month_miles']}
     - Total miles: {params['total_miles']}
@@ -45,74 +135,187 @@ def calculate_elo(params: Dict[str, Any]) -> float:
     - Stress level: {params['stress_level']}/100
     - Sleep quality: {params['sleep_quality']}/10"""
 
+    return {
+        'model': OLLAMA_MODEL,
+        'messages': [
+            {"role": "system", "content": ELO_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ],
+        'stream': False,
+        'options': {
+            "temperature": 0.1,
+            # "num_predict": 128,
+            # "top_p": 0.9
+        }
+    }
+
+def _parse_single_reply(response, cache_key: str) -> float:
+    """
+    First decimal number of the reply, clamped to 0-100 and cached. Raises
+    ValueError/IndexError when there is none.
+    """
+    raw = response['message']['content']
+    logger.debug(f'raw_response = {raw}')
+    numbers = re.findall(r"\d+\.\d+", raw)
+    ai_elo = round(max(0.0, min(100.0, float(numbers[0]))), 1)
+    logger.debug(f'AI ELO = {ai_elo}')
+    elo_cache.set(cache_key, ai_elo)
+    return ai_elo
+
+# --- Async scoring ---
+# In-loop single flight: cache key -> future of the call in progress, per event loop
+_async_flights = weakref.WeakKeyDictionary()
+
+async def calculate_elo_async(params: Dict[str, Any]) -> float:
+    """
+    calculate_elo for the async worker mode: the AI call is awaited
+    (client.achat), so a worker holds hundreds of them without a thread
+    each. Concurrent misses on the same inputs in this worker share one
+    call; the cache and the fallback are the same as calculate_elo.
+    """
+    validate_elo_params(params)
+
+    cache_key = elo_cache.make_key(params, OLLAMA_MODEL, PROMPT_HASH)
+    cached_elo = elo_cache.get(cache_key)
+    if cached_elo is not None:
+        return cached_elo
+
+    loop = asyncio.get_running_loop()
+    flights = _async_flights.setdefault(loop, {})
+    flight = flights.get(cache_key)
+    if flight is not None:
+        return await asyncio.shield(flight)
+
+    flight = flights[cache_key] = loop.create_task(_calculate_ai_elo_async(params, cache_key))
+    flight.add_done_callback(lambda _: flights.pop(cache_key, None))
+    return await asyncio.shield(flight)
+
+async def _calculate_ai_elo_async(params: Dict[str, Any], cache_key: str) -> float:
+    started = time.perf_counter()
+    try:
+        ai_elo = _parse_single_reply(await client.achat(**_single_request(params)), cache_key)
+        observe_ai_call('async', 'ai', started)
+        elo_scores.inc('async', 'ai')
+        return ai_elo
+    except (ValueError, IndexError) as e:
+        logger.error(f"Error converting AI ELO to float: {str(e)}")
+        observe_ai_call('async', 'parse_failure', started)
+    except CircuitOpenError:
+        observe_ai_call('async', 'circuit_open', started)
+    except Exception as e:
+        logger.error(f"AI Error: {str(e)}")
+        observe_ai_call('async', 'error', started)
+
+    elo_scores.inc('async', 'fallback')
+    return calculate_fallback_elo(params)
+
+# --- Batch scoring ---
+def _rider_line(rider_id: Any, params: Dict[str, Any]) -> str:
+    return (f"- id {rider_id}: last_month_miles={params['last_month_miles']}, "
+            f"total_miles={params['total_miles']}, age={params['age']}, "
+            f"heart_rate_avg={params['heart_rate_avg']} bpm, braking_events={params['braking_events']}, "
+            f"avg_speed={params['avg_speed']} mph, stress_level={params['stress_level']}/100, "
+            f"sleep_quality={params['sleep_quality']}/10")
+
+def parse_batch_scores(raw: str, rider_ids: List[Any]) -> Dict[Any, float]:
+    """
+    Scores of the expected riders found in a JSON array reply. Missing,
+    duplicated, unknown or malformed entries are left out.
+    """
+    start, end = raw.find('['), raw.rfind(']')
+    if start == -1 or end < start:
+        return {}
+    try:
+        entries = json.loads(raw[start:end + 1])
+    except ValueError:
+        return {}
+
+    expected = {str(rider_id): rider_id for rider_id in rider_ids}
+    scores, seen = {}, set()
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        rider_id = expected.get(str(entry.get('id')))
+        try:
+            elo = float(entry.get('elo'))
+        except (TypeError, ValueError):
+            continue
+        if rider_id is None or not math.isfinite(elo):
+            continue
+        if rider_id in seen:
+            scores.pop(rider_id, None)
+            continue
+        seen.add(rider_id)
+        scores[rider_id] = round(max(0.0, min(100.0, elo)), 1)
+    return scores
+
+def _calculate_ai_elo_batch(riders: Dict[Any, Dict[str, Any]],
+                            sources: Optional[Dict[Any, EloSource]] = None) -> Dict[Any, float]:
+    """
+    One AI call for a chunk of riders; per-rider fallback for what the
+    reply doesn't cover.
+    """
+    user_prompt = "Riders:\n" + "\n".join(_rider_line(rider_id, params) for rider_id, params in riders.items())
+    scores = {}
+    started = time.perf_counter()
     try:
         response = client.chat(
-            model="llama3:latest",
+            model=OLLAMA_MODEL,
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": ELO_BATCH_SYSTEM_PROMPT},
                 {"role": "user", "content": user_prompt}
             ],
             stream=False,
-            options={
-                    "temperature": 0.1,
-                    # "num_predict": 128,
-                    # "top_p": 0.9
-            }
+            options={"temperature": 0.1}
         )
-        
-        # Extract raw response
-        raw = response['message']['content']
-        print(f'raw_response = {raw}')
-        # Find first float number in response
-        numbers = re.findall(r"\d+\.\d+", raw)
-
-        # Fallback to manual calculation
-        manual_elo = calculate_fallback_elo(params)
-        print(f'Manual ELO = {manual_elo}')
-
-        # Convert first number to float
-        try:
-            ai_elo = float(numbers[0])
-            ai_elo = max(0.0, min(100.0, ai_elo))  # Limit to 0-100
-            print(f'AI ELO = {ai_elo}')
-            return round(ai_elo, 1)
-        except ValueError as e:
-            logger.error(f"Error converting AI ELO to float: {str(e)}")
-            return manual_elo
-
+        scores = parse_batch_scores(response['message']['content'], list(riders))
+        for rider_id, elo in scores.items():
+            elo_cache.set(elo_cache.make_key(riders[rider_id], OLLAMA_MODEL, PROMPT_HASH), elo)
+        observe_ai_call('batch', 'ai' if scores else 'parse_failure', started)
+    except CircuitOpenError:
+        observe_ai_call('batch', 'circuit_open', started)
     except Exception as e:
-        logger.error(f"AI Error: {str(e)}")
-        manual_elo = calculate_fallback_elo(params)
-        print(f'Fallback to manual ELO = {manual_elo}')
-        return manual_elo
+        logger.error(f"AI batch error: {str(e)}")
+        observe_ai_call('batch', 'error', started)
+
+    missing = [rider_id for rider_id in riders if rider_id not in scores]
+    if missing:
+        logger.warning(f"AI batch: fallback ELO for {len(missing)}/{len(riders)} riders")
+    if sources is not None:
+        sources.update((rider_id, EloSource.AI) for rider_id in scores)
+        sources.update((rider_id, EloSource.FALLBACK) for rider_id in missing)
+    for rider_id in missing:
+        scores[rider_id] = calculate_fallback_elo(riders[rider_id])
+    elo_scores.inc('batch', 'ai', amount=len(riders) - len(missing))
+    elo_scores.inc('batch', 'fallback', amount=len(missing))
+    return scores
+
+def calculate_elo_batch(riders: Dict[Any, Dict[str, Any]], batch_size: Optional[int] = None,
+                        sources: Optional[Dict[Any, EloSource]] = None) -> Dict[Any, float]:
+    """
+    ELO scores of many riders ({rider id: params}, validated by the caller),
+    ELO_JOB_BATCH_SIZE riders per AI call. Cached riders skip the AI. When given,
+    `sources` is filled with where each score came from.
+    """
+    batch_size = batch_size or current_app.config['ELO_JOB_BATCH_SIZE']
+    scores, pending = {}, {}
+    for rider_id, params in riders.items():
+        cached_elo = elo_cache.get(elo_cache.make_key(params, OLLAMA_MODEL, PROMPT_HASH))
+        if cached_elo is not None:
+            scores[rider_id] = cached_elo
+            if sources is not None:
+                sources[rider_id] = EloSource.AI  # only AI scores are cached
+        else:
+            pending[rider_id] = params
+
+    rider_ids = list(pending)
+    for i in range(0, len(rider_ids), batch_size):
+        chunk = {rider_id: pending[rider_id] for rider_id in rider_ids[i:i + batch_size]}
+        scores.update(_calculate_ai_elo_batch(chunk, sources))
+    return scores
 
 def calculate_fallback_elo(params: Dict[str, Any]) -> float:
-    # Normalized factors
-    factors = {
-        'last_month': min(params['last_month_miles'] / 500, 1.0),
-        'total': min(params['total_miles'] / 5000, 1.0),  # Ajustado a 5000
-        'age': 1.0 if 25 <= params['age'] <= 45 else 0.8 if 18 <= params['age'] < 25 else 0.6 if params['age'] > 60 else 0.4,
-        'heart': 1.0 if 60 <= params['heart_rate_avg'] <= 100 else 0.8 if 50 <= params['heart_rate_avg'] < 60 else 0.6 if 100 < params['heart_rate_avg'] <= 120 else 0.4,
-        'brakes': max(1.0 - params['braking_events'] / 20, 0.0),  # Más tolerante
-        'speed': 1.0 if 40 <= params['avg_speed'] <= 70 else 0.8 if 30 <= params['avg_speed'] < 40 else 0.6 if 70 < params['avg_speed'] <= 80 else 0.4,
-        'stress': 1.0 if params['stress_level'] < 30 else 0.8 if params['stress_level'] <= 50 else 0.6 if params['stress_level'] <= 70 else 0.4,
-        'sleep': 1.0 if params['sleep_quality'] >= 8 else 0.8 if 6 <= params['sleep_quality'] < 8 else 0.6 if 4 <= params['sleep_quality'] < 6 else 0.4
-    }
-    
-    # Weights
-    weights = {
-        'last_month': 0.2,
-        'total': 0.1,
-        'age': 0.15,
-        'heart': 0.15,
-        'brakes': 0.15,
-        'speed': 0.1,
-        'stress': 0.05,
-        'sleep': 0.05
-    }
-    
-    # ELO calculation
-    total = sum(factors[factor] * weights[factor] for factor in factors)
-    
-    # ELO range: 0-100
-    return round(total * 100, 1)
\ No newline at end of file
+    """
+    Rule-based ELO score (see ELO_RULES), used when the AI is not available.
+    """
+    return elo_engine.score_one(params)
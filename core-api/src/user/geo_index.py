@@ -0,0 +1,173 @@
+# core-api/src/user/geo_index.py
+
+import heapq
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+from flask import current_app
+
+from src.models import db, UserLatestTelemetry
+
+# Logging
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoGridIndex:
+    """
+    In-memory lat/lon grid over the latest position of every rider.
+
+    Cells are `cell_deg` degrees wide, so a radius query only visits the
+    cells around the center and its cost depends on the local density.
+    The index loads from user_latest_telemetry on first use, is updated
+    in place by the writes of this process and catches up with the other
+    workers' writes through the updated_at watermark (minus
+    SYNC_WATERMARK_OVERLAP_SECONDS, re-reading recent rows is harmless).
+    """
+
+    def __init__(self, cell_deg: float = 0.25, sync_interval: float = 5.0):
+        self.cell_deg = cell_deg
+        self.sync_interval = sync_interval
+        self._rows = int(math.ceil(180 / cell_deg))
+        self._cols = int(math.ceil(360 / cell_deg))
+        self._cells = defaultdict(dict)  # (row, col) -> {user_id: (lat, lon)}
+        self._positions = {}  # user_id -> (lat, lon, cell)
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._watermark = None
+        self._last_sync = 0.0
+
+    # --- Maintenance ---
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        row = min(int((lat + 90) / self.cell_deg), self._rows - 1)
+        col = int((lon + 180) / self.cell_deg) % self._cols
+        return row, col
+
+    def update(self, user_id: int, lat: Optional[float], lon: Optional[float]):
+        with self._lock:
+            self._discard(user_id)
+            if not lat or not lon:
+                return
+            cell = self._cell(lat, lon)
+            self._cells[cell][user_id] = (lat, lon)
+            self._positions[user_id] = (lat, lon, cell)
+
+    def remove(self, user_id: int):
+        with self._lock:
+            self._discard(user_id)
+
+    def _discard(self, user_id: int):
+        previous = self._positions.pop(user_id, None)
+        if previous is not None:
+            cell = previous[2]
+            self._cells[cell].pop(user_id, None)
+            if not self._cells[cell]:
+                del self._cells[cell]
+
+    def _apply_rows(self, rows):
+        for user_id, lat, lon, updated_at in rows:
+            self.update(user_id, lat, lon)
+            if self._watermark is None or updated_at > self._watermark:
+                self._watermark = updated_at
+
+    def sync(self, force: bool = False):
+        """
+        Load the index, or pull the positions written since the last sync.
+        """
+        now = time.monotonic()
+        if self._loaded and not force and now - self._last_sync < self.sync_interval:
+            return
+
+        with self._lock:
+            query = db.select(UserLatestTelemetry.user_id, UserLatestTelemetry.latitude,
+                              UserLatestTelemetry.longitude, UserLatestTelemetry.updated_at)
+            if self._loaded and self._watermark is not None:
+                overlap = timedelta(seconds=current_app.config['SYNC_WATERMARK_OVERLAP_SECONDS'])
+                query = query.where(UserLatestTelemetry.updated_at >= self._watermark - overlap)
+            self._apply_rows(db.session.execute(query).all())
+            if not self._loaded:
+                logger.info(f"Geo index loaded with {len(self._positions)} riders")
+            self._loaded = True
+            self._last_sync = now
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self):
+        return len(self._positions)
+
+    # --- Queries ---
+    def _candidate_cells(self, lat: float, lon: float, radius_km: float):
+        lat_span = radius_km / KM_PER_DEGREE
+        min_row = self._cell(max(lat - lat_span, -90.0), lon)[0]
+        max_row = self._cell(min(lat + lat_span, 90.0), lon)[0]
+
+        # Longitude degrees shrink with latitude; near the poles scan every column
+        widest_lat = min(abs(lat) + lat_span, 90.0)
+        cos_lat = math.cos(math.radians(widest_lat))
+        if cos_lat < 1e-6 or radius_km / (KM_PER_DEGREE * cos_lat) >= 180:
+            cols = range(self._cols)
+        else:
+            lon_span = radius_km / (KM_PER_DEGREE * cos_lat)
+            first = int((lon - lon_span + 180) // self.cell_deg)
+            last = int((lon + lon_span + 180) // self.cell_deg)
+            cols = sorted({col % self._cols for col in range(first, last + 1)})
+
+        for row in range(min_row, max_row + 1):
+            for col in cols:
+                cell = self._cells.get((row, col))
+                if cell:
+                    yield cell
+
+    def within_radius(self, lat: float, lon: float, radius_km: float,
+                      limit: Optional[int] = None) -> List[Tuple[float, int, float, float]]:
+        """
+        (distance_km, user_id, lat, lon) of the riders within radius_km, nearest first.
+        """
+        radius_km = min(radius_km, MAX_DISTANCE_KM)
+        found = []
+        with self._lock:
+            for cell in self._candidate_cells(lat, lon, radius_km):
+                for user_id, (p_lat, p_lon) in cell.items():
+                    distance = haversine_km(lat, lon, p_lat, p_lon)
+                    if distance <= radius_km:
+                        found.append((distance, user_id, p_lat, p_lon))
+        if limit is not None:
+            return heapq.nsmallest(limit, found)
+        found.sort()
+        return found
+
+    def nearest(self, lat: float, lon: float, k: int,
+                max_radius_km: float = MAX_DISTANCE_KM) -> List[Tuple[float, int, float, float]]:
+        """
+        The k riders closest to (lat, lon), searching outwards ring by ring.
+        """
+        radius_km = self.cell_deg * KM_PER_DEGREE
+        while True:
+            radius_km = min(radius_km, max_radius_km)
+            found = self.within_radius(lat, lon, radius_km, limit=k)
+            if len(found) >= k or radius_km >= max_radius_km or len(found) >= len(self._positions):
+                return found
+            radius_km *= 2
+
+
+geo_index = GeoGridIndex(
+    cell_deg=float(os.getenv('GEO_INDEX_CELL_DEG', '0.25')),
+    sync_interval=float(os.getenv('GEO_INDEX_SYNC_INTERVAL', '5'))
+)
@@ -0,0 +1,94 @@
+# core-api/src/user/ingest.py
+
+import json
+from datetime import datetime
+from typing import Dict, Any, List
+
+from sqlalchemy import insert
+
+from src.models import db, User, UserSensorData, UserSensorDataSchema
+from src.user.elo_jobs import enqueue_elo_job
+from src.user.telemetry import upsert_latest_telemetry
+from src.user.rollups import apply_readings_to_rollups
+from src.user.aggregates import apply_readings_to_aggregates
+
+SENSOR_FIELDS = tuple(UserSensorDataSchema().fields)
+
+class IngestError(ValueError):
+    """Invalid batch payload; `errors` is sent back to the client."""
+
+    def __init__(self, message: str, errors: Any = None):
+        super().__init__(message)
+        self.errors = errors
+
+def parse_batch_body(raw: bytes, mimetype: str) -> List[Dict[str, Any]]:
+    """
+    Records of a JSON array or NDJSON (one object per line) body.
+    """
+    text = raw.decode('utf-8')
+    if mimetype in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+        records = []
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError as e:
+                raise IngestError(f"Invalid JSON on line {line_number}: {str(e)}")
+        return records
+
+    try:
+        records = json.loads(text)
+    except ValueError as e:
+        raise IngestError(f"Invalid JSON: {str(e)}")
+    if not isinstance(records, list):
+        raise IngestError("Body must be a JSON array or NDJSON")
+    return records
+
+def ingest_sensor_batch(readings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Insert validated readings with one bulk INSERT, refresh the latest
+    telemetry of the affected users and enqueue one ELO job per user.
+    The caller commits.
+    """
+    user_ids = {reading['user_id'] for reading in readings}
+    existing = set(db.session.scalars(db.select(User.id).where(User.id.in_(user_ids))))
+    missing = sorted(user_ids - existing)
+    if missing:
+        raise IngestError("Unknown users", {"user_id": missing})
+
+    # Same keys on every row so the whole batch goes out as one executemany
+    now = datetime.utcnow()
+    rows = [{field: reading.get(field) for field in SENSOR_FIELDS} for reading in readings]
+    for row in rows:
+        row['timestamp'] = row['timestamp'] or now
+    ids = db.session.scalars(
+        insert(UserSensorData).returning(UserSensorData.id, sort_by_parameter_order=True),
+        rows
+    ).all()
+
+    # Newest reading of each user in this batch
+    newest = {}
+    for reading_id, row in zip(ids, rows):
+        current = newest.get(row['user_id'])
+        if current is None or (row['timestamp'], reading_id) >= (current['timestamp'], current['sensor_data_id']):
+            newest[row['user_id']] = {
+                'user_id': row['user_id'],
+                'sensor_data_id': reading_id,
+                'timestamp': row['timestamp'],
+                'latitude': row.get('latitude'),
+                'longitude': row.get('longitude')
+            }
+    upsert_latest_telemetry(list(newest.values()))
+    apply_readings_to_rollups(rows)
+    apply_readings_to_aggregates(rows)
+
+    # No reading id: the job scores the user's latest reading, which may
+    # predate this batch when the bike uploaded an old buffer
+    jobs = {user_id: enqueue_elo_job(user_id) for user_id in sorted(newest)}
+    db.session.flush()
+
+    return {
+        'inserted': len(ids),
+        'jobs': [{'user_id': user_id, 'job_id': job.id} for user_id, job in jobs.items()]
+    }
@@ -0,0 +1,219 @@
+# core-api/src/user/leaderboard.py
+
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import or_
+
+from src.models import db, User
+
+# Logging
+logger = logging.getLogger(__name__)
+
+# (profile, membership_level); None means "any"
+Segment = Tuple[Optional[str], Optional[str]]
+
+
+class Ranking:
+    """
+    Sorted array of (-elo_score, user_id): best score first, ties by id.
+    Rank lookups are binary searches; updates shift the array (memmove).
+    """
+
+    def __init__(self):
+        self._keys = []
+
+    def add(self, key: Tuple[float, int]):
+        insort(self._keys, key)
+
+    def remove(self, key: Tuple[float, int]):
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            del self._keys[i]
+
+    def position(self, key: Tuple[float, int]) -> int:
+        return bisect_left(self._keys, key)
+
+    def rank(self, elo_score: float) -> int:
+        """Competition rank (1224) of a score."""
+        return bisect_left(self._keys, (-elo_score,)) + 1
+
+    def slice(self, start: int, stop: int) -> List[Tuple[float, int]]:
+        return self._keys[max(start, 0):stop]
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class Leaderboard:
+    """
+    In-memory ELO ranking of every rider, overall and per profile and/or
+    membership level.
+
+    Loads on first use with one query over the indexed elo_score, is updated
+    in place by the writes of this process, catches up with other workers
+    through the last_elo_update/createdAt watermark (minus
+    SYNC_WATERMARK_OVERLAP_SECONDS) and is rebuilt every
+    `rebuild_interval` seconds (which also drops users deleted elsewhere).
+    """
+
+    def __init__(self, sync_interval: float = 5.0, rebuild_interval: float = 300.0):
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self._users = {}  # user_id -> (elo_score, profile, membership_level, title)
+        self._rankings = defaultdict(Ranking)  # Segment -> Ranking
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._watermark = None
+        self._last_sync = 0.0
+        self._last_rebuild = 0.0
+
+    # --- Maintenance ---
+    @staticmethod
+    def _segments(profile: Optional[str], membership_level: Optional[str]) -> List[Segment]:
+        return [(None, None), (profile, None), (None, membership_level), (profile, membership_level)]
+
+    def update(self, user_id: int, elo_score: Optional[float], profile: Optional[str],
+               membership_level: Optional[str], title: Optional[str] = None):
+        with self._lock:
+            self._discard(user_id)
+            if elo_score is None:
+                return
+            key = (-elo_score, user_id)
+            for segment in self._segments(profile, membership_level):
+                self._rankings[segment].add(key)
+            self._users[user_id] = (elo_score, profile, membership_level, title)
+
+    def update_user(self, user: User):
+        self.update(user.id, user.elo_score,
+                    user.profile.name if user.profile else None,
+                    user.membership_level.name if user.membership_level else None,
+                    user.name or user.username)
+
+    def remove(self, user_id: int):
+        with self._lock:
+            self._discard(user_id)
+
+    def _discard(self, user_id: int):
+        previous = self._users.pop(user_id, None)
+        if previous is not None:
+            elo_score, profile, membership_level, _ = previous
+            for segment in self._segments(profile, membership_level):
+                self._rankings[segment].remove((-elo_score, user_id))
+
+    def _query(self):
+        return db.select(User.id, User.elo_score, User.profile, User.membership_level,
+                         User.name, User.username, User.last_elo_update, User.createdAt)
+
+    def _apply_rows(self, rows):
+        for user_id, elo_score, profile, membership_level, name, username, last_elo_update, created_at in rows:
+            self.update(user_id, elo_score,
+                        profile.name if profile else None,
+                        membership_level.name if membership_level else None,
+                        name or username)
+            for changed_at in (last_elo_update, created_at):
+                if changed_at is not None and (self._watermark is None or changed_at > self._watermark):
+                    self._watermark = changed_at
+
+    def rebuild(self):
+        rows = db.session.execute(self._query().order_by(User.elo_score.desc(), User.id)).all()
+        with self._lock:
+            self._users.clear()
+            self._rankings.clear()
+            self._watermark = None
+            self._apply_rows(rows)
+            self._loaded = True
+            self._last_rebuild = self._last_sync = time.monotonic()
+        logger.info(f"Leaderboard loaded with {len(self._users)} riders")
+
+    def sync(self, force: bool = False):
+        """
+        Load or rebuild the rankings, or pull the scores changed since the last sync.
+        """
+        now = time.monotonic()
+        if not self._loaded or now - self._last_rebuild >= self.rebuild_interval:
+            self.rebuild()
+            return
+        if not force and now - self._last_sync < self.sync_interval:
+            return
+
+        with self._lock:
+            query = self._query()
+            if self._watermark is not None:
+                since = self._watermark - timedelta(seconds=current_app.config['SYNC_WATERMARK_OVERLAP_SECONDS'])
+                query = query.where(or_(User.last_elo_update >= since, User.createdAt >= since))
+            self._apply_rows(db.session.execute(query).all())
+            self._last_sync = now
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self):
+        return len(self._users)
+
+    # --- Queries ---
+    def _entry(self, rank: int, key: Tuple[float, int]) -> Dict[str, Any]:
+        user_id = key[1]
+        elo_score, profile, membership_level, title = self._users[user_id]
+        return {
+            "rank": rank,
+            "user_id": user_id,
+            "title": title,
+            "elo_score": elo_score,
+            "profile": profile,
+            "membership_level": membership_level
+        }
+
+    def _entries(self, ranking: Ranking, start: int, stop: int) -> List[Dict[str, Any]]:
+        keys = ranking.slice(start, stop)
+        return [self._entry(ranking.rank(-key[0]), key) for key in keys]
+
+    def top(self, limit: int, segment: Segment = (None, None)) -> Dict[str, Any]:
+        with self._lock:
+            ranking = self._rankings.get(segment) or Ranking()
+            return {"total": len(ranking), "riders": self._entries(ranking, 0, limit)}
+
+    def rank_of(self, user_id: int, segment: Segment = (None, None)) -> Optional[Dict[str, Any]]:
+        """
+        Rank of a rider within a segment (None when the rider isn't in it).
+        """
+        with self._lock:
+            user = self._users.get(user_id)
+            ranking = self._rankings.get(segment)
+            if user is None or ranking is None or segment not in self._segments(user[1], user[2]):
+                return None
+            rank = ranking.rank(user[0])
+            total = len(ranking)
+            return {
+                **self._entry(rank, (-user[0], user_id)),
+                "total": total,
+                "percentile": round(100.0 * (total - rank) / total, 2) if total else None
+            }
+
+    def around(self, user_id: int, window: int, segment: Segment = (None, None)) -> Optional[Dict[str, Any]]:
+        """
+        The rider and up to `window` riders ranked right above and below.
+        """
+        with self._lock:
+            user = self._users.get(user_id)
+            ranking = self._rankings.get(segment)
+            if user is None or ranking is None or segment not in self._segments(user[1], user[2]):
+                return None
+            position = ranking.position((-user[0], user_id))
+            return {
+                "total": len(ranking),
+                "riders": self._entries(ranking, position - window, position + window + 1)
+            }
+
+leaderboard = Leaderboard(
+    sync_interval=float(os.getenv('LEADERBOARD_SYNC_INTERVAL', '5')),
+    rebuild_interval=float(os.getenv('LEADERBOARD_REBUILD_INTERVAL', '300'))
+)
@@ -0,0 +1,357 @@
+# core-api/src/user/live_feed.py
+
+import asyncio
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import or_
+
+from src.models import db, User, UserLatestTelemetry
+
+# Logging
+logger = logging.getLogger(__name__)
+
+# (west, south, east, north); west > east crosses the antimeridian
+BBox = Tuple[float, float, float, float]
+
+def in_bbox(rider: Dict[str, Any], bbox: Optional[BBox]) -> bool:
+    lat, lon = rider['latitude'], rider['longitude']
+    if not lat or not lon:
+        return False
+    if bbox is None:
+        return True
+    west, south, east, north = bbox
+    if not south <= lat <= north:
+        return False
+    return west <= lon <= east if west <= east else (lon >= west or lon <= east)
+
+
+class LiveFeed:
+    """
+    In-process pub/sub of rider positions and ELO scores for the map stream
+    (/users/friends/stream).
+
+    Writes of this process publish into a bounded, sequence-numbered log
+    (no I/O). Streams block on a condition until something new arrives,
+    then send the latest change of each rider since their cursor. The
+    current state of every rider on the map is kept in memory, so a new
+    stream's snapshot costs no query. The state loads when the first
+    stream opens; while streams are open, one of them pulls the other
+    workers' writes every `sync_interval` seconds through the updated_at
+    and last_elo_update watermarks. DB load follows the write rate, not
+    the number of viewers.
+
+    `stream` holds a server thread per viewer (sync workers); `astream`
+    waits on the event loop instead (async mode, src/asgi.py), so an idle
+    viewer is only a suspended coroutine.
+    """
+
+    def __init__(self, buffer_size: int = 10000, sync_interval: float = 2.0, keepalive: float = 15.0):
+        self.sync_interval = sync_interval
+        self.keepalive = keepalive
+        self._state = {}  # user_id -> {user_id, title, latitude, longitude, elo_score}
+        self._log = deque(maxlen=buffer_size)  # (seq, event, payload)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._sync_lock = threading.Lock()
+        self._loaded = False
+        self._telemetry_watermark = None
+        self._elo_watermark = None
+        self._last_sync = 0.0
+        self._clients = 0
+        self._async_waiters = set()  # (event loop, asyncio.Event) of the async streams
+        self._epoch = None
+        self._epoch_pid = None
+
+    @property
+    def epoch(self) -> str:
+        """
+        Prefix of this process' event ids: sequence numbers of another
+        worker (or of this one before a restart) must not resume here.
+        New after a fork, since the feed is created before the workers.
+        """
+        if self._epoch_pid != os.getpid():
+            self._epoch = secrets.token_hex(6)
+            self._epoch_pid = os.getpid()
+        return self._epoch
+
+    # --- Publishing ---
+    def _notify(self):
+        """Wake every stream (lock held)."""
+        self._cond.notify_all()
+        for loop, wakeup in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass  # loop closed
+
+    def _append(self, event: str, payload: Dict[str, Any]):
+        self._seq += 1
+        self._log.append((self._seq, event, payload))
+
+    def _merge(self, user_id: int, changes: Dict[str, Any]) -> bool:
+        """Apply changes to a rider (lock held); True when an event was logged."""
+        current = self._state.get(user_id)
+        rider = dict(current) if current else {
+            'user_id': user_id, 'title': None, 'latitude': None, 'longitude': None, 'elo_score': None
+        }
+        rider.update(changes)
+        if rider == current:
+            return False
+        self._state[user_id] = rider
+        if rider['latitude'] and rider['longitude']:
+            self._append('update', rider)
+            return True
+        if current and current['latitude'] and current['longitude']:
+            self._append('remove', {'user_id': user_id})
+            return True
+        return False
+
+    def publish(self, user_id: int, **changes: Any):
+        """
+        New position, title and/or ELO of a rider (after the commit). A
+        no-op until a stream has loaded the feed.
+        """
+        if not self._loaded:
+            return
+        with self._cond:
+            if self._merge(user_id, changes):
+                self._notify()
+
+    def remove(self, user_id: int):
+        if not self._loaded:
+            return
+        with self._cond:
+            rider = self._state.pop(user_id, None)
+            if rider and rider['latitude'] and rider['longitude']:
+                self._append('remove', {'user_id': user_id})
+                self._notify()
+
+    # --- Sync ---
+    def sync(self, force: bool = False):
+        """
+        Load the feed, or pull the positions and scores written by other
+        processes since the last sync (one stream at a time does it).
+        """
+        if self._loaded and not force and time.monotonic() - self._last_sync < self.sync_interval:
+            return
+        if not self._sync_lock.acquire(blocking=not self._loaded or force):
+            return
+        try:
+            if self._loaded and not force and time.monotonic() - self._last_sync < self.sync_interval:
+                return
+            query = (
+                db.select(User.id, User.name, User.username, User.elo_score, User.last_elo_update,
+                          UserLatestTelemetry.latitude, UserLatestTelemetry.longitude,
+                          UserLatestTelemetry.updated_at)
+                .join(UserLatestTelemetry, UserLatestTelemetry.user_id == User.id)
+            )
+            if self._loaded:
+                # Rows committed late sit a little behind the watermarks; re-merging a row is a no-op
+                overlap = timedelta(seconds=current_app.config['SYNC_WATERMARK_OVERLAP_SECONDS'])
+                conditions = []
+                if self._telemetry_watermark is not None:
+                    conditions.append(UserLatestTelemetry.updated_at >= self._telemetry_watermark - overlap)
+                if self._elo_watermark is not None:
+                    conditions.append(User.last_elo_update >= self._elo_watermark - overlap)
+                else:
+                    conditions.append(User.last_elo_update.isnot(None))
+                if conditions:
+                    query = query.where(or_(*conditions))
+
+            # Own connection: a long-lived stream must not keep a session transaction open
+            with db.engine.connect() as connection:
+                rows = connection.execute(query).all()
+
+            with self._cond:
+                changed = False
+                for user_id, name, username, elo_score, last_elo_update, lat, lon, updated_at in rows:
+                    changed |= self._merge(user_id, {'title': name or username, 'latitude': lat,
+                                                     'longitude': lon, 'elo_score': elo_score})
+                    if self._telemetry_watermark is None or updated_at > self._telemetry_watermark:
+                        self._telemetry_watermark = updated_at
+                    if last_elo_update and (self._elo_watermark is None or last_elo_update > self._elo_watermark):
+                        self._elo_watermark = last_elo_update
+                if not self._loaded:
+                    # The initial load is the snapshot, not a burst of updates
+                    self._log.clear()
+                    logger.info(f"Live feed loaded with {len(self._state)} riders")
+                elif changed:
+                    self._notify()
+                self._loaded = True
+            self._last_sync = time.monotonic()
+        finally:
+            self._sync_lock.release()
+
+    def sync_due(self) -> bool:
+        return not self._loaded or time.monotonic() - self._last_sync >= self.sync_interval
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def clients(self) -> int:
+        return self._clients
+
+    # --- Streams ---
+    def snapshot(self, bbox: Optional[BBox] = None) -> Tuple[int, List[Dict[str, Any]]]:
+        with self._cond:
+            return self._seq, [rider for rider in self._state.values() if in_bbox(rider, bbox)]
+
+    def _since(self, cursor: int) -> Optional[List[tuple]]:
+        """Log entries after `cursor` (lock held); None when they were already dropped."""
+        missing = self._seq - cursor
+        if missing > len(self._log):
+            return None
+        return list(islice(self._log, len(self._log) - missing, None))
+
+    def stream(self, bbox: Optional[BBox] = None, last_event_id: Optional[str] = None,
+               max_seconds: Optional[float] = None) -> Iterator[str]:
+        """
+        SSE messages for one client: a snapshot (skipped when resuming from
+        a Last-Event-ID of this process still in the log), then coalesced `update` and
+        `remove` events, with keepalive comments while idle.
+        """
+        self.sync()
+        with self._cond:
+            self._clients += 1
+        try:
+            reader = _StreamReader(self, bbox, current_app.json.dumps)
+            yield f"retry: {int(self.sync_interval * 1000)}\n\n"
+            yield from reader.start(last_event_id)
+
+            deadline = time.monotonic() + max_seconds if max_seconds else None
+            while deadline is None or time.monotonic() < deadline:
+                with self._cond:
+                    if self._seq == reader.cursor:
+                        self._cond.wait(timeout=min(self.sync_interval, self.keepalive))
+                message = reader.poll()
+                if message:
+                    yield message
+                self.sync()
+        finally:
+            with self._cond:
+                self._clients -= 1
+
+    async def astream(self, bbox: Optional[BBox], last_event_id: Optional[str], max_seconds: Optional[float],
+                      dumps: Callable[[Any], str], run_sync: Callable[[], Any]) -> AsyncIterator[str]:
+        """
+        `stream` for the event loop. `run_sync` awaits self.sync() in a
+        thread with an app context; it only runs when a sync is due.
+        """
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        await run_sync()
+        with self._cond:
+            self._clients += 1
+            self._async_waiters.add((loop, wakeup))
+        try:
+            reader = _StreamReader(self, bbox, dumps)
+            yield f"retry: {int(self.sync_interval * 1000)}\n\n"
+            for message in reader.start(last_event_id):
+                yield message
+
+            deadline = time.monotonic() + max_seconds if max_seconds else None
+            while deadline is None or time.monotonic() < deadline:
+                wakeup.clear()
+                if self._seq == reader.cursor:
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), min(self.sync_interval, self.keepalive))
+                    except asyncio.TimeoutError:
+                        pass
+                message = reader.poll()
+                if message:
+                    yield message
+                if self.sync_due():
+                    await run_sync()
+        finally:
+            with self._cond:
+                self._clients -= 1
+                self._async_waiters.discard((loop, wakeup))
+
+
+class _StreamReader:
+    """Cursor of one stream over the feed log, and the riders it has shown."""
+
+    def __init__(self, feed: LiveFeed, bbox: Optional[BBox], dumps: Callable[[Any], str]):
+        self.feed = feed
+        self.bbox = bbox
+        self.dumps = dumps
+        self.cursor = 0
+        self.visible = set()
+        self.last_sent = time.monotonic()
+
+    def _snapshot(self) -> str:
+        self.cursor, riders = self.feed.snapshot(self.bbox)
+        self.visible = {rider['user_id'] for rider in riders}
+        self.last_sent = time.monotonic()
+        return f"id: {self.feed.epoch}-{self.cursor}\nevent: snapshot\ndata: {self.dumps(riders)}\n\n"
+
+    def _resume_cursor(self, last_event_id: Optional[str]) -> Optional[int]:
+        """Sequence number of a Last-Event-ID sent by this process, or None."""
+        epoch, _, seq = (last_event_id or '').rpartition('-')
+        if epoch != self.feed.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def start(self, last_event_id: Optional[str]) -> List[str]:
+        feed = self.feed
+        cursor = self._resume_cursor(last_event_id)
+        with feed._cond:
+            resume = cursor is not None and cursor <= feed._seq and feed._since(cursor) is not None
+        if not resume:
+            return [self._snapshot()]
+        self.cursor = cursor
+        self.visible = {rider['user_id'] for rider in feed.snapshot(self.bbox)[1]}
+        return []
+
+    def poll(self) -> Optional[str]:
+        """Events since the cursor (latest change of each rider), a keepalive, or None."""
+        feed = self.feed
+        with feed._cond:
+            entries = feed._since(self.cursor)
+            seq = feed._seq
+
+        if entries is None:
+            # Too far behind: start over from a fresh snapshot
+            return self._snapshot()
+
+        # Latest change of each rider only
+        latest = {}
+        for entry in entries:
+            latest[entry[2]['user_id']] = entry
+        messages = []
+        for entry_seq, event, payload in sorted(latest.values(), key=lambda e: e[0]):
+            user_id = payload['user_id']
+            if event == 'update' and in_bbox(payload, self.bbox):
+                self.visible.add(user_id)
+            elif user_id in self.visible:
+                self.visible.discard(user_id)
+                event, payload = 'remove', {'user_id': user_id}
+            else:
+                continue
+            messages.append(f"id: {feed.epoch}-{entry_seq}\nevent: {event}\ndata: {self.dumps(payload)}\n\n")
+        self.cursor = seq
+
+        if messages:
+            self.last_sent = time.monotonic()
+            return "".join(messages)
+        if time.monotonic() - self.last_sent >= feed.keepalive:
+            self.last_sent = time.monotonic()
+            return ": keepalive\n\n"
+        return None
+
+live_feed = LiveFeed(
+    buffer_size=int(os.getenv('LIVE_FEED_BUFFER', '10000')),
+    sync_interval=float(os.getenv('LIVE_FEED_SYNC_INTERVAL', '2')),
+    keepalive=float(os.getenv('LIVE_FEED_KEEPALIVE', '15'))
+)
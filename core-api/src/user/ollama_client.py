@@ -0,0 +1,288 @@
+# core-api/src/user/ollama_client.py
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Any, Optional
+
+# ollama/httpx are imported on the first call (they dominate import time)
+
+# Logging
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """The AI server is considered down; use the fallback right away."""
+
+class ConcurrencyLimitError(Exception):
+    """Every AI slot stayed busy for longer than the queue timeout."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures. While open, calls
+    are rejected until `reset_timeout` seconds pass; then a single half-open
+    probe decides whether it closes again or stays open.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.stats = {'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.stats['rejected'] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.stats['successes'] += 1
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+            if self.state != self.CLOSED:
+                logger.info("AI circuit breaker closed")
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.stats['failures'] += 1
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.stats['opened'] += 1
+                    logger.warning(f"AI circuit breaker opened after {self.consecutive_failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        """A half-open probe ended without a verdict (e.g. bad request)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = None
+            if self.state == self.OPEN:
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 3)
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+                'retry_in': retry_in,
+                **self.stats,
+            }
+
+
+def _deadline_client(**kwargs):
+    """Ollama client whose HTTP calls honour a per-call (thread-local) timeout."""
+    from ollama import Client
+
+    class _DeadlineClient(Client):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._call = threading.local()
+
+        def _request_raw(self, *args, **kwargs):
+            timeout = getattr(self._call, 'timeout', None)
+            if timeout is not None:
+                kwargs.setdefault('timeout', timeout)
+            return super()._request_raw(*args, **kwargs)
+
+    return _DeadlineClient(**kwargs)
+
+
+class ResilientOllamaClient:
+    """
+    Drop-in wrapper for `ollama.Client.chat` with a keep-alive connection
+    pool, a bounded number of concurrent calls, per-call deadlines and a
+    circuit breaker. The HTTP client is built on the first call.
+
+    `achat` is the asyncio counterpart (ollama.AsyncClient, for the async
+    worker mode): waiting calls only hold a coroutine, so its concurrency
+    limit (`max_async_concurrency`) can be much higher. Both paths share
+    the circuit breaker and the stats.
+    """
+
+    def __init__(self, host: str, timeout: float = 90.0, connect_timeout: float = 3.0,
+                 max_concurrency: int = 4, queue_timeout: float = 5.0, pool_size: int = 8,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 max_async_concurrency: int = 256):
+        self.host = host
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.pool_size = pool_size
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_async_concurrency = max_async_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._client = None
+        self._async = None  # (event loop, AsyncClient, asyncio.Semaphore)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.stats = {'calls': 0, 'timeouts': 0, 'queue_rejected': 0,
+                      'last_latency_ms': None, 'avg_latency_ms': None}
+
+    def _http_client(self):
+        with self._lock:
+            if self._client is None:
+                import httpx
+                self._client = _deadline_client(
+                    host=self.host,
+                    timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                    limits=httpx.Limits(max_connections=self.pool_size,
+                                        max_keepalive_connections=self.pool_size,
+                                        keepalive_expiry=60)
+                )
+                logger.info(f"Ollama client created for {self.host}")
+            return self._client
+
+    def _deadline(self, deadline: Optional[float]):
+        import httpx
+        return httpx.Timeout(deadline or self.timeout, connect=min(self.connect_timeout, deadline or self.timeout))
+
+    def chat(self, deadline: Optional[float] = None, **kwargs):
+        """
+        `ollama.Client.chat`, failing fast with CircuitOpenError or
+        ConcurrencyLimitError instead of queueing behind a dead server.
+        """
+        http_client = self._http_client()
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("AI circuit breaker is open")
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self.breaker.release_probe()
+            with self._lock:
+                self.stats['queue_rejected'] += 1
+            raise ConcurrencyLimitError("Too many concurrent AI calls")
+
+        self._call_started()
+        started = time.perf_counter()
+        try:
+            http_client._call.timeout = self._deadline(deadline)
+            response = http_client.chat(**kwargs)
+        except Exception as e:
+            self._record_error(e)
+            raise
+        else:
+            self.breaker.record_success()
+            return response
+        finally:
+            http_client._call.timeout = None
+            self._slots.release()
+            self._call_finished(started)
+
+    # --- Async path ---
+    def _async_client(self):
+        """AsyncClient and slots of the running event loop (httpx async clients are bound to their loop)."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._async is None or self._async[0] is not loop:
+                import httpx
+                from ollama import AsyncClient
+                client = AsyncClient(
+                    host=self.host,
+                    timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                    limits=httpx.Limits(max_connections=self.max_async_concurrency,
+                                        max_keepalive_connections=self.pool_size,
+                                        keepalive_expiry=60)
+                )
+                self._async = (loop, client, asyncio.Semaphore(self.max_async_concurrency))
+                logger.info(f"Ollama async client created for {self.host}")
+            return self._async[1], self._async[2]
+
+    async def achat(self, deadline: Optional[float] = None, **kwargs):
+        """`chat` for asyncio callers (same errors; the deadline covers the whole call)."""
+        client, slots = self._async_client()
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("AI circuit breaker is open")
+
+        try:
+            await asyncio.wait_for(slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.breaker.release_probe()
+            with self._lock:
+                self.stats['queue_rejected'] += 1
+            raise ConcurrencyLimitError("Too many concurrent AI calls")
+
+        self._call_started()
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(client.chat(**kwargs), deadline or self.timeout)
+        except Exception as e:
+            self._record_error(e)
+            raise
+        else:
+            self.breaker.record_success()
+            return response
+        finally:
+            slots.release()
+            self._call_finished(started)
+
+    async def aclose(self):
+        """Close the async HTTP client of the running loop (ASGI shutdown)."""
+        with self._lock:
+            current, self._async = self._async, None
+        if current is not None and current[0] is asyncio.get_running_loop():
+            await current[1]._client.aclose()
+
+    # --- Bookkeeping ---
+    def _call_started(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def _record_error(self, error: Exception):
+        """Breaker verdict of a failed call: timeouts, transport and 5xx errors count as failures."""
+        import httpx
+        from ollama import ResponseError
+
+        if isinstance(error, (httpx.TimeoutException, TimeoutError, asyncio.TimeoutError)):
+            with self._lock:
+                self.stats['timeouts'] += 1
+            self.breaker.record_failure()
+        elif isinstance(error, (ConnectionError, httpx.TransportError)):
+            self.breaker.record_failure()
+        elif isinstance(error, ResponseError) and error.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.release_probe()
+
+    def _call_finished(self, started: float):
+        latency_ms = round((time.perf_counter() - started) * 1000, 3)
+        with self._lock:
+            self._in_flight -= 1
+            self.stats['calls'] += 1
+            self.stats['last_latency_ms'] = latency_ms
+            average = self.stats['avg_latency_ms']
+            self.stats['avg_latency_ms'] = latency_ms if average is None else round(0.9 * average + 0.1 * latency_ms, 3)
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'host': self.host,
+                'timeout': self.timeout,
+                'connect_timeout': self.connect_timeout,
+                'max_concurrency': self.max_concurrency,
+                'max_async_concurrency': self.max_async_concurrency,
+                'in_flight': self._in_flight,
+                **self.stats,
+                'breaker': self.breaker.info(),
+            }
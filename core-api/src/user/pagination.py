@@ -0,0 +1,61 @@
+# core-api/src/user/pagination.py
+
+from typing import Any, Callable, Iterable, Optional
+
+from flask import Response, current_app, request, stream_with_context, url_for
+
+STREAM_FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+class PaginationError(ValueError):
+    pass
+
+def page_limit() -> Optional[int]:
+    """
+    ?limit= bounded by PAGE_MAX_LIMIT (None when the client asked for no page).
+    """
+    limit = request.args.get('limit', type=int)
+    if limit is None:
+        return None
+    if limit <= 0:
+        raise PaginationError("limit must be greater than 0")
+    return min(limit, current_app.config['PAGE_MAX_LIMIT'])
+
+def stream_format() -> Optional[str]:
+    fmt = request.args.get('stream')
+    if fmt is None:
+        return None
+    if fmt not in STREAM_FORMATS:
+        raise PaginationError(f"stream must be one of {', '.join(STREAM_FORMATS)}")
+    return fmt
+
+def next_page_link(endpoint: str, **params) -> str:
+    """
+    RFC 8288 Link header pointing to the next page.
+    """
+    args = {key: value for key, value in request.args.items() if key not in params}
+    args.update(params)
+    return f'<{url_for(endpoint, **args)}>; rel="next"'
+
+def stream_json(rows: Iterable[Any], dump: Callable[[Any], Any], fmt: str) -> Response:
+    """
+    Stream rows as a JSON array or NDJSON, one serialized row at a time.
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        if fmt == 'ndjson':
+            for row in rows:
+                yield dumps(dump(row)) + '\n'
+            return
+
+        yield '['
+        first = True
+        for row in rows:
+            yield (dumps(dump(row)) if first else ',' + dumps(dump(row)))
+            first = False
+        yield ']'
+
+    return Response(stream_with_context(generate()), mimetype=STREAM_FORMATS[fmt])
@@ -0,0 +1,175 @@
+# core-api/src/user/response_cache.py
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from flask import Response, current_app, request
+
+# Logging
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of serialized JSON responses ({key: (etag, body)}) with
+    an optional SQLite file shared by the workers. An entry is only served
+    while its ETag matches the current version of the resource, so a stale
+    entry in another worker is never returned; invalidation frees it early.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: float = 300, db_path: Optional[str] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.db_path = db_path
+        self._entries = OrderedDict()  # key -> (etag, body, expires_at)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'not_modified': 0, 'invalidations': 0}
+
+    # --- Disk tier ---
+    def _disk(self):
+        if not self.db_path:
+            return None
+        # Connections must not be shared across a fork
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, etag TEXT NOT NULL, body BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _disk_execute(self, sql: str, params: tuple = (), fetch: bool = False):
+        try:
+            conn = self._disk()
+            if conn is None:
+                return None
+            cursor = conn.execute(sql, params)
+            if fetch:
+                return cursor.fetchone()
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Response cache disk error: {str(e)}")
+        return None
+
+    # --- Public API ---
+    def get(self, key: str, etag: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == etag and entry[2] > now:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1]
+
+            row = self._disk_execute(
+                "SELECT body, expires_at FROM response_cache WHERE key = ? AND etag = ? AND expires_at > ?",
+                (key, etag, now), fetch=True
+            )
+            if row is not None:
+                self._store(key, etag, row[0], row[1])
+                self.stats['disk_hits'] += 1
+                return row[0]
+
+            self.stats['misses'] += 1
+            return None
+
+    def set(self, key: str, etag: str, body: bytes):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, etag, body, expires_at)
+            self._disk_execute(
+                "INSERT OR REPLACE INTO response_cache (key, etag, body, expires_at) VALUES (?, ?, ?, ?)",
+                (key, etag, body, expires_at)
+            )
+
+    def _store(self, key: str, etag: str, body: bytes, expires_at: float):
+        self._entries[key] = (etag, body, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._disk_execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            self.stats['invalidations'] += len(keys)
+
+    def count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'disk': bool(self.db_path),
+            }
+
+response_cache = ResponseCache(
+    max_size=int(os.getenv('RESPONSE_CACHE_SIZE', '10000')),
+    ttl=float(os.getenv('RESPONSE_CACHE_TTL', '300')),
+    db_path=os.getenv('RESPONSE_CACHE_DB') or None
+)
+
+# --- Keys ---
+def user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+def user_elo_key(user_id: int) -> str:
+    return f"user_elo:{user_id}"
+
+def user_elo_history_key(user_id: int, *args: Any) -> str:
+    """One key per query (the user's ELO version in the etag keeps them fresh)."""
+    return f"user_elo_history:{user_id}:" + "|".join(map(str, args))
+
+def user_keys(user_id: int) -> Tuple[str, str]:
+    """Every cached response built from a user's row or readings."""
+    return user_key(user_id), user_elo_key(user_id)
+
+# --- Views ---
+def make_etag(key: str, version: Any) -> str:
+    return hashlib.sha1(f"{key}|{version!r}".encode()).hexdigest()
+
+def cached_response(key: str, version: Any, build: Callable[[], tuple]) -> Response:
+    """
+    Serve `key` at `version`: 304 when the client already has it, the
+    cached body when this version was serialized before, otherwise
+    build() -> (payload, status). Only 200 responses are cached.
+    """
+    etag = make_etag(key, version)
+    if request.if_none_match.contains(etag):
+        response_cache.count('not_modified')
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    body = response_cache.get(key, etag)
+    cache_status = 'HIT'
+    if body is None:
+        payload, status = build()[:2]
+        if status != 200:
+            return payload, status
+        body = (current_app.json.dumps(payload) + "\n").encode()
+        response_cache.set(key, etag, body)
+        cache_status = 'MISS'
+
+    response = Response(body, status=200, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Cache'] = cache_status
+    return response
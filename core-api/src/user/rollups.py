@@ -0,0 +1,202 @@
+# core-api/src/user/rollups.py
+
+import logging
+from itertools import chain
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, List, Optional
+
+from sqlalchemy import case, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from src.models import db, User, UserSensorData, UserSensorRollup
+from src.user.archive import iter_archived_range
+
+# Logging
+logger = logging.getLogger(__name__)
+
+ROLLUP_METRICS = ('last_month_miles', 'total_miles', 'avg_speed', 'braking_events',
+                  'heart_rate', 'blood_pressure', 'stress_level', 'sleep_quality')
+
+# Finest first
+RESOLUTIONS = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+
+def bucket_start(timestamp: datetime, resolution: str) -> datetime:
+    if resolution == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _value(reading, name: str):
+    return reading.get(name) if isinstance(reading, dict) else getattr(reading, name)
+
+def _accumulate(aggregates: Dict[tuple, List[float]], readings: Iterable[Any]):
+    """
+    Fold readings into {(user_id, resolution, bucket, metric): [count, min, max, sum]}.
+    """
+    for reading in readings:
+        user_id = _value(reading, 'user_id')
+        timestamp = _value(reading, 'timestamp')
+        buckets = [(resolution, bucket_start(timestamp, resolution)) for resolution in RESOLUTIONS]
+        for metric in ROLLUP_METRICS:
+            value = _value(reading, metric)
+            if value is None:
+                continue
+            value = float(value)
+            for resolution, bucket in buckets:
+                key = (user_id, resolution, bucket, metric)
+                aggregate = aggregates.get(key)
+                if aggregate is None:
+                    aggregates[key] = [1, value, value, value]
+                else:
+                    aggregate[0] += 1
+                    aggregate[1] = min(aggregate[1], value)
+                    aggregate[2] = max(aggregate[2], value)
+                    aggregate[3] += value
+
+def _rows(aggregates: Dict[tuple, List[float]]) -> List[Dict[str, Any]]:
+    return [
+        {'user_id': user_id, 'resolution': resolution, 'bucket_start': bucket, 'metric': metric,
+         'count': count, 'min': minimum, 'max': maximum, 'sum': total}
+        for (user_id, resolution, bucket, metric), (count, minimum, maximum, total) in aggregates.items()
+    ]
+
+def _merge_rows(rows: List[Dict[str, Any]]):
+    """
+    Add aggregates to the stored buckets (count/sum add up, min/max widen).
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(UserSensorRollup)
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'resolution', 'bucket_start', 'metric'],
+            set_={
+                'count': UserSensorRollup.count + excluded['count'],
+                'min': case((excluded['min'] < UserSensorRollup.min, excluded['min']), else_=UserSensorRollup.min),
+                'max': case((excluded['max'] > UserSensorRollup.max, excluded['max']), else_=UserSensorRollup.max),
+                'sum': UserSensorRollup.sum + excluded['sum'],
+            }
+        )
+        db.session.execute(stmt, rows)
+        return
+
+    # Generic (slower) path for other databases
+    for row in rows:
+        stored = UserSensorRollup.query.filter_by(
+            user_id=row['user_id'], resolution=row['resolution'],
+            bucket_start=row['bucket_start'], metric=row['metric']
+        ).first()
+        if stored is None:
+            db.session.add(UserSensorRollup(**row))
+        else:
+            stored.count += row['count']
+            stored.min = min(stored.min, row['min'])
+            stored.max = max(stored.max, row['max'])
+            stored.sum += row['sum']
+
+def apply_readings_to_rollups(readings: Iterable[Any]):
+    """
+    Incrementally fold freshly inserted readings (models or dicts) into the
+    hourly and daily rollups. The caller commits.
+    """
+    aggregates = {}
+    _accumulate(aggregates, readings)
+    if aggregates:
+        _merge_rows(_rows(aggregates))
+
+# --- Compaction ---
+def _day_floor(timestamp: datetime) -> datetime:
+    return bucket_start(timestamp, 'day')
+
+def compact_rollups(start: datetime, end: datetime, chunk_size: int = 1000) -> Dict[str, int]:
+    """
+    Recompute the rollups of [start, end) (widened to whole days) from the
+    raw readings, live and archived. Buckets are replaced, not merged, so it
+    can be rerun safely; run it on closed windows so it doesn't race with
+    incremental updates.
+    """
+    start = _day_floor(start)
+    end = _day_floor(end) + (timedelta(days=1) if end != _day_floor(end) else timedelta(0))
+    stats = {'users': 0, 'readings': 0, 'buckets': 0}
+
+    last_id = 0
+    while True:
+        user_ids = db.session.execute(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(chunk_size)
+        ).scalars().all()
+        if not user_ids:
+            break
+        last_id = user_ids[-1]
+
+        readings = db.session.execute(
+            select(UserSensorData.user_id, UserSensorData.timestamp,
+                   *[getattr(UserSensorData, metric) for metric in ROLLUP_METRICS])
+            .where(UserSensorData.user_id.between(user_ids[0], user_ids[-1]),
+                   UserSensorData.timestamp >= start,
+                   UserSensorData.timestamp < end)
+            .execution_options(yield_per=10000)
+        ).mappings()
+
+        aggregates = {}
+        count = 0
+        for reading in chain(readings, iter_archived_range(user_ids[0], user_ids[-1], start, end)):
+            _accumulate(aggregates, [reading])
+            count += 1
+
+        db.session.execute(
+            UserSensorRollup.__table__.delete().where(
+                UserSensorRollup.user_id.between(user_ids[0], user_ids[-1]),
+                UserSensorRollup.bucket_start >= start,
+                UserSensorRollup.bucket_start < end
+            )
+        )
+        rows = _rows(aggregates)
+        if rows:
+            db.session.execute(UserSensorRollup.__table__.insert(), rows)
+        db.session.commit()
+
+        stats['users'] += len({row['user_id'] for row in rows})
+        stats['readings'] += count
+        stats['buckets'] += len(rows)
+
+    return stats
+
+# --- Queries ---
+def choose_resolution(start: datetime, end: datetime, max_points: int) -> str:
+    """
+    Finest resolution whose bucket count over the window stays within max_points.
+    """
+    window = end - start
+    for resolution, width in RESOLUTIONS.items():
+        if window / width <= max_points:
+            return resolution
+    return list(RESOLUTIONS)[-1]
+
+def query_rollups(user_id: int, start: datetime, end: datetime, resolution: str,
+                  metrics: Optional[List[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    metrics = metrics or list(ROLLUP_METRICS)
+    rows = db.session.execute(
+        select(UserSensorRollup.metric, UserSensorRollup.bucket_start, UserSensorRollup.count,
+               UserSensorRollup.min, UserSensorRollup.max, UserSensorRollup.sum)
+        .where(UserSensorRollup.user_id == user_id,
+               UserSensorRollup.resolution == resolution,
+               UserSensorRollup.bucket_start >= bucket_start(start, resolution),
+               UserSensorRollup.bucket_start < end,
+               UserSensorRollup.metric.in_(metrics))
+        .order_by(UserSensorRollup.metric, UserSensorRollup.bucket_start)
+    ).all()
+
+    series = {metric: [] for metric in metrics}
+    for metric, bucket, count, minimum, maximum, total in rows:
+        series[metric].append({
+            "bucket": bucket.isoformat(),
+            "count": count,
+            "min": minimum,
+            "max": maximum,
+            "mean": round(total / count, 4) if count else None,
+            "sum": total
+        })
+    return series
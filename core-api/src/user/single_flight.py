@@ -0,0 +1,168 @@
+# core-api/src/user/single_flight.py
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows: in-process coalescing only
+    fcntl = None
+
+# Logging
+logger = logging.getLogger(__name__)
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one computation.
+
+    Inside a process, followers wait on the leader's result. Across
+    processes (gunicorn workers), leaders of the same key block on that
+    key's lock file; the holder leaves its result in the file (and unlinks
+    it) so a leader that waited reuses it instead of computing again.
+    """
+
+    def __init__(self, lock_dir: Optional[str] = None, lock_timeout: float = 120.0):
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self.lock_timeout = lock_timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {'leaders': 0, 'coalesced': 0, 'cross_process_coalesced': 0,
+                      'lock_timeouts': 0, 'in_flight': 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats['in_flight'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run_exclusive(key, fn)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                self.stats['in_flight'] -= 1
+            call.done.set()
+
+    # --- Cross-process lock ---
+    def _lock_path(self, key: str) -> str:
+        return os.path.join(self.lock_dir, f"{hashlib.sha1(key.encode()).hexdigest()}.lock")
+
+    def _acquire(self, lock_file) -> bool:
+        """Exclusive flock on lock_file, blocking for at most lock_timeout seconds."""
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            pass
+
+        # flock has no timeout: block in a helper thread, which drops the
+        # lock itself if it only gets it after we gave up
+        fd = os.dup(lock_file.fileno())
+        acquired = threading.Event()
+        guard = threading.Lock()
+        abandoned = []
+
+        def block():
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                with guard:
+                    if abandoned:
+                        fcntl.flock(fd, fcntl.LOCK_UN)
+                    else:
+                        acquired.set()
+            finally:
+                os.close(fd)
+
+        threading.Thread(target=block, name='single-flight-lock', daemon=True).start()
+        if acquired.wait(self.lock_timeout):
+            return True
+        with guard:
+            if acquired.is_set():
+                return True
+            abandoned.append(True)
+            return False
+
+    @staticmethod
+    def _read_shared(lock_file) -> Dict[str, Any]:
+        lock_file.seek(0)
+        try:
+            return json.loads(lock_file.read() or '{}')
+        except ValueError:
+            return {}
+
+    def _run_exclusive(self, key: str, fn: Callable[[], Any]) -> Any:
+        if not self.lock_dir:
+            self._count('leaders')
+            return fn()
+
+        os.makedirs(self.lock_dir, exist_ok=True)
+        path = self._lock_path(key)
+        started = time.time()
+        while True:
+            with open(path, 'a+') as lock_file:
+                if not self._acquire(lock_file):
+                    logger.warning(f"Single-flight lock timeout for {key}")
+                    self._count('lock_timeouts')
+                    self._count('leaders')
+                    return fn()
+                try:
+                    # Another worker finished the same key while we waited
+                    shared = self._read_shared(lock_file)
+                    if shared.get('key') == key and shared.get('finished_at', 0) >= started:
+                        self._count('cross_process_coalesced')
+                        return shared['result']
+                    try:
+                        current = os.stat(path).st_ino == os.fstat(lock_file.fileno()).st_ino
+                    except FileNotFoundError:
+                        current = False
+                    if not current:
+                        continue  # the holder unlinked this file: lock the one at `path` now
+
+                    self._count('leaders')
+                    result = fn()
+                    lock_file.seek(0)
+                    lock_file.truncate()
+                    lock_file.write(json.dumps({'key': key, 'result': result, 'finished_at': time.time()}))
+                    lock_file.flush()
+                    # Waiters still read the result through their open file; new callers start afresh
+                    os.unlink(path)
+                    return result
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                'cross_process': bool(self.lock_dir),
+            }
@@ -0,0 +1,180 @@
+# core-api/src/user/telemetry.py
+
+import logging
+from datetime import datetime
+from typing import Dict, Any, Iterable, List
+
+from sqlalchemy import select, func, and_, case, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from src.models import db, User, UserSensorData, UserLatestTelemetry
+
+# Logging
+logger = logging.getLogger(__name__)
+
+PROJECTED_COLUMNS = ('sensor_data_id', 'timestamp', 'latitude', 'longitude', 'updated_at')
+
+def telemetry_row(reading: UserSensorData) -> Dict[str, Any]:
+    return {
+        'user_id': reading.user_id,
+        'sensor_data_id': reading.id,
+        'timestamp': reading.timestamp,
+        'latitude': reading.latitude,
+        'longitude': reading.longitude
+    }
+
+def upsert_latest_telemetry(rows: List[Dict[str, Any]]):
+    """
+    Insert or refresh user_latest_telemetry rows. A row only replaces the
+    stored reading when its reading is at least as recent; updated_at is
+    bumped either way.
+    """
+    if not rows:
+        return
+
+    # updated_at is the sync watermark of the in-memory indexes and part of
+    # the users' response ETags (it moves on every write to their readings)
+    now = datetime.utcnow()
+    rows = [{**row, 'updated_at': now} for row in rows]
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(UserLatestTelemetry)
+        newer = stmt.excluded.timestamp >= UserLatestTelemetry.timestamp
+        set_ = {
+            column: case((newer, stmt.excluded[column]), else_=getattr(UserLatestTelemetry, column))
+            for column in PROJECTED_COLUMNS if column != 'updated_at'
+        }
+        set_['updated_at'] = stmt.excluded.updated_at
+        stmt = stmt.on_conflict_do_update(index_elements=[UserLatestTelemetry.user_id], set_=set_)
+        db.session.execute(stmt, rows)
+        return
+
+    # Generic (slower) path for other databases
+    for row in rows:
+        latest = db.session.get(UserLatestTelemetry, row['user_id'])
+        if latest is None:
+            db.session.add(UserLatestTelemetry(**row))
+        elif row['timestamp'] >= latest.timestamp:
+            for column in PROJECTED_COLUMNS:
+                setattr(latest, column, row[column])
+        else:
+            latest.updated_at = row['updated_at']
+
+def touch_latest_telemetry(user_ids: Iterable[int]):
+    """
+    Bump updated_at of users whose readings changed without a new latest
+    reading (e.g. archived). The caller commits.
+    """
+    user_ids = list(user_ids)
+    if user_ids:
+        db.session.execute(
+            update(UserLatestTelemetry)
+            .where(UserLatestTelemetry.user_id.in_(user_ids))
+            .values(updated_at=datetime.utcnow())
+        )
+
+def record_latest_telemetry(reading: UserSensorData):
+    """
+    Keep the projection in sync with a freshly flushed reading.
+    """
+    upsert_latest_telemetry([telemetry_row(reading)])
+
+def latest_readings_in_range(first_id: int, last_id: int):
+    """
+    Latest reading of every user in [first_id, last_id], computed from the raw table.
+    """
+    latest = (
+        select(UserSensorData.user_id, func.max(UserSensorData.timestamp).label('timestamp'))
+        .where(UserSensorData.user_id.between(first_id, last_id))
+        .group_by(UserSensorData.user_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(UserSensorData.user_id, UserSensorData.id.label('sensor_data_id'),
+               UserSensorData.timestamp, UserSensorData.latitude, UserSensorData.longitude)
+        .join(latest, and_(UserSensorData.user_id == latest.c.user_id,
+                           UserSensorData.timestamp == latest.c.timestamp))
+    ).mappings().all()
+
+    # Readings sharing the same timestamp: keep the highest id
+    by_user = {}
+    for row in rows:
+        current = by_user.get(row['user_id'])
+        if current is None or row['sensor_data_id'] > current['sensor_data_id']:
+            by_user[row['user_id']] = dict(row)
+    return by_user
+
+def _user_id_chunks(chunk_size: int) -> Iterable[List[int]]:
+    last_id = 0
+    while True:
+        user_ids = db.session.execute(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(chunk_size)
+        ).scalars().all()
+        if not user_ids:
+            return
+        last_id = user_ids[-1]
+        yield user_ids
+
+def backfill_latest_telemetry(chunk_size: int = 10000) -> int:
+    """
+    Rebuild the projection from user_sensor_data. Safe to rerun.
+    """
+    total = 0
+    for user_ids in _user_id_chunks(chunk_size):
+        rows = list(latest_readings_in_range(user_ids[0], user_ids[-1]).values())
+        upsert_latest_telemetry(rows)
+        db.session.commit()
+        total += len(rows)
+    return total
+
+def check_latest_telemetry(chunk_size: int = 10000, fix: bool = False) -> Dict[str, Any]:
+    """
+    Compare the projection with the raw readings and report missing, stale
+    and orphan rows (optionally repairing them).
+    """
+    report = {'checked': 0, 'missing': 0, 'stale': 0, 'orphan': 0, 'fixed': 0, 'examples': []}
+
+    for user_ids in _user_id_chunks(chunk_size):
+        expected = latest_readings_in_range(user_ids[0], user_ids[-1])
+        stored = {
+            row.user_id: row for row in db.session.execute(
+                select(UserLatestTelemetry).where(UserLatestTelemetry.user_id.between(user_ids[0], user_ids[-1]))
+            ).scalars()
+        }
+        report['checked'] += len(user_ids)
+
+        repairs = []
+        for user_id, row in expected.items():
+            current = stored.get(user_id)
+            if current is None:
+                problem = 'missing'
+            elif current.sensor_data_id != row['sensor_data_id'] or current.timestamp != row['timestamp']:
+                problem = 'stale'
+            else:
+                continue
+            report[problem] += 1
+            if len(report['examples']) < 20:
+                report['examples'].append({'user_id': user_id, 'problem': problem})
+            repairs.append(row)
+
+        orphans = [user_id for user_id in stored if user_id not in expected]
+        report['orphan'] += len(orphans)
+
+        if fix and (repairs or orphans):
+            if orphans:
+                db.session.execute(
+                    UserLatestTelemetry.__table__.delete().where(UserLatestTelemetry.user_id.in_(orphans))
+                )
+            # Stale rows may be newer than the raw data (deleted readings), so replace them
+            if repairs:
+                db.session.execute(
+                    UserLatestTelemetry.__table__.delete().where(
+                        UserLatestTelemetry.user_id.in_([row['user_id'] for row in repairs]))
+                )
+                upsert_latest_telemetry(repairs)
+            db.session.commit()
+            report['fixed'] += len(repairs) + len(orphans)
+
+    return report
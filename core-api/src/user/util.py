@@ -2,7 +2,7 @@
 
 import hashlib
 import uuid
-from datetime import date
+from datetime import date, datetime, timezone
 
 
 class Util:
@@ -17,4 +17,23 @@ class Util:
         if not birthdate:
             return None
         today = date.today()
-        return today.year - birthdate.year - ((today.month, today.day) < (birthdate.month, birthdate.day))
\ No newline at end of file
+        return today.year - birthdate.year - ((today.month, today.day) < (birthdate.month, birthdate.day))
+
+    @staticmethod
+    def to_naive_utc(value):
+        """Timestamps are stored as naive UTC: aware values are converted, naive ones kept as they are."""
+        if value is None or value.tzinfo is None:
+            return value
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    @staticmethod
+    def parse_datetime(value):
+        """
+        ISO 8601 query parameter as naive UTC, None when empty. A trailing
+        'Z' is accepted. Raises ValueError when invalid.
+        """
+        if not value:
+            return None
+        if value[-1] in 'Zz':
+            value = value[:-1] + '+00:00'
+        return Util.to_naive_utc(datetime.fromisoformat(value))
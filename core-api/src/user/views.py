@@ -1,18 +1,42 @@
 # core-api/src/user/views.py
 
-import requests, json
-from flask import request, Blueprint, jsonify
+import heapq
+import logging
+import math
+from itertools import islice
+from flask import request, Blueprint, jsonify, current_app, url_for, Response, stream_with_context
 from marshmallow import ValidationError
-from src.models import db, User, UserSchema, ValidateUserSchemaValidation
+from src.models import db, User, UserSchema, ValidateUserSchemaValidation, LazySchema
 from src.models import UserSensorData, UserSensorDataSchema
-from src.models import Gender, Profile, MembershipLevel
-from src.user.elo_service import calculate_elo
+from src.models import Gender, Profile, MembershipLevel, EloJob, UserLatestTelemetry
+from src.user.elo_service import calculate_elo, build_elo_params, elo_cache, elo_flight, client as ai_client
+from src.user.elo_jobs import enqueue_elo_job, ensure_worker_pool
+from src.user.telemetry import record_latest_telemetry
+from src.user.rollups import apply_readings_to_rollups, choose_resolution, query_rollups, ROLLUP_METRICS, RESOLUTIONS
+from src.user.aggregates import apply_readings_to_aggregates, aggregate_elo_params
+from src.user.elo_history import query_elo_history
+from src.user.archive import iter_archived_readings, reading_sort_key
+from src.user.ingest import parse_batch_body, ingest_sensor_batch, IngestError
+from src.user.geo_index import geo_index, MAX_DISTANCE_KM
+from src.user.leaderboard import leaderboard
+from src.user.live_feed import live_feed
 from src.user.util import Util
-from datetime import datetime, date
+from src.user.auth import issue_tokens, user_claims, revocation_list, current_user_id, forbidden_unless_owner
+from flask_jwt_extended import jwt_required, get_jwt, create_access_token
+from src.user.response_cache import cached_response, response_cache, user_key, user_elo_key, user_elo_history_key, user_keys
+from src.user.pagination import page_limit, stream_format, stream_json, next_page_link, PaginationError
+from src.serializers import user_rows_query, dump_users, iter_dumped_users, sensor_rows_query, dump_reading
+from datetime import datetime, date, timedelta
+
+# Logging
+logger = logging.getLogger(__name__)
 
 # get schemas
-user_schema = UserSchema()
-sensor_schema = UserSensorDataSchema()
+user_schema = LazySchema(UserSchema)
+sensor_schema = LazySchema(UserSensorDataSchema)
+
+# Headers of the live stream responses (no caching, no proxy buffering)
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
 
 # blueprints
 users_blueprint = Blueprint("users", __name__, url_prefix="/users/")
@@ -29,28 +53,165 @@ def ping_user():
 @users_blueprint.route('/', methods=['GET'])
 def get_users():
     # if request.method == 'GET':
-        return user_schema.dump(User.query.all(), many=True), 200
+        try:
+            limit = page_limit()
+            fmt = stream_format()
+        except PaginationError as e:
+            return {"message": str(e), "status": "fail"}, 400
+        after_id = request.args.get('after_id', 0, type=int)
+
+        # Keyset pagination: ?after_id=&limit= (column-only rows, see src/serializers.py)
+        query = user_rows_query().where(User.id > after_id).order_by(User.id)
+        if limit is not None:
+            query = query.limit(limit)
+
+        if fmt is not None:
+            chunk_size = current_app.config['STREAM_CHUNK_SIZE']
+            result = db.session.execute(query.execution_options(yield_per=chunk_size))
+            return stream_json(iter_dumped_users(result.partitions()), lambda user: user, fmt)
+
+        users = dump_users(db.session.execute(query).all())
+        headers = {}
+        if limit is not None and len(users) == limit:
+            headers['Link'] = next_page_link('users.get_users', after_id=users[-1]['id'])
+        return users, 200, headers
 
 # /users/friends
 @users_blueprint.route('/friends', methods=['GET'])
 def get_friends():
-    users = User.query.all()
+    # Proximity mode: ?lat=&lon=&radius_km= and/or ?k=
+    if any(arg in request.args for arg in ('lat', 'lon', 'radius_km', 'k')):
+        return get_nearby_friends()
+
+    rows = db.session.execute(
+        db.select(User.name, User.username, UserLatestTelemetry.latitude, UserLatestTelemetry.longitude)
+        .join(UserLatestTelemetry, UserLatestTelemetry.user_id == User.id)
+        .order_by(User.id)
+    ).all()
     friends = []
     
-    for user in users:
-        last_data = UserSensorData.query.filter_by(user_id=user.id).order_by(
-            UserSensorData.timestamp.desc()
-        ).first()
-        
-        if last_data and last_data.latitude and last_data.longitude:
+    for name, username, latitude, longitude in rows:
+        if latitude and longitude:
             friends.append({
-                "title": user.name or user.username,
-                "latitude": last_data.latitude,
-                "longitude": last_data.longitude
+                "title": name or username,
+                "latitude": latitude,
+                "longitude": longitude
             })
     
     return jsonify(friends), 200
 
+# /users/friends/stream?bbox=west,south,east,north
+def live_stream_args():
+    """
+    (bbox, Last-Event-ID) of a stream request, or an error response (shared
+    by stream_friends and the async handler in src/asgi.py).
+    """
+    bbox = request.args.get('bbox')
+    if bbox is not None:
+        try:
+            west, south, east, north = (float(value) for value in bbox.split(','))
+        except ValueError:
+            return {"message": "bbox must be west,south,east,north", "status": "fail"}, 400
+        if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= north <= 90):
+            return {"message": "bbox out of range", "status": "fail"}, 400
+        bbox = (west, south, east, north)
+    return bbox, request.headers.get('Last-Event-ID')
+
+@users_blueprint.route('/friends/stream', methods=['GET'])
+def stream_friends():
+    """Server-Sent Events: a snapshot of the riders on the map, then their position and ELO changes"""
+    args = live_stream_args()
+    if isinstance(args[0], dict):
+        return args
+    bbox, last_event_id = args
+
+    # Each open stream holds one of the worker's threads (see LIVE_FEED_MAX_CLIENTS)
+    if live_feed.clients >= current_app.config['LIVE_FEED_MAX_CLIENTS']:
+        return {"message": "Too many live streams, retry later", "status": "fail"}, 503
+
+    events = live_feed.stream(bbox, last_event_id, current_app.config['LIVE_FEED_MAX_SECONDS'])
+    response = Response(stream_with_context(events), mimetype='text/event-stream')
+    response.headers.update(SSE_HEADERS)
+    return response
+
+def get_nearby_friends():
+    """Riders around a point (or around ?user_id=), optionally within an ELO band"""
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    radius_km = request.args.get('radius_km', type=float)
+    k = request.args.get('k', type=int)
+    user_id = request.args.get('user_id', type=int)
+    elo_band = request.args.get('elo_band', type=float)
+    # get(type=...) turns unparsable values into None
+    for name, value in (('lat', lat), ('lon', lon), ('radius_km', radius_km), ('elo_band', elo_band)):
+        if name in request.args and (value is None or not math.isfinite(value)):
+            return {"message": f"{name} must be a finite number", "status": "fail"}, 400
+    for name, value in (('k', k), ('user_id', user_id)):
+        if name in request.args and value is None:
+            return {"message": f"{name} must be an integer", "status": "fail"}, 400
+
+    max_results = current_app.config['GEO_MAX_RESULTS']
+    if radius_km is None and k is None:
+        return {"message": "radius_km or k required", "status": "fail"}, 400
+    if (radius_km is not None and radius_km <= 0) or (k is not None and not 0 < k <= max_results):
+        return {"message": f"radius_km must be > 0 and k between 1 and {max_results}", "status": "fail"}, 400
+
+    geo_index.sync()
+
+    caller = None
+    if user_id is not None:
+        caller = User.query.get(user_id)
+        if not caller:
+            return {"message": "User not found", "status": "fail"}, 404
+        if lat is None or lon is None:
+            location = caller.latest_telemetry
+            lat = location.latitude if location else None
+            lon = location.longitude if location else None
+
+    if lat is None or lon is None or not -90 <= lat <= 90 or not -180 <= lon <= 180:
+        return {"message": "Valid lat and lon (or a user_id with location) required", "status": "fail"}, 400
+    if elo_band is not None and caller is None:
+        return {"message": "elo_band requires user_id", "status": "fail"}, 400
+
+    limit = min(k, max_results) if k is not None else max_results
+
+    # The ELO band is applied in the DB on the nearby candidates only, widening the search until enough pass
+    fetch = limit + 1 if caller else limit
+    while True:
+        if k is not None:
+            candidates = geo_index.nearest(lat, lon, fetch, max_radius_km=radius_km or MAX_DISTANCE_KM)
+        else:
+            candidates = geo_index.within_radius(lat, lon, radius_km, limit=fetch)
+
+        ids = [user_id for _, user_id, _, _ in candidates if not caller or user_id != caller.id]
+        query = db.select(User.id, User.name, User.username, User.elo_score).where(User.id.in_(ids))
+        if elo_band is not None:
+            elo = caller.elo_score or 0.0
+            query = query.where(User.elo_score.between(elo - elo_band, elo + elo_band))
+        users = {row.id: row for row in db.session.execute(query)}
+
+        if len(users) >= limit or len(candidates) < fetch or fetch >= len(geo_index):
+            break
+        fetch *= 4
+
+    friends = []
+    for distance, friend_id, friend_lat, friend_lon in candidates:
+        user = users.get(friend_id)
+        if user is None:
+            continue
+        friends.append({
+            "user_id": friend_id,
+            "title": user.name or user.username,
+            "latitude": friend_lat,
+            "longitude": friend_lon,
+            "distance_km": round(distance, 3),
+            "elo_score": user.elo_score
+        })
+        if len(friends) >= limit:
+            break
+
+    return jsonify(friends), 200
+
 # /users/ - "/"
 @users_blueprint.route('/', methods=['POST'])
 def post_users():
@@ -115,6 +276,13 @@ def post_users():
             "status": "fail"
             }, 400
 
+    # The profile claim grants admin rights: ADMIN is only given with `manage.py grant_admin`
+    if profile is Profile.ADMIN:
+        return {
+            "message": "The ADMIN profile can't be self-assigned",
+            "status": "fail"
+            }, 403
+
     try:
         if User.query.filter((User.username == username) | (User.email == email)).first():
             return {
@@ -124,9 +292,11 @@ def post_users():
 
         db.session.add(new_user)
         db.session.commit()
+        response_cache.invalidate(*user_keys(new_user.id))
+        leaderboard.update_user(new_user)
     except Exception as e:
         db.session.rollback()
-        print("Error adding user to DB: {0}".format(e))
+        logger.error(f"Error adding user to DB: {e}")
         return {
                 "message": "Error creando un usuario",
                 "status": "error"
@@ -143,15 +313,24 @@ def post_users():
     }, 201
 
 # /users/user/user_id
-@users_blueprint.route('/user/<int:user_id>', methods=['GET'])
-def get_user(user_id):
+def user_version(user_id: int):
+    """
+    What the cached user responses depend on, in one primary key lookup
+    (None when the user doesn't exist).
+    """
+    return db.session.execute(
+        db.select(User.elo_score, User.last_elo_update,
+                  UserLatestTelemetry.timestamp, UserLatestTelemetry.updated_at)
+        .outerjoin(UserLatestTelemetry, UserLatestTelemetry.user_id == User.id)
+        .where(User.id == user_id)
+    ).first()
+
+def _user_detail(user_id: int):
     user = User.query.get(user_id)
     if not user:
         return {"message": "User not found", "status": "fail"}, 404
     
-    last_data = UserSensorData.query.filter_by(user_id=user_id).order_by(
-        UserSensorData.timestamp.desc()
-    ).first()    
+    last_data = user.latest_telemetry
 
     response = user_schema.dump(user)
     response.update({
@@ -166,25 +345,73 @@ def get_user(user_id):
     })
     return response, 200
 
+@users_blueprint.route('/user/<int:user_id>', methods=['GET'])
+def get_user(user_id):
+    version = user_version(user_id)
+    if version is None:
+        return {"message": "User not found", "status": "fail"}, 404
+    return cached_response(user_key(user_id), tuple(version), lambda: _user_detail(user_id))
+
 # /users/user/user_id/elo
 @users_blueprint.route('/user/<int:user_id>/elo', methods=['GET'])
 def get_user_elo(user_id):
-    user = User.query.get(user_id)
-    if not user:
+    version = user_version(user_id)
+    if version is None:
         return {
             "message": "User not found", 
             "status": "fail"
             }, 404
     
-    return {
-        "elo_score": user.elo_score,
-        "last_update": user.last_elo_update.isoformat() if user.last_elo_update else None,
+    elo_score, last_elo_update = version[0], version[1]
+    return cached_response(user_elo_key(user_id), (elo_score, last_elo_update), lambda: ({
+        "elo_score": elo_score,
+        "last_update": last_elo_update.isoformat() if last_elo_update else None,
         "status": "success"
-    }, 200
+    }, 200))
+
+# /users/user/user_id/elo/history?from=&to=&points=
+@users_blueprint.route('/user/<int:user_id>/elo/history', methods=['GET'])
+def get_user_elo_history(user_id):
+    """Stored ELO scores of a user, downsampled (LTTB) to ?points="""
+    try:
+        start = Util.parse_datetime(request.args.get('from'))
+        end = Util.parse_datetime(request.args.get('to'))
+    except ValueError as e:
+        return {"message": str(e), "status": "fail"}, 400
+    if start and end and start >= end:
+        return {"message": "from must be before to", "status": "fail"}, 400
+
+    points = request.args.get('points', current_app.config['ELO_HISTORY_POINTS'], type=int)
+    max_points = current_app.config['ELO_HISTORY_MAX_POINTS']
+    if not 3 <= points <= max_points:
+        return {"message": f"points must be between 3 and {max_points}", "status": "fail"}, 400
+
+    version = user_version(user_id)
+    if version is None:
+        return {"message": "User not found", "status": "fail"}, 404
+
+    def build():
+        history = query_elo_history(user_id, start, end, points)
+        return {
+            "user_id": user_id,
+            "from": start.isoformat() if start else None,
+            "to": end.isoformat() if end else None,
+            "total": history["total"],
+            "series": history["points"],
+            "status": "success"
+        }, 200
+
+    key = user_elo_history_key(user_id, start, end, points)
+    return cached_response(key, (version[0], version[1]), build)
 
 # /users/user/user_id
 @users_blueprint.route('/user/<int:user_id>', methods=['DELETE'])
+@jwt_required()
 def delete_user(user_id):
+    forbidden = forbidden_unless_owner([user_id])
+    if forbidden:
+        return forbidden
+
     user = User.query.filter_by(id=user_id).first()
 
     if user is None:
@@ -196,9 +423,13 @@ def delete_user(user_id):
     try:
         db.session.delete(user)
         db.session.commit()
+        geo_index.remove(user_id)
+        leaderboard.remove(user_id)
+        live_feed.remove(user_id)
+        response_cache.invalidate(*user_keys(user_id))
     except Exception as e:
         db.session.rollback()
-        print("Error in DB: {0}".format(e))
+        logger.error(f"Error in DB: {e}")
         return {
             "message": "Error en BD",
             "status": "error"
@@ -224,11 +455,52 @@ def login():
 
     return {
         "name": f"{user.name} {user.lastname}",
-        "elo": float(user.elo_score)
+        "elo": float(user.elo_score),
+        **issue_tokens(user)
+    }, 200
+
+@users_blueprint.route('/token/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh_token():
+    """New access token (with a fresh profile/ELO snapshot) from a refresh token"""
+    user = db.session.get(User, current_user_id())
+    if user is None:
+        return {"message": "User not found", "status": "fail"}, 401
+
+    return {
+        "access_token": create_access_token(identity=str(user.id), additional_claims=user_claims(user)),
+        "token_type": "Bearer",
+        "status": "success"
+    }, 200
+
+@users_blueprint.route('/logout', methods=['POST'])
+@jwt_required(refresh=True)
+def logout():
+    """Revoke the refresh token sent in the Authorization header"""
+    try:
+        revocation_list.revoke(get_jwt())
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return {"message": str(e), "status": "error"}, 500
+    return {"message": "Token revoked", "status": "success"}, 200
+
+@users_blueprint.route('/me', methods=['GET'])
+@jwt_required()
+def get_me():
+    """Identity of the caller, read from the access token only"""
+    claims = get_jwt()
+    return {
+        "id": current_user_id(),
+        "profile": claims.get('profile'),
+        "elo": claims.get('elo'),
+        "expires_at": datetime.utcfromtimestamp(claims['exp']).isoformat(),
+        "status": "success"
     }, 200
 
 # --- Sensors ---
 @sensor_blueprint.route('data', methods=['POST'])
+@jwt_required()
 def add_sensor_data():
     """Add sensor data for a user"""
     user_id = request.json.get('user_id')
@@ -237,6 +509,14 @@ def add_sensor_data():
             "message": "User ID required", 
             "status": "fail"
             }, 400
+    if isinstance(user_id, str) and user_id.isdigit():
+        user_id = int(user_id)
+    if type(user_id) is not int:
+        return {"message": "User ID must be an integer", "status": "fail"}, 400
+
+    forbidden = forbidden_unless_owner([user_id])
+    if forbidden:
+        return forbidden
     
     try:
         new_data = UserSensorData(
@@ -254,32 +534,33 @@ def add_sensor_data():
         )
         
         db.session.add(new_data)
+        db.session.flush()
+        record_latest_telemetry(new_data)
+        apply_readings_to_rollups([new_data])
+        apply_readings_to_aggregates([new_data])
+
+        # Defer ELO scoring to the background workers
+        job = enqueue_elo_job(user_id, new_data.id)
         db.session.commit()
 
-        # Update user ELO score
+        geo_index.update(user_id, new_data.latitude, new_data.longitude)
+        response_cache.invalidate(*user_keys(user_id))
+
+        pool = ensure_worker_pool(current_app._get_current_object())
+        if pool:
+            pool.notify()
+
         user = User.query.get(user_id)
-        age = Util.calculate_age(user.birthdate)
-        
-        elo_params = {
-            "age": age,
-            "last_month_miles": new_data.last_month_miles,
-            "total_miles": new_data.total_miles,
-            "avg_speed": new_data.avg_speed,
-            "braking_events": new_data.braking_events,
-            "heart_rate_avg": new_data.heart_rate,
-            "stress_level": new_data.stress_level,
-            "sleep_quality": new_data.sleep_quality
-        }
-        
-        user.elo_score = calculate_elo(elo_params)
-        user.last_elo_update = datetime.utcnow()
-        
-        db.session.commit()
-        
+        if user:
+            live_feed.publish(user_id, title=user.name or user.username, latitude=new_data.latitude,
+                              longitude=new_data.longitude, elo_score=user.elo_score)
+
         response_data = sensor_schema.dump(new_data)
-        response_data["elo_score"] = user.elo_score
+        response_data["elo_score"] = user.elo_score if user else None
+        response_data["job_id"] = job.id
+        response_data["status_url"] = url_for('elo.get_elo_job', job_id=job.id)
 
-        return response_data, 201
+        return response_data, 202
         
     except Exception as e:
         db.session.rollback()
@@ -288,40 +569,193 @@ def add_sensor_data():
             "status": "error"
             }, 500
 
+@sensor_blueprint.route('data/batch', methods=['POST'])
+@jwt_required()
+def add_sensor_data_batch():
+    """Add many sensor readings at once (JSON array or NDJSON)"""
+    try:
+        records = parse_batch_body(request.get_data(), request.mimetype)
+    except IngestError as e:
+        return {"message": str(e), "status": "fail"}, 400
+
+    max_size = current_app.config['SENSOR_BATCH_MAX_SIZE']
+    if not records:
+        return {"message": "Empty batch", "status": "fail"}, 400
+    if len(records) > max_size:
+        return {"message": f"Batch too large (max {max_size} readings)", "status": "fail"}, 413
+
+    try:
+        readings = UserSensorDataSchema(many=True).load(records)
+    except ValidationError as err:
+        return {"message": "Invalid readings", "errors": err.messages, "status": "fail"}, 400
+
+    forbidden = forbidden_unless_owner({reading['user_id'] for reading in readings})
+    if forbidden:
+        return forbidden
+
+    try:
+        result = ingest_sensor_batch(readings)
+        db.session.commit()
+    except IngestError as e:
+        db.session.rollback()
+        return {"message": str(e), "errors": e.errors, "status": "fail"}, 400
+    except Exception as e:
+        db.session.rollback()
+        return {
+            "message": str(e), 
+            "status": "error"
+            }, 500
+
+    if geo_index.loaded:
+        geo_index.sync(force=True)
+    if live_feed.loaded:
+        live_feed.sync(force=True)
+    for user_id in {reading['user_id'] for reading in readings}:
+        response_cache.invalidate(*user_keys(user_id))
+
+    pool = ensure_worker_pool(current_app._get_current_object())
+    if pool:
+        pool.notify()
+
+    return {
+        "inserted": result['inserted'],
+        "jobs": result['jobs'],
+        "status": "success"
+    }, 202
+
 @sensor_blueprint.route('data/<int:user_id>', methods=['GET'])
+@jwt_required()
 def get_sensor_data(user_id):
     """Get sensor data for a user"""
-    data = UserSensorData.query.filter_by(user_id=user_id).all()
-    return sensor_schema.dump(data, many=True), 200
+    forbidden = forbidden_unless_owner([user_id])
+    if forbidden:
+        return forbidden
+
+    try:
+        limit = page_limit()
+        fmt = stream_format()
+        after = Util.parse_datetime(request.args.get('after'))
+    except (PaginationError, ValueError) as e:
+        return {"message": str(e), "status": "fail"}, 400
+    after_id = request.args.get('after_id', 0, type=int)
+
+    # Archived (older) readings are served from the segment files
+    archived = iter_archived_readings(user_id, after=after, after_id=after_id)
+
+    if limit is None and fmt is None and after is None:
+        data = list(archived) + db.session.execute(
+            sensor_rows_query().where(UserSensorData.user_id == user_id)).all()
+        return [dump_reading(reading) for reading in data], 200
+
+    # Keyset pagination on (timestamp, id): ?after=<timestamp>&after_id=&limit=
+    query = (
+        sensor_rows_query()
+        .where(UserSensorData.user_id == user_id)
+        .order_by(UserSensorData.timestamp, UserSensorData.id)
+    )
+    if after is not None:
+        query = query.where(db.or_(
+            UserSensorData.timestamp > after,
+            db.and_(UserSensorData.timestamp == after, UserSensorData.id > after_id)
+        ))
+    if limit is not None:
+        query = query.limit(limit)
+
+    hot = db.session.execute(query.execution_options(yield_per=current_app.config['STREAM_CHUNK_SIZE']))
+    data = heapq.merge(archived, hot, key=reading_sort_key)
+    if limit is not None:
+        data = islice(data, limit)
+
+    if fmt is not None:
+        return stream_json(data, dump_reading, fmt)
+
+    data = list(data)
+    headers = {}
+    if limit is not None and len(data) == limit:
+        last_timestamp, last_id = reading_sort_key(data[-1])
+        headers['Link'] = next_page_link('sensors.get_sensor_data', user_id=user_id,
+                                         after=last_timestamp.isoformat(), after_id=last_id)
+    return [dump_reading(reading) for reading in data], 200, headers
+
+@sensor_blueprint.route('data/<int:user_id>/range', methods=['GET'])
+@jwt_required()
+def get_sensor_data_range(user_id):
+    """Hourly/daily aggregates of a user's readings over ?from=&to="""
+    forbidden = forbidden_unless_owner([user_id])
+    if forbidden:
+        return forbidden
+
+    try:
+        end = Util.parse_datetime(request.args.get('to')) or datetime.utcnow()
+        start = Util.parse_datetime(request.args.get('from')) or end - timedelta(days=30)
+    except ValueError as e:
+        return {"message": str(e), "status": "fail"}, 400
+    if start >= end:
+        return {"message": "from must be before to", "status": "fail"}, 400
+
+    metrics = request.args.get('metrics')
+    metrics = metrics.split(',') if metrics else list(ROLLUP_METRICS)
+    unknown = [metric for metric in metrics if metric not in ROLLUP_METRICS]
+    if unknown:
+        return {"message": f"Unknown metrics: {', '.join(unknown)}", "status": "fail"}, 400
+
+    resolution = request.args.get('resolution')
+    if resolution is None:
+        max_points = request.args.get('max_points', current_app.config['ROLLUP_MAX_POINTS'], type=int)
+        resolution = choose_resolution(start, end, max_points)
+    elif resolution not in RESOLUTIONS:
+        return {"message": f"resolution must be one of {', '.join(RESOLUTIONS)}", "status": "fail"}, 400
+
+    return {
+        "user_id": user_id,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "resolution": resolution,
+        "series": query_rollups(user_id, start, end, resolution, metrics),
+        "status": "success"
+    }, 200
 
 # --- Elo ---
+def elo_params_for_user(user_id):
+    """
+    calculate_elo parameters of a user, or an error response. The caller
+    checks the JWT (shared by get_elo and the async handler in src/asgi.py).
+    """
+    forbidden = forbidden_unless_owner([user_id])
+    if forbidden:
+        return forbidden
+
+    user = User.query.get(user_id)
+    if not user:
+        return {"message": "Datos insuficientes", "status": "fail"}, 404
+
+    age = Util.calculate_age(user.birthdate)
+    if age is None:
+        return {"message": "Fecha de nacimiento requerida", "status": "fail"}, 400
+
+    # Prepare ELO parameters: the rider's running aggregates, or the
+    # latest reading for riders that have none yet
+    if user.rider_aggregate:
+        elo_params = aggregate_elo_params(user.birthdate, user.rider_aggregate)
+    else:
+        sensor_data = None
+        if user.latest_telemetry and user.latest_telemetry.sensor_data_id:
+            sensor_data = db.session.get(UserSensorData, user.latest_telemetry.sensor_data_id)
+        if not sensor_data:
+            return {"message": "Datos insuficientes", "status": "fail"}, 404
+        elo_params = build_elo_params(user, sensor_data)
+    logger.debug(f"elo_params = {elo_params}")
+    return elo_params
+
 @elo_blueprint.route('calculate/<int:user_id>', methods=['GET'])
+@jwt_required()
 def get_elo(user_id):
     """ELO calculation for a user"""
     try:
-        user = User.query.get(user_id)
-        sensor_data = UserSensorData.query.filter_by(user_id=user_id).first()
+        elo_params = elo_params_for_user(user_id)
+        if not isinstance(elo_params, dict):
+            return elo_params
 
-        age = Util.calculate_age(user.birthdate)
-        if age is None:
-            return {"message": "Fecha de nacimiento requerida", "status": "fail"}, 400
-        
-        if not user or not sensor_data:
-            return {"message": "Datos insuficientes", "status": "fail"}, 404
-        
-        # Prepare ELO parameters
-        elo_params = {
-            "age": age,
-            "last_month_miles": sensor_data.last_month_miles,
-            "total_miles": sensor_data.total_miles,
-            "avg_speed": sensor_data.avg_speed,
-            "braking_events": sensor_data.braking_events,
-            "heart_rate_avg": sensor_data.heart_rate,
-            "stress_level": sensor_data.stress_level,
-            "sleep_quality": sensor_data.sleep_quality
-        }
-        print(f'elo_params = {elo_params}')
-        
         # Ollama server request
         elo_score = calculate_elo(elo_params)
         
@@ -334,4 +768,101 @@ def get_elo(user_id):
         return {
             "message": str(e), 
             "status": "error"
-            }, 500
\ No newline at end of file
+            }, 500
+
+# --- Leaderboard ---
+def leaderboard_segment():
+    """
+    (profile, membership_level) from ?profile=&membership_level=.
+    """
+    profile = request.args.get('profile')
+    membership_level = request.args.get('membership_level')
+    if profile is not None:
+        profile = profile.upper()
+        if profile not in Profile.__members__:
+            raise ValueError(f"profile must be one of {', '.join(Profile.__members__)}")
+    if membership_level is not None:
+        membership_level = membership_level.upper()
+        if membership_level not in MembershipLevel.__members__:
+            raise ValueError(f"membership_level must be one of {', '.join(MembershipLevel.__members__)}")
+    return profile, membership_level
+
+@elo_blueprint.route('leaderboard', methods=['GET'])
+def get_leaderboard():
+    """Top riders by ELO (?limit=100, optionally per profile/membership level)"""
+    try:
+        segment = leaderboard_segment()
+        limit = page_limit() or 100
+    except (PaginationError, ValueError) as e:
+        return {"message": str(e), "status": "fail"}, 400
+
+    leaderboard.sync()
+    return {**leaderboard.top(limit, segment), "status": "success"}, 200
+
+@elo_blueprint.route('leaderboard/rank/<int:user_id>', methods=['GET'])
+def get_leaderboard_rank(user_id):
+    """Rank and percentile of a rider"""
+    try:
+        segment = leaderboard_segment()
+    except ValueError as e:
+        return {"message": str(e), "status": "fail"}, 400
+
+    leaderboard.sync()
+    rank = leaderboard.rank_of(user_id, segment)
+    if rank is None:
+        return {"message": "User not ranked", "status": "fail"}, 404
+    return {**rank, "status": "success"}, 200
+
+@elo_blueprint.route('leaderboard/around/<int:user_id>', methods=['GET'])
+def get_leaderboard_around(user_id):
+    """Riders ranked right above and below a rider (?window=5)"""
+    try:
+        segment = leaderboard_segment()
+    except ValueError as e:
+        return {"message": str(e), "status": "fail"}, 400
+    window = min(max(request.args.get('window', 5, type=int), 0), current_app.config['PAGE_MAX_LIMIT'])
+
+    leaderboard.sync()
+    around = leaderboard.around(user_id, window, segment)
+    if around is None:
+        return {"message": "User not ranked", "status": "fail"}, 404
+    return {**around, "status": "success"}, 200
+
+@elo_blueprint.route('jobs/<int:job_id>', methods=['GET'])
+def get_elo_job(job_id):
+    """Status and result of a background ELO scoring job"""
+    job = EloJob.query.get(job_id)
+    if not job:
+        return {"message": "Job not found", "status": "fail"}, 404
+
+    user = User.query.get(job.user_id)
+
+    return {
+        "job_id": job.id,
+        "user_id": job.user_id,
+        "sensor_data_id": job.sensor_data_id,
+        "job_status": job.status.name,
+        "attempts": job.attempts,
+        "elo_score": job.elo_score,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "retry_after": job.retry_after.isoformat() if job.retry_after else None,
+        "last_elo_update": user.last_elo_update.isoformat() if user and user.last_elo_update else None,
+        "status": "success"
+    }, 200
+
+@elo_blueprint.route('cache/stats', methods=['GET'])
+def get_elo_cache_stats():
+    """Hit/miss counters of the ELO result cache, coalesced AI calls and the response cache"""
+    return {
+        "cache": elo_cache.info(),
+        "single_flight": elo_flight.info(),
+        "responses": response_cache.info(),
+        "status": "success"
+    }, 200
+
+@elo_blueprint.route('ai/status', methods=['GET'])
+def get_elo_ai_status():
+    """Circuit breaker state, concurrency and latency of the AI client"""
+    return {"ai": ai_client.info(), "status": "success"}, 200
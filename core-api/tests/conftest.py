@@ -0,0 +1,55 @@
+# core-api/tests/conftest.py
+
+import os
+import tempfile
+
+import pytest
+
+# Settings are read when src.config is imported, so they go first
+_workdir = tempfile.mkdtemp(prefix='core-api-tests-')
+os.environ.update({
+    'FLASK_ENV': 'testing',
+    'TEST_DATABASE_URL': 'sqlite:///' + os.path.join(_workdir, 'test.sqlite'),
+    'JWT_SECRET_KEY': 'test-secret-key-of-at-least-32-bytes!',
+    'ELO_WORKER_THREADS': '0',
+    'ELO_CACHE_DB': '',
+    'ELO_LOCK_DIR': os.path.join(_workdir, 'locks'),
+    'SENSOR_ARCHIVE_DIR': os.path.join(_workdir, 'archive'),
+    'OLLAMA_HOST': 'http://127.0.0.1:9',
+})
+
+from src import create_app  # noqa: E402
+from src.models import db  # noqa: E402
+from src.user.auth import init_jwt  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def api_app():
+    app = create_app('testing')
+    init_jwt(app)
+    return app
+
+
+@pytest.fixture
+def client(api_app):
+    """Test client over empty tables."""
+    with api_app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield api_app.test_client()
+        db.session.remove()
+
+
+def register(client, username, profile='BIKER'):
+    """Create a user through POST /users/; returns the response."""
+    return client.post('/users/', json={
+        'username': username, 'password': 'secret', 'email': f'{username}@example.com',
+        'name': username, 'lastname': 'Test', 'address': 'Street 1', 'phone': '600000000',
+        'gender': 'OTHER', 'profile': profile, 'membership_level': 'BASIC', 'birthdate': '1990-01-01',
+    })
+
+
+def login(client, username):
+    """Authorization header of a registered user."""
+    response = client.post('/users/login', json={'email': f'{username}@example.com', 'password': 'secret'})
+    return {'Authorization': f"Bearer {response.json['access_token']}"}
@@ -0,0 +1,112 @@
+# core-api/tests/test_aggregates.py
+
+import math
+import random
+from array import array
+from datetime import datetime, timedelta
+
+import pytest
+from conftest import login, register
+from flask import Flask
+from sqlalchemy import insert as insert_stmt, select
+
+from src.models import db, Gender, Profile, User, UserRiderAggregate, UserSensorData
+from src.user.aggregates import (WINDOW_METRICS, apply_readings_to_aggregates, fold_reading,
+                                 new_aggregate, rebuild_rider_aggregates)
+
+ALPHA = 0.2
+
+
+def random_reading(rng, timestamp):
+    reading = {'user_id': 1, 'timestamp': timestamp, 'last_month_miles': 100.0, 'total_miles': 1000.0}
+    for metric in WINDOW_METRICS:
+        reading[metric] = None if rng.random() < 0.2 else float(rng.randint(0, 150))
+    return reading
+
+
+def window_means(readings, window):
+    means = {}
+    for metric in WINDOW_METRICS:
+        known = [r[metric] for r in readings[-window:] if r[metric] is not None]
+        means[metric] = sum(known) / len(known) if known else None
+    return means
+
+
+def test_window_means_follow_the_last_readings():
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1)
+    for window in (1, 3, 20):
+        aggregate = new_aggregate(1)
+        readings = []
+        for i in range(10 * window + 7):
+            readings.append(random_reading(rng, start + timedelta(minutes=i)))
+            fold_reading(aggregate, readings[-1], ALPHA, window)
+            for metric, expected in window_means(readings, window).items():
+                actual = getattr(aggregate, f'window_{metric}')
+                assert (actual is None) == (expected is None)
+                assert actual is None or math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-9)
+        assert aggregate.reading_count == len(readings)
+
+
+def test_window_in_the_previous_layout_is_converted():
+    rng = random.Random(1)
+    start = datetime(2024, 1, 1)
+    readings = [random_reading(rng, start + timedelta(minutes=i)) for i in range(5)]
+    # Previous layout: just the packed readings, oldest first
+    packed = array('d', [math.nan if r[metric] is None else r[metric] for r in readings[:4] for metric in WINDOW_METRICS])
+    aggregate = UserRiderAggregate(user_id=1, reading_count=4, braking_total=0, window=packed.tobytes())
+
+    fold_reading(aggregate, readings[-1], ALPHA, 4)
+    for metric, expected in window_means(readings, 4).items():
+        actual = getattr(aggregate, f'window_{metric}')
+        assert actual is None or math.isclose(actual, expected)
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', AGGREGATE_EWMA_ALPHA=ALPHA, AGGREGATE_WINDOW=5)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, username='rider', email='rider@example.com', password='-', name='Rider',
+                            lastname='One', address='-', phone='-', gender=list(Gender)[0], profile=list(Profile)[0]))
+        db.session.commit()
+        yield app
+
+
+def insert(readings):
+    db.session.execute(insert_stmt(UserSensorData), readings)
+    apply_readings_to_aggregates(readings)
+    db.session.commit()
+
+
+def test_late_readings_give_the_aggregate_of_a_rebuild(app):
+    rng = random.Random(2)
+    start = datetime(2024, 1, 1)
+    readings = [random_reading(rng, start + timedelta(minutes=i)) for i in range(40)]
+    rng.shuffle(readings)
+    for i in range(0, len(readings), 8):
+        insert(readings[i:i + 8])  # batches arrive out of order
+    incremental = {column.key: value for column, value in zip(
+        UserRiderAggregate.__table__.columns, db.session.execute(select(UserRiderAggregate.__table__)).one())}
+
+    rebuild_rider_aggregates()
+    rebuilt = db.session.execute(select(UserRiderAggregate.__table__)).one()
+    for column, value in zip(UserRiderAggregate.__table__.columns, rebuilt):
+        if column.key != 'updated_at':
+            assert incremental[column.key] == value, column.key
+    assert rebuilt.reading_count == 40
+    assert rebuilt.last_timestamp == start + timedelta(minutes=39)
+
+
+def test_user_response_does_not_expose_the_aggregate(client):
+    user_id = register(client, 'rider').json['id']
+    headers = login(client, 'rider')
+    reading = {'user_id': user_id, 'last_month_miles': 10, 'total_miles': 100, 'heart_rate': 70}
+    assert client.post('/sensors/data', json=reading, headers=headers).status_code == 202
+    assert db.session.get(UserRiderAggregate, user_id) is not None
+
+    response = client.get(f'/users/user/{user_id}', headers=headers)
+    assert response.status_code == 200
+    assert 'rider_aggregate' not in response.json
@@ -0,0 +1,35 @@
+# core-api/tests/test_auth.py
+
+from conftest import login, register
+
+from src.models import db, Profile, User
+
+
+def test_admin_profile_cannot_be_self_assigned(client):
+    response = register(client, 'mallory', profile='ADMIN')
+    assert response.status_code == 403
+    assert User.query.filter_by(username='mallory').first() is None
+
+
+def test_self_registered_user_is_forbidden_on_other_users(client):
+    victim = register(client, 'alice').json['id']
+    assert register(client, 'mallory', profile='admin').status_code == 403
+    assert register(client, 'mallory').status_code == 201
+    headers = login(client, 'mallory')
+
+    reading = {'user_id': victim, 'last_month_miles': 10, 'total_miles': 100, 'heart_rate': 70}
+    assert client.post('/sensors/data', json=reading, headers=headers).status_code == 403
+    assert client.get(f'/elo/calculate/{victim}', headers=headers).status_code == 403
+    assert client.delete(f'/users/user/{victim}', headers=headers).status_code == 403
+    assert db.session.get(User, victim) is not None
+
+
+def test_granted_admin_passes_the_ownership_check(client):
+    victim = register(client, 'alice').json['id']
+    register(client, 'root')
+    User.query.filter_by(username='root').one().profile = Profile.ADMIN
+    db.session.commit()
+    headers = login(client, 'root')
+
+    reading = {'user_id': victim, 'last_month_miles': 10, 'total_miles': 100, 'heart_rate': 70}
+    assert client.post('/sensors/data', json=reading, headers=headers).status_code == 202
@@ -0,0 +1,108 @@
+# core-api/tests/test_elo_batch.py
+
+import json
+import re
+
+import pytest
+
+from src.models import EloSource
+from src.user import elo_service
+from src.user.elo_service import calculate_elo_batch, calculate_fallback_elo, elo_cache, parse_batch_scores
+
+
+def rider(i):
+    return {'last_month_miles': 100.0 + i, 'total_miles': 1000.0 + 60 * i, 'age': 30, 'heart_rate_avg': 70,
+            'braking_events': 2, 'avg_speed': 50, 'stress_level': 20, 'sleep_quality': 8}
+
+
+class FakeClient:
+    """`chat` replying through `reply(rider ids in the prompt)`."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.prompts = []
+
+    def chat(self, **kwargs):
+        prompt = kwargs['messages'][-1]['content']
+        self.prompts.append(prompt)
+        ids = [int(rider_id) for rider_id in re.findall(r'^- id (\d+):', prompt, re.M)]
+        return {'message': {'content': self.reply(ids)}}
+
+
+@pytest.fixture
+def fake_ai(api_app, monkeypatch):
+    def install(reply):
+        fake = FakeClient(reply)
+        monkeypatch.setattr(elo_service, 'client', fake)
+        return fake
+
+    with api_app.app_context():
+        elo_cache.clear()
+        yield install
+        elo_cache.clear()
+
+
+# --- parse_batch_scores ---
+def test_parse_reads_the_json_array_in_any_order():
+    raw = 'Scores:\n[{"id": 2, "elo": 61.26}, {"id": "1", "elo": "40"}]\nDone.'
+    assert parse_batch_scores(raw, [1, 2]) == {1: 40.0, 2: 61.3}
+
+
+def test_parse_leaves_out_missing_unknown_and_malformed_entries():
+    raw = json.dumps([{'id': 1, 'elo': 'high'}, {'id': 2}, {'id': 9, 'elo': 50}, 'x', {'elo': 10},
+                      {'id': 3, 'elo': 'NaN'}, {'id': 4, 'elo': 55}])
+    assert parse_batch_scores(raw, [1, 2, 3, 4, 5]) == {4: 55.0}
+
+
+def test_parse_drops_riders_scored_twice_and_clamps():
+    raw = json.dumps([{'id': 1, 'elo': 10}, {'id': 1, 'elo': 90}, {'id': 2, 'elo': 140}, {'id': 3, 'elo': -5}])
+    assert parse_batch_scores(raw, [1, 2, 3]) == {2: 100.0, 3: 0.0}
+
+
+@pytest.mark.parametrize('raw', ['', 'no scores', '[{"id": 1, "elo": 5}', '] [', '[1, 2', '{"id": 1, "elo": 5}'])
+def test_parse_without_a_json_array_finds_nothing(raw):
+    assert parse_batch_scores(raw, [1]) == {}
+
+
+# --- calculate_elo_batch ---
+def test_batch_uses_the_ai_scores_and_falls_back_per_rider(fake_ai):
+    riders = {i: rider(i) for i in range(1, 6)}
+    # Rider 3 missing, rider 4 malformed, an extra unknown rider
+    fake_ai(lambda ids: json.dumps([{'id': i, 'elo': 10.0 * i} for i in reversed(ids) if i not in (3, 4)]
+                                   + [{'id': 4, 'elo': 'n/a'}, {'id': 99, 'elo': 1}]))
+    sources = {}
+    scores = calculate_elo_batch(riders, batch_size=10, sources=sources)
+
+    assert scores == {1: 10.0, 2: 20.0, 3: calculate_fallback_elo(riders[3]),
+                      4: calculate_fallback_elo(riders[4]), 5: 50.0}
+    assert sources == {1: EloSource.AI, 2: EloSource.AI, 3: EloSource.FALLBACK,
+                       4: EloSource.FALLBACK, 5: EloSource.AI}
+
+
+def test_batch_splits_into_prompts_and_caches_ai_scores(fake_ai):
+    riders = {i: rider(i) for i in range(1, 8)}
+    fake = fake_ai(lambda ids: json.dumps([{'id': i, 'elo': 50 + i} for i in ids]))
+    assert calculate_elo_batch(riders, batch_size=3) == {i: 50.0 + i for i in riders}
+    assert len(fake.prompts) == 3
+
+    # Second run: every rider comes from the cache
+    sources = {}
+    assert calculate_elo_batch(riders, batch_size=3, sources=sources) == {i: 50.0 + i for i in riders}
+    assert len(fake.prompts) == 3
+    assert set(sources.values()) == {EloSource.AI}
+
+
+def test_batch_falls_back_for_everyone_on_garbage_or_errors(fake_ai):
+    riders = {i: rider(i) for i in range(1, 4)}
+    fallback = {i: calculate_fallback_elo(params) for i, params in riders.items()}
+    fake_ai(lambda ids: 'I cannot score these riders.')
+    assert calculate_elo_batch(riders, batch_size=10) == fallback
+
+    def fail(ids):
+        raise ConnectionError('AI down')
+    fake_ai(fail)
+    sources = {}
+    assert calculate_elo_batch(riders, batch_size=10, sources=sources) == fallback
+    assert set(sources.values()) == {EloSource.FALLBACK}
+    # Fallback scores are not cached
+    assert elo_cache.info()['size'] == 0
@@ -0,0 +1,117 @@
+# core-api/tests/test_elo_cache.py
+
+import pytest
+
+from src.user import elo_cache as elo_cache_module
+from src.user.elo_cache import EloCache
+
+STEPS = {'total_miles': 50.0, 'avg_speed': 0.5, 'age': 1.0}
+
+
+def params(total_miles=3000, avg_speed=55, age=30):
+    return {'total_miles': total_miles, 'avg_speed': avg_speed, 'age': age}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(elo_cache_module, 'time', fake)
+    return fake
+
+
+# --- Keys ---
+def test_keys_share_a_quantization_step():
+    cache = EloCache(quantization=STEPS)
+    key = cache.make_key(params(), 'm', 'p')
+    assert cache.make_key(params(total_miles=3010, avg_speed=55.2, age=30.4), 'm', 'p') == key
+    assert cache.make_key(params(total_miles=3050), 'm', 'p') != key
+    assert cache.make_key(params(avg_speed=55.5), 'm', 'p') != key
+    assert cache.make_key(params(), 'other-model', 'p') != key
+    assert cache.make_key(params(), 'm', 'other-prompt') != key
+
+
+def test_large_values_keep_distinct_keys():
+    cache = EloCache(quantization=STEPS)
+    # 6 significant digits would print both as 1.23457e+06
+    assert cache.make_key(params(total_miles=1_234_550), 'm', 'p') != \
+        cache.make_key(params(total_miles=1_234_600), 'm', 'p')
+    keys = {cache.make_key(params(total_miles=miles), 'm', 'p') for miles in range(10**7, 10**7 + 5000, 50)}
+    assert len(keys) == 100
+
+
+def test_make_key_needs_quantization_steps():
+    with pytest.raises(RuntimeError):
+        EloCache().make_key(params(), 'm', 'p')
+
+
+# --- Memory tier ---
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = EloCache(max_size=2, ttl=60)
+    cache.set('a', 1.0)
+    cache.set('b', 2.0)
+    assert cache.get('a') == 1.0  # 'b' is now the oldest
+    cache.set('c', 3.0)
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1.0, 3.0)
+    assert cache.info()['evictions'] == 1 and cache.info()['size'] == 2
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = EloCache(ttl=60)
+    cache.set('a', 1.0)
+    clock.now += 59
+    assert cache.get('a') == 1.0
+    clock.now += 1
+    assert cache.get('a') is None
+    info = cache.info()
+    assert (info['hits'], info['misses'], info['expirations'], info['size']) == (1, 1, 1, 0)
+
+
+# --- Disk tier ---
+def test_disk_tier_is_shared_and_survives_restarts(tmp_path, clock):
+    db_path = str(tmp_path / 'elo_cache.sqlite')
+    EloCache(ttl=60, db_path=db_path).set('a', 1.0)
+
+    other = EloCache(ttl=60, db_path=db_path)
+    assert other.get('a') == 1.0
+    assert other.info()['disk_hits'] == 1
+    # Promoted to memory
+    assert other.get('a') == 1.0
+    assert other.info()['hits'] == 1
+
+
+def test_disk_tier_expires_and_clears(tmp_path, clock):
+    db_path = str(tmp_path / 'elo_cache.sqlite')
+    EloCache(ttl=60, db_path=db_path).set('a', 1.0)
+    clock.now += 60
+    assert EloCache(ttl=60, db_path=db_path).get('a') is None
+
+    cache = EloCache(ttl=60, db_path=db_path)
+    cache.set('b', 2.0)
+    cache.clear()
+    assert cache.get('b') is None
+    assert EloCache(ttl=60, db_path=db_path).get('b') is None
+
+
+def test_evicted_entries_come_back_from_disk(tmp_path, clock):
+    cache = EloCache(max_size=1, ttl=60, db_path=str(tmp_path / 'elo_cache.sqlite'))
+    cache.set('a', 1.0)
+    cache.set('b', 2.0)
+    assert cache.get('a') == 1.0
+    assert cache.info()['disk_hits'] == 1
+
+
+def test_unreadable_disk_file_degrades_to_memory(tmp_path, clock):
+    cache = EloCache(ttl=60, db_path=str(tmp_path / 'missing-dir' / 'elo_cache.sqlite'))
+    cache.set('a', 1.0)
+    assert cache.get('a') == 1.0
+    assert cache.get('b') is None
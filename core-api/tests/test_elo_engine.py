@@ -0,0 +1,75 @@
+# core-api/tests/test_elo_engine.py
+
+import math
+import random
+
+import numpy as np
+
+from src.user.elo_engine import elo_engine
+
+
+def baseline_fallback_elo(params):
+    """calculate_fallback_elo as it was before the rules table (ELO_RULES)."""
+    factors = {
+        'last_month': min(params['last_month_miles'] / 500, 1.0),
+        'total': min(params['total_miles'] / 5000, 1.0),
+        'age': 1.0 if 25 <= params['age'] <= 45 else 0.8 if 18 <= params['age'] < 25 else 0.6 if params['age'] > 60 else 0.4,
+        'heart': 1.0 if 60 <= params['heart_rate_avg'] <= 100 else 0.8 if 50 <= params['heart_rate_avg'] < 60 else 0.6 if 100 < params['heart_rate_avg'] <= 120 else 0.4,
+        'brakes': max(1.0 - params['braking_events'] / 20, 0.0),
+        'speed': 1.0 if 40 <= params['avg_speed'] <= 70 else 0.8 if 30 <= params['avg_speed'] < 40 else 0.6 if 70 < params['avg_speed'] <= 80 else 0.4,
+        'stress': 1.0 if params['stress_level'] < 30 else 0.8 if params['stress_level'] <= 50 else 0.6 if params['stress_level'] <= 70 else 0.4,
+        'sleep': 1.0 if params['sleep_quality'] >= 8 else 0.8 if 6 <= params['sleep_quality'] < 8 else 0.6 if 4 <= params['sleep_quality'] < 6 else 0.4
+    }
+    weights = {
+        'last_month': 0.2, 'total': 0.1, 'age': 0.15, 'heart': 0.15,
+        'brakes': 0.15, 'speed': 0.1, 'stress': 0.05, 'sleep': 0.05
+    }
+    total = sum(factors[factor] * weights[factor] for factor in factors)
+    return round(total * 100, 1)
+
+
+def random_rider(rng):
+    # Round-ish values (as sensors report them) make half-way totals common
+    return {
+        'last_month_miles': rng.choice([rng.uniform(0, 800), float(rng.randint(0, 800))]),
+        'total_miles': rng.choice([rng.uniform(0, 8000), float(rng.randint(0, 8000))]),
+        'age': rng.randint(16, 80),
+        'heart_rate_avg': rng.choice([rng.uniform(40, 140), rng.randint(40, 140)]),
+        'braking_events': rng.choice([rng.uniform(0, 30), rng.randint(0, 30)]),
+        'avg_speed': rng.choice([rng.uniform(0, 120), rng.randint(0, 120)]),
+        'stress_level': rng.randint(0, 100),
+        'sleep_quality': rng.randint(0, 10),
+    }
+
+
+def test_score_matches_baseline_formula():
+    rng = random.Random(0)
+    riders = [random_rider(rng) for _ in range(200_000)]
+    columns = {param: [rider[param] for rider in riders] for param in elo_engine.params}
+
+    scores = elo_engine.score(columns)
+    mismatches = [(rider, score) for rider, score in zip(riders, scores.tolist())
+                  if score != baseline_fallback_elo(rider)]
+    assert mismatches == []
+
+
+def test_score_one_matches_baseline_on_band_edges():
+    edges = {
+        'last_month_miles': [0, 250, 500, 501], 'total_miles': [0, 2500, 5000],
+        'age': [17, 18, 25, 45, 46, 60, 61], 'heart_rate_avg': [49, 50, 60, 100, 101, 120, 121],
+        'braking_events': [0, 10, 20, 21], 'avg_speed': [29, 30, 40, 70, 71, 80, 81],
+        'stress_level': [29, 30, 50, 51, 70, 71], 'sleep_quality': [3, 4, 6, 8],
+    }
+    rng = random.Random(1)
+    for _ in range(5000):
+        rider = {param: rng.choice(values) for param, values in edges.items()}
+        assert elo_engine.score_one(rider) == baseline_fallback_elo(rider)
+
+
+def test_missing_input_scores_nan():
+    rider = random_rider(random.Random(2))
+    columns = {param: [rider[param], rider[param]] for param in elo_engine.params}
+    columns['age'] = [rider['age'], np.nan]
+    scores = elo_engine.score(columns)
+    assert scores[0] == baseline_fallback_elo(rider)
+    assert math.isnan(scores[1])
@@ -0,0 +1,127 @@
+# core-api/tests/test_elo_jobs.py
+
+from datetime import datetime, timedelta
+
+import pytest
+from conftest import login, register
+from sqlalchemy import update
+
+from src.models import db, EloJob, EloSource, JobStatus, User
+from src.user import elo_jobs
+from src.user.elo_jobs import claim_jobs, drain_once
+
+READING = {'last_month_miles': 120, 'total_miles': 3000, 'heart_rate': 72, 'avg_speed': 55,
+           'braking_events': 3, 'stress_level': 20, 'sleep_quality': 8}
+
+
+def submit_reading(client, username):
+    user_id = register(client, username).json['id']
+    response = client.post('/sensors/data', json={**READING, 'user_id': user_id}, headers=login(client, username))
+    assert response.status_code == 202
+    return user_id, response.json['job_id']
+
+
+@pytest.fixture
+def scores(monkeypatch):
+    """Replace batch scoring: returns 42 per rider, or raises `scores.error` when set."""
+    class FakeScoring:
+        error = None
+        calls = 0
+
+        def __call__(self, riders, sources=None, **kwargs):
+            self.calls += 1
+            if self.error:
+                raise self.error
+            sources.update({key: EloSource.AI for key in riders})
+            return {key: 42.0 for key in riders}
+
+    fake = FakeScoring()
+    monkeypatch.setattr(elo_jobs, 'calculate_elo_batch', fake)
+    return fake
+
+
+def test_claim_hands_each_pending_job_to_one_worker(client):
+    jobs = [submit_reading(client, f'rider{i}')[1] for i in range(3)]
+    assert claim_jobs(2) == jobs[:2]
+    assert claim_jobs(5) == jobs[2:]
+    assert claim_jobs(5) == []
+    assert {job.status for job in EloJob.query} == {JobStatus.RUNNING}
+    assert {job.attempts for job in EloJob.query} == {1}
+
+
+def test_claim_skips_jobs_taken_between_select_and_update(client, monkeypatch):
+    first, second = submit_reading(client, 'alice')[1], submit_reading(client, 'bob')[1]
+    execute = db.session.execute
+
+    def racing_execute(statement, *args, **kwargs):
+        result = execute(statement, *args, **kwargs)
+        if racing_execute.first_call:
+            # Another worker claims `first` once this one has read the candidates
+            racing_execute.first_call = False
+            execute(update(EloJob).where(EloJob.id == first).values(status=JobStatus.RUNNING))
+        return result
+    racing_execute.first_call = True
+    monkeypatch.setattr(db.session, 'execute', racing_execute)
+
+    assert claim_jobs(2) == [second]
+
+
+def test_done_job_stores_the_score(client, scores):
+    user_id, job_id = submit_reading(client, 'alice')
+    assert drain_once(5) == 1
+
+    job = db.session.get(EloJob, job_id)
+    assert (job.status, job.elo_score, job.attempts, job.error) == (JobStatus.DONE, 42.0, 1, None)
+    assert job.finished_at is not None and job.retry_after is None
+    assert db.session.get(User, user_id).elo_score == 42.0
+    assert client.get(f'/elo/jobs/{job_id}').json['job_status'] == 'DONE'
+
+
+def test_rider_that_cant_be_scored_fails_on_the_first_attempt(client, scores):
+    user_id, job_id = submit_reading(client, 'alice')
+    db.session.get(User, user_id).birthdate = None
+    db.session.commit()
+
+    assert drain_once(5) == 1
+    job = db.session.get(EloJob, job_id)
+    assert (job.status, job.attempts, job.retry_after) == (JobStatus.FAILED, 1, None)
+    assert 'age' in job.error
+    assert claim_jobs(5) == []
+
+
+def test_transient_errors_retry_with_backoff_until_failed(client, scores, api_app):
+    backoff, max_attempts = api_app.config['ELO_JOB_RETRY_BACKOFF'], api_app.config['ELO_JOB_MAX_ATTEMPTS']
+    _, job_id = submit_reading(client, 'alice')
+    scores.error = ConnectionError('database went away')
+
+    for attempt in range(1, max_attempts):
+        before = datetime.utcnow()
+        assert drain_once(5) == 1
+        job = db.session.get(EloJob, job_id)
+        assert (job.status, job.attempts, job.error) == (JobStatus.PENDING, attempt, 'database went away')
+        delay = timedelta(seconds=backoff * 2 ** (attempt - 1))
+        assert before + delay <= job.retry_after <= datetime.utcnow() + delay
+
+        # Not claimed again before the delay is over
+        assert drain_once(5) == 0
+        job.retry_after = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+    assert drain_once(5) == 1
+    job = db.session.get(EloJob, job_id)
+    assert (job.status, job.attempts) == (JobStatus.FAILED, max_attempts)
+    assert scores.calls == max_attempts
+    assert drain_once(5) == 0
+
+
+def test_retried_job_can_still_succeed(client, scores):
+    _, job_id = submit_reading(client, 'alice')
+    scores.error = ConnectionError('database went away')
+    drain_once(5)
+
+    scores.error = None
+    db.session.get(EloJob, job_id).retry_after = datetime.utcnow()
+    db.session.commit()
+    assert drain_once(5) == 1
+    job = db.session.get(EloJob, job_id)
+    assert (job.status, job.attempts, job.error, job.retry_after) == (JobStatus.DONE, 2, None, None)
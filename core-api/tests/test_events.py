@@ -0,0 +1,96 @@
+# core-api/tests/test_events.py
+
+import math
+import random
+from datetime import datetime
+
+from conftest import login, register
+
+from src.events.event_index import EventIndex, IntervalTree
+from src.models import db, Event, Profile, User
+
+EVENT = {'title': 'Track day', 'min_elo': 100, 'max_elo': 500}
+
+
+def test_self_registered_user_cannot_manage_events(client):
+    assert register(client, 'mallory', profile='ADMIN').status_code == 403
+    register(client, 'mallory')
+    headers = login(client, 'mallory')
+    event = Event(title='Existing')
+    db.session.add(event)
+    db.session.commit()
+
+    assert client.post('/events/', json=EVENT, headers=headers).status_code == 403
+    assert client.delete(f'/events/{event.id}', headers=headers).status_code == 403
+
+
+def test_starts_at_is_stored_as_naive_utc(client):
+    register(client, 'root')
+    User.query.filter_by(username='root').one().profile = Profile.ADMIN
+    db.session.commit()
+    headers = login(client, 'root')
+
+    response = client.post('/events/', json={**EVENT, 'starts_at': '2025-06-01T10:00:00+02:00'}, headers=headers)
+    assert response.status_code == 201
+    assert response.json['starts_at'] == '2025-06-01T08:00:00'
+    assert db.session.get(Event, response.json['id']).starts_at == datetime(2025, 6, 1, 8, 0)
+
+
+# --- ELO range index ---
+def random_bound(rng):
+    # Integer bounds make exact boundary hits common; None is an open bound
+    return rng.choice([None, float(rng.randint(0, 1000)), round(rng.uniform(0, 1000), 2)])
+
+
+def random_events(rng, n):
+    events = []
+    for _ in range(n):
+        lo, hi = random_bound(rng), random_bound(rng)
+        if lo is not None and hi is not None and lo > hi:
+            lo, hi = hi, lo
+        events.append((lo, hi))
+    return events
+
+
+def brute_force(events, elo):
+    return [i for i, (lo, hi) in enumerate(events)
+            if (lo is None or lo <= elo) and (hi is None or elo <= hi)]
+
+
+def query_points(rng, events):
+    bounds = [bound for event in events for bound in event if bound is not None]
+    points = [rng.uniform(-100, 1100) for _ in range(300)] + [float(rng.randint(-5, 1005)) for _ in range(300)]
+    for bound in rng.sample(bounds, min(len(bounds), 200)):
+        points += [bound, bound - 1e-9, bound + 1e-9]
+    return points
+
+
+def test_interval_tree_stab_matches_brute_force():
+    rng = random.Random(0)
+    for n in (0, 1, 2, 10, 300):
+        events = random_events(rng, n)
+        tree = IntervalTree([(-math.inf if lo is None else lo, math.inf if hi is None else hi, i)
+                             for i, (lo, hi) in enumerate(events)])
+        for elo in query_points(rng, events) if events else [0.0, 1.5]:
+            assert sorted(position for _, _, position in tree.stab(elo)) == brute_force(events, elo)
+
+
+def test_event_index_matching_matches_brute_force(client):
+    rng = random.Random(1)
+    events = random_events(rng, 400)
+    db.session.add_all([Event(title=f'e{i}', min_elo=lo, max_elo=hi, starts_at=datetime(2025, 1, 1 + i % 28))
+                        for i, (lo, hi) in enumerate(events)])
+    db.session.commit()
+    by_id = {event.id: (event.min_elo, event.max_elo) for event in Event.query}
+    points = query_points(rng, events)
+
+    for bucket_width in (1.0, 0.5, 7.0, 250.0):
+        index = EventIndex(bucket_width=bucket_width, max_buckets=64)
+        index.reload()
+        for elo in points:
+            matched = index.matching(elo)
+            expected = [event_id for event_id, (lo, hi) in by_id.items()
+                        if (lo is None or lo <= elo) and (hi is None or elo <= hi)]
+            assert sorted(event['id'] for event in matched) == sorted(expected), (bucket_width, elo)
+            # Ordered by start date
+            assert [event['starts_at'] for event in matched] == sorted(event['starts_at'] for event in matched)
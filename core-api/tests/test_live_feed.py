@@ -0,0 +1,57 @@
+# core-api/tests/test_live_feed.py
+
+import json
+
+from src.user.live_feed import LiveFeed, _StreamReader
+
+
+def loaded_feed(riders=3):
+    feed = LiveFeed(buffer_size=100)
+    feed._loaded = True  # skip the DB load
+    for user_id in range(1, riders + 1):
+        feed.publish(user_id, title=f'r{user_id}', latitude=40.0 + user_id, longitude=-3.0, elo_score=50.0)
+    return feed
+
+
+def event_ids(messages):
+    return [line[4:] for message in messages for line in message.splitlines() if line.startswith('id: ')]
+
+
+def test_event_ids_carry_the_process_epoch():
+    feed = loaded_feed()
+    reader = _StreamReader(feed, None, json.dumps)
+    snapshot = reader.start(None)
+    assert event_ids(snapshot) == [f'{feed.epoch}-{feed._seq}']
+
+    feed.publish(2, latitude=45.0)
+    assert event_ids([reader.poll()]) == [f'{feed.epoch}-{feed._seq}']
+
+
+def test_resumes_from_an_event_id_of_the_same_process():
+    feed = loaded_feed()
+    reader = _StreamReader(feed, None, json.dumps)
+    last_id = event_ids(reader.start(None))[-1]
+    feed.publish(1, latitude=41.5)
+
+    resumed = _StreamReader(feed, None, json.dumps)
+    assert resumed.start(last_id) == []
+    assert 'event: update' in resumed.poll()
+
+
+def test_event_id_of_another_process_gets_a_snapshot():
+    worker_a, worker_b = loaded_feed(3), loaded_feed(10)
+    last_id = event_ids(_StreamReader(worker_a, None, json.dumps).start(None))[-1]
+    # Same sequence number range on both workers, different epochs
+    assert int(last_id.rpartition('-')[2]) <= worker_b._seq
+
+    reader = _StreamReader(worker_b, None, json.dumps)
+    messages = reader.start(last_id)
+    assert len(messages) == 1 and 'event: snapshot' in messages[0]
+    assert len(reader.visible) == 10
+
+
+def test_malformed_event_ids_get_a_snapshot():
+    feed = loaded_feed()
+    for last_id in ('3', 'abc', f'{feed.epoch}-', f'{feed.epoch}-x', f'{feed.epoch}-999', ''):
+        messages = _StreamReader(feed, None, json.dumps).start(last_id)
+        assert 'event: snapshot' in messages[0], last_id
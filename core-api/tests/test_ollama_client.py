@@ -0,0 +1,185 @@
+# core-api/tests/test_ollama_client.py
+
+import threading
+
+import pytest
+from ollama import ResponseError
+
+from src.user import ollama_client
+from src.user.ollama_client import CircuitBreaker, CircuitOpenError, ResilientOllamaClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(ollama_client, 'time', fake)
+    return fake
+
+
+def open_breaker(threshold=3, reset_timeout=30.0):
+    breaker = CircuitBreaker(failure_threshold=threshold, reset_timeout=reset_timeout)
+    for _ in range(threshold):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    return breaker
+
+
+# --- CircuitBreaker ---
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30.0)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # resets the streak
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    info = breaker.info()
+    assert (info['opened'], info['rejected'], info['retry_in']) == (1, 1, 30.0)
+
+
+def test_half_open_lets_a_single_probe_through(clock):
+    breaker = open_breaker()
+    clock.now += 29.9
+    assert not breaker.allow_request()
+
+    clock.now += 0.1
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()  # the probe is still running
+
+
+def test_successful_probe_closes(clock):
+    breaker = open_breaker()
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.consecutive_failures == 0
+    assert all(breaker.allow_request() for _ in range(5))
+
+
+def test_failed_probe_opens_again_for_a_full_timeout(clock):
+    breaker = open_breaker()
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 29
+    assert not breaker.allow_request()
+    clock.now += 1
+    assert breaker.allow_request()
+
+
+def test_released_probe_lets_the_next_caller_probe(clock):
+    breaker = open_breaker()
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.release_probe()
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_only_one_concurrent_probe(clock):
+    breaker = open_breaker()
+    clock.now += 30
+    start = threading.Barrier(8)
+    allowed = []
+
+    def caller():
+        start.wait()
+        allowed.append(breaker.allow_request())
+
+    threads = [threading.Thread(target=caller) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(allowed) == [False] * 7 + [True]
+
+
+# --- ResilientOllamaClient ---
+class FakeHttpClient:
+    def __init__(self):
+        self._call = threading.local()
+        self.error = None
+        self.calls = 0
+
+    def chat(self, **kwargs):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return {'message': {'content': 'ok'}}
+
+
+@pytest.fixture
+def ai(clock):
+    client = ResilientOllamaClient('http://ai.test', failure_threshold=2, reset_timeout=10.0)
+    client._client = FakeHttpClient()
+    return client
+
+
+def test_client_fails_fast_while_open_and_recovers(ai, clock):
+    ai._client.error = ConnectionError('refused')
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            ai.chat(model='m', messages=[])
+    with pytest.raises(CircuitOpenError):
+        ai.chat(model='m', messages=[])
+    assert ai._client.calls == 2
+
+    clock.now += 10
+    ai._client.error = None
+    assert ai.chat(model='m', messages=[]) == {'message': {'content': 'ok'}}
+    assert ai.breaker.state == CircuitBreaker.CLOSED
+    assert ai.info()['in_flight'] == 0
+
+
+def test_client_errors_outside_the_server_dont_open(ai, clock):
+    ai._client.error = ResponseError('model not found', 404)
+    for _ in range(5):
+        with pytest.raises(ResponseError):
+            ai.chat(model='m', messages=[])
+    assert ai.breaker.state == CircuitBreaker.CLOSED
+
+    ai._client.error = ResponseError('overloaded', 503)
+    for _ in range(2):
+        with pytest.raises(ResponseError):
+            ai.chat(model='m', messages=[])
+    assert ai.breaker.state == CircuitBreaker.OPEN
+
+
+def test_client_error_on_a_probe_releases_it(ai, clock):
+    ai._client.error = TimeoutError()
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            ai.chat(model='m', messages=[])
+    assert ai.info()['timeouts'] == 2
+
+    clock.now += 10
+    ai._client.error = ResponseError('bad request', 400)
+    with pytest.raises(ResponseError):
+        ai.chat(model='m', messages=[])
+    assert ai.breaker.state == CircuitBreaker.HALF_OPEN
+
+    ai._client.error = None
+    ai.chat(model='m', messages=[])
+    assert ai.breaker.state == CircuitBreaker.CLOSED
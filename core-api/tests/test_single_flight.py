@@ -0,0 +1,156 @@
+# core-api/tests/test_single_flight.py
+
+import fcntl
+import threading
+import time
+
+import pytest
+
+from src.user.single_flight import SingleFlight
+
+
+def run_in_threads(n, target):
+    results = [None] * n
+    errors = [None] * n
+
+    def runner(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=runner, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+class SlowCall:
+    """fn that blocks until released, counting how often it ran."""
+
+    def __init__(self, result=42.0, error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+# --- In-process ---
+def test_followers_get_the_leader_result():
+    flight = SingleFlight()
+    fn = SlowCall()
+    threads, results, errors = run_in_threads(5, lambda: flight.do('key', fn))
+    assert fn.started.wait(5)
+    wait_for(lambda: flight.info()['coalesced'] == 4)
+    fn.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == [42.0] * 5 and errors == [None] * 5
+    assert fn.calls == 1
+    assert flight.info()['leaders'] == 1 and flight.info()['in_flight'] == 0
+
+
+def test_followers_get_the_leader_error():
+    flight = SingleFlight()
+    fn = SlowCall(error=ConnectionError('AI down'))
+    threads, results, errors = run_in_threads(3, lambda: flight.do('key', fn))
+    wait_for(lambda: flight.info()['coalesced'] == 2)
+    fn.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(error, ConnectionError) for error in errors)
+    assert fn.calls == 1
+    # Nothing is kept: the next call runs again
+    assert flight.do('key', lambda: 7) == 7
+
+
+def test_other_keys_are_not_coalesced():
+    flight = SingleFlight()
+    fn = SlowCall()
+    threads, _, _ = run_in_threads(1, lambda: flight.do('a', fn))
+    assert fn.started.wait(5)
+    assert flight.do('b', lambda: 1) == 1
+    fn.release.set()
+    threads[0].join()
+    assert flight.info()['coalesced'] == 0
+
+
+# --- Across processes (lock files) ---
+# flock locks belong to the open file, so two instances sharing a lock_dir
+# contend like two gunicorn workers would
+def test_waiting_worker_reuses_the_holder_result(tmp_path):
+    worker_a, worker_b = SingleFlight(str(tmp_path)), SingleFlight(str(tmp_path))
+    fn = SlowCall()
+    threads, results, _ = run_in_threads(1, lambda: worker_a.do('key', fn))
+    assert fn.started.wait(5)
+
+    other_fn = SlowCall(result=-1.0)
+    other_fn.release.set()
+    waiter, waiter_results, _ = run_in_threads(1, lambda: worker_b.do('key', other_fn))
+    # worker_b blocks on the lock file in its helper thread
+    wait_for(lambda: any(thread.name == 'single-flight-lock' for thread in threading.enumerate()))
+    fn.release.set()
+    for thread in threads + waiter:
+        thread.join()
+
+    assert results == [42.0] and waiter_results == [42.0]
+    assert other_fn.calls == 0
+    assert worker_b.info()['cross_process_coalesced'] == 1
+    assert list(tmp_path.iterdir()) == []  # the holder unlinked the lock file
+
+
+def test_later_calls_compute_again(tmp_path):
+    worker_a, worker_b = SingleFlight(str(tmp_path)), SingleFlight(str(tmp_path))
+    assert worker_a.do('key', lambda: 1) == 1
+    assert worker_b.do('key', lambda: 2) == 2
+    assert worker_a.do('key', lambda: 3) == 3
+    assert worker_b.info()['cross_process_coalesced'] == 0
+
+
+def test_lock_timeout_computes_without_the_lock(tmp_path):
+    flight = SingleFlight(str(tmp_path), lock_timeout=0.2)
+    with open(flight._lock_path('key'), 'a+') as held:
+        fcntl.flock(held, fcntl.LOCK_EX)
+        started = time.monotonic()
+        assert flight.do('key', lambda: 5) == 5
+        assert 0.2 <= time.monotonic() - started < 2
+        assert flight.info()['lock_timeouts'] == 1
+        fcntl.flock(held, fcntl.LOCK_UN)
+
+    # The helper thread that got the lock late released it again
+    with open(flight._lock_path('key'), 'a+') as probe:
+        wait_for(lambda: _try_lock(probe))
+
+
+def _try_lock(lock_file):
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    return True
+
+
+@pytest.mark.parametrize('lock_dir', [None, ''])
+def test_without_a_lock_dir_only_coalesces_in_process(lock_dir):
+    flight = SingleFlight(lock_dir)
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.info()['cross_process'] is False